@@ -1,9 +1,18 @@
+import os
+import threading
+from collections.abc import Mapping
 import numpy as np
-import pandas as pd
 import openai as ai
 from src.util.config_helper import CONFIG
-from sentence_transformers import SentenceTransformer
-from sklearn.cluster import AgglomerativeClustering
+from src.affinity_grouper.embedding_cache import EmbeddingCache
+from src.affinity_grouper.embedding_engine import EmbeddingEngine
+from src.affinity_grouper.clustering_backend import ClusteringBackend
+from src.affinity_grouper.dendrogram import Dendrogram
+from src.affinity_grouper.cut_selector import CutSelector
+from src.affinity_grouper.cluster_labeler import ClusterLabeler
+from src.affinity_grouper.local_labeler import LocalLabeler
+from src.affinity_grouper.cluster_digest import ClusterDigester
+from src.affinity_grouper.cluster_result import ClusterResult
 
 class AffinityGrouper:
     def __init__(self):
@@ -14,17 +23,143 @@ class AffinityGrouper:
         self.agglomerative_linkage = CONFIG["ai_grouping"]["AI_LINKAGE_TYPE"]
         self.agglomerative_metric = CONFIG["ai_grouping"]["AI_METRIC_TYPE"]
         self.openai_api_key = CONFIG["credentials"]["OPENAI_API_KEY"]
-
-    def __find_centroid_sentence(self, sentences, embeddings):
-        cluster_center = np.mean(embeddings, axis=0)
-        similarities = np.inner(embeddings, cluster_center)
-        return sentences[np.argmax(similarities)]
-
-    def getAffinityGroups(self,
-                      notes,
-                      model_name=None,
-                      n_clusters=None,
-                      n_distance_threshold=None):
+        self.embedding_cache_toggle = CONFIG["ai_grouping"]["AI_EMBEDDING_CACHE_TOGGLE"]
+        self.dendrogram_cache_toggle = CONFIG["ai_grouping"]["AI_DENDROGRAM_CACHE_TOGGLE"]
+        self.dendrogram_folder = CONFIG["ai_grouping"]["AI_DENDROGRAM_FOLDER"]
+        self.dendrogram_cache_size = CONFIG["ai_grouping"]["AI_DENDROGRAM_CACHE_SIZE"]
+        self.story_map_thresholds = CONFIG["ai_grouping"]["AI_STORY_MAP_THRESHOLDS"]
+        self.label_engine = CONFIG["ai_grouping"]["AI_LABEL_ENGINE"]
+
+        # Silhouette score per candidate cluster count from the last "auto" run
+        self.cut_scores = {}
+
+        # One open embedding cache per model, so its index stays in memory between calls
+        self.embedding_caches = {}
+        self.embedding_caches_lock = threading.Lock()
+
+    def __encode(self, model_name, notes):
+        # Length-bucketed batches, sharded across processes for large boards
+        engine = EmbeddingEngine(model_name)
+        if not self.embedding_cache_toggle:
+            return engine.encode(notes)
+
+        # Only encode the notes the on-disk cache has not seen for this model
+        with self.embedding_caches_lock:
+            cache = self.embedding_caches.get(model_name)
+            if cache is None:
+                cache = self.embedding_caches[model_name] = EmbeddingCache(model_name)
+        embeddings, missing = cache.lookup(notes)
+        if missing:
+            encoded = engine.encode([notes[i] for i in missing])
+            if embeddings is None:
+                embeddings = np.zeros((len(notes), encoded.shape[1]), dtype=np.float32)
+            embeddings[missing] = encoded
+        cache.store([notes[i] for i in missing], embeddings[missing])
+        return embeddings
+
+    def __get_dendrogram(self, notes, model_name, embeddings=None):
+        # The tree only depends on the notes, model and linkage settings, so a threshold or
+        # cluster-count change reuses it and skips both embedding and fitting
+        backend = ClusteringBackend()
+        note_ids = [EmbeddingCache.key(note) for note in notes]
+        cache_key = Dendrogram.cacheKey(note_ids, model_name, *backend.treeSettings(len(notes)))
+        path = os.path.join(self.dendrogram_folder, f"{cache_key}.npz")
+
+        dendrogram = Dendrogram.load(path) if self.dendrogram_cache_toggle else None
+        if dendrogram is None:
+            embeddings = embeddings if embeddings is not None else self.__encode(model_name, notes)
+            dendrogram = backend.fitDendrogram(embeddings, note_ids)
+            if self.dendrogram_cache_toggle:
+                dendrogram.save(path)
+                Dendrogram.prune(self.dendrogram_folder, self.dendrogram_cache_size)
+        return dendrogram
+
+    def __cluster(self, notes, model_name, n_clusters, n_distance_threshold, embeddings=None):
+        backend = ClusteringBackend()
+        if self.agglomerative_type == "auto":
+            # One embedding pass and one tree; every candidate cut is scored from them
+            embeddings = embeddings if embeddings is not None else self.__encode(model_name, notes)
+            dendrogram = self.__get_dendrogram(notes, model_name, embeddings)
+            labels, n_clusters, self.cut_scores = CutSelector().selectCut(dendrogram, embeddings)
+            print(f"Auto cut selected {n_clusters} clusters. Silhouette by cluster count: {self.cut_scores}")
+            return labels, embeddings
+
+        # A cached tree is cut without embedding the notes at all
+        if self.dendrogram_cache_toggle and len(notes) > 1 and backend.selectBackend(len(notes)) != "two_stage":
+            dendrogram = self.__get_dendrogram(notes, model_name, embeddings)
+            return dendrogram.cut(distance_threshold=n_distance_threshold, n_clusters=n_clusters), embeddings
+
+        # Exact agglomerative for small boards, sparse or two-stage variants for large ones
+        embeddings = embeddings if embeddings is not None else self.__encode(model_name, notes)
+        return backend.fitPredict(embeddings, n_clusters=n_clusters, distance_threshold=n_distance_threshold), embeddings
+
+    def encode(self, notes, model_name=None):
+        """Embeds notes the same way grouping does, so callers can embed ahead of clustering."""
+        return self.__encode(model_name if model_name else self.model_name, notes)
+
+    def labelClusters(self, result, clusters=None, model_name=None):
+        """Returns summaries for the given clusters of a ClusterResult (all by default), in that order."""
+        if self.label_engine not in ("llm", "local", "hybrid"):
+            raise ValueError(f"Unknown label engine: {self.label_engine}")
+        model_name = model_name if model_name else self.model_name
+        clusters = list(clusters) if clusters is not None else list(range(result.nClusters()))
+
+        clusters_texts = [result.texts(cluster) for cluster in clusters]
+        oversized = not all(ClusterDigester().fits(cluster_texts) for cluster_texts in clusters_texts)
+        if result.embeddings is None and (oversized or self.label_engine != "llm"):
+            result.setEmbeddings(self.__encode(model_name, result.notes), self.agglomerative_metric)
+
+        summaries = None
+        if self.label_engine != "llm":
+            local_labels = self.localLabels(result, model_name)
+            summaries = [local_labels[cluster] for cluster in clusters]
+            if self.label_engine == "local":
+                return summaries
+
+        # Prompt text per cluster stays under the token budget however large the cluster is
+        digests = None
+        if oversized:
+            digester = ClusterDigester()
+            digests = [digester.digest(cluster_texts, result.embeddings[result.members(cluster)])
+                       for cluster, cluster_texts in zip(clusters, clusters_texts)]
+
+        # Summaries are requested concurrently but returned in cluster order
+        try:
+            # hybrid: the local labels go along as drafts for the LLM to refine
+            return ClusterLabeler(api_key=self.openai_api_key).labelClusters(clusters_texts, digests, summaries)
+        except ai.APIError as e:
+            if summaries is None:
+                raise
+            # hybrid: keep the local labels if the LLM can't be reached
+            print(f"LLM labeling failed, keeping local labels: {e}")
+            return summaries
+
+    def localLabels(self, result, model_name=None):
+        """Returns local labels for every cluster of a ClusterResult, computed once over the whole
+        board so keyphrase weights do not depend on which clusters are labeled together."""
+        if result.local_labels is None:
+            if result.embeddings is None:
+                result.setEmbeddings(self.__encode(model_name if model_name else self.model_name, result.notes), self.agglomerative_metric)
+            result.local_labels = LocalLabeler().labelClusters(result.notes, result.embeddings, result.labels)
+        return result.local_labels
+
+    def getStoryMapLevels(self,
+                          notes,
+                          distance_thresholds=None,
+                          model_name=None):
+        """Cuts one cached merge tree at several thresholds, coarsest first, and nests the
+        results: backbone activity -> task -> the notes (stories) themselves."""
+        model_name = model_name if model_name else self.model_name
+        distance_thresholds = distance_thresholds if distance_thresholds else self.story_map_thresholds
+        return self.__get_dendrogram(notes, model_name).hierarchy(distance_thresholds, notes)
+
+    def clusterNotes(self,
+                     notes,
+                     model_name=None,
+                     n_clusters=None,
+                     n_distance_threshold=None,
+                     embeddings=None):
+        """Clusters notes without labeling them; embeddings may be passed in if already computed."""
         model_name = model_name if model_name else self.model_name
 
         # Determine the type of agglomerative clustering to use, either by distance threshold or number of clusters. Set the other to None.
@@ -34,60 +169,29 @@ class AffinityGrouper:
         elif self.agglomerative_type == "clusters":
             n_distance_threshold = None
             n_clusters = n_clusters if n_clusters else self.n_clusters
+        elif self.agglomerative_type == "auto":
+            n_clusters = None
+            n_distance_threshold = None
         else:
             raise ValueError(f"Unknown agglomerative type: {self.agglomerative_type}")
         
-        model = SentenceTransformer(model_name)
-        
-        embeddings = model.encode(notes, convert_to_tensor=True)
-#        embeddings = embeddings.cpu().numpy()
-        clustering_model = AgglomerativeClustering(n_clusters=n_clusters, distance_threshold=n_distance_threshold, linkage=self.agglomerative_linkage, metric=self.agglomerative_metric, compute_full_tree=True)
-        clustering_model.fit(embeddings)
-        labels = clustering_model.labels_
-        print(clustering_model.labels_)
-
-        df = pd.DataFrame({
-            "text": notes,
-            "embedding": list(embeddings),
-            "label": labels
-        })
-
-        # Group notes by their cluster labels
-        clusters = {}
-        ai.api_key = self.openai_api_key
-
-        for label in sorted(df["label"].unique()):
-            cluster_df = df[df["label"] == label]
-            cluster_texts = cluster_df["text"].tolist()
-            
-            # Use most central sentence as label
-#            cluster_embeddings = np.array(cluster_df["embedding"].tolist())
-#            label_sentence = self.__find_centroid_sentence(cluster_texts, cluster_embeddings)
-
-            # Use average centroid of all sentences as label; combine all sentences in the cluster
-            combined_text = " ".join(cluster_texts)
-            
-            # Create a prompt for summarization
-            prompt = f"Briefly summarize the main theme of these related items as an activity in 5-7 words: {combined_text}"
-
-            # Requesting a summary from ChatGPT (using the chat-completion API)
-            response = ai.chat.completions.create(
-                model="gpt-3.5-turbo",  # Or "gpt-4" if you want to use a different version
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": f"{prompt}"}
-                ],
-                max_tokens=100,  # Limit the length of the summary
-                temperature=0.3  # Controls randomness, lower is more deterministic
-            )
-
-            # Extract and assign label as the summary from the response
-            response_dict = response.to_dict()
-            summary = response_dict['choices'][0]['message']['content'].strip()
-
-            label_sentence = f"{summary}"   # ({len(cluster_texts)} items)"
-            
-            clusters[label_sentence] = cluster_texts
+        labels, embeddings = self.__cluster(notes, model_name, n_clusters, n_distance_threshold, embeddings)
+        print(labels)
+
+        # Group notes by their cluster labels in one sort; reads as {summary: [notes]}
+        result = ClusterResult(notes, labels)
+        if embeddings is not None:
+            result.setEmbeddings(embeddings, self.agglomerative_metric)
+        return result
+
+    def getAffinityGroups(self,
+                      notes,
+                      model_name=None,
+                      n_clusters=None,
+                      n_distance_threshold=None):
+        model_name = model_name if model_name else self.model_name
+        clusters = self.clusterNotes(notes, model_name, n_clusters, n_distance_threshold)
+        clusters.summaries = self.labelClusters(clusters, model_name=model_name)
 
 #        for group_label, entries in clusters.items():
 #            print(f"\n🔹 {group_label}")
@@ -99,7 +203,8 @@ class AffinityGrouper:
   
 
     def printAffinityGroups(self, affinity_groups):
-        for cluster_id, stories in affinity_groups.items():
+        groups = affinity_groups.items() if isinstance(affinity_groups, Mapping) else affinity_groups
+        for cluster_id, stories in groups:
 #            cluster_title = f"{cluster_id}"
 
             # Create an Epic (blue card)
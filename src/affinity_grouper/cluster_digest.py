@@ -0,0 +1,47 @@
+import numpy as np
+from src.util.config_helper import CONFIG
+from sklearn.preprocessing import normalize
+from src.affinity_grouper.cluster_labeler import ClusterLabeler
+
+class ClusterDigester:
+    """Picks the notes of a cluster that go into its label prompt.
+
+    Notes are chosen greedily by maximal marginal relevance: similarity to the cluster
+    centroid, minus AI_LABEL_DIGEST_DIVERSITY times the similarity to the closest note
+    already chosen, until AI_LABEL_DIGEST_TOKENS of prompt text is used. Clusters that
+    already fit the budget are passed through whole.
+    """
+    def __init__(self, token_budget=None, diversity=None):
+        self.token_budget = token_budget if token_budget else CONFIG["ai_grouping"]["AI_LABEL_DIGEST_TOKENS"]
+        self.diversity = diversity if diversity is not None else CONFIG["ai_grouping"]["AI_LABEL_DIGEST_DIVERSITY"]
+
+    def fits(self, cluster_texts):
+        return ClusterLabeler.estimateTokens(" ".join(cluster_texts)) <= self.token_budget
+
+    def digest(self, cluster_texts, cluster_embeddings):
+        """Returns the chosen notes in their original order."""
+        if self.fits(cluster_texts):
+            return list(cluster_texts)
+
+        tokens = np.array([ClusterLabeler.estimateTokens(text) for text in cluster_texts])
+        vectors = normalize(np.asarray(cluster_embeddings, dtype=np.float64))
+        relevance = vectors @ normalize(vectors.mean(axis=0, keepdims=True))[0]
+        redundancy = np.zeros(len(cluster_texts))
+        candidates = np.ones(len(cluster_texts), dtype=bool)
+        remaining = self.token_budget
+        chosen = []
+        while True:
+            candidates &= tokens <= remaining
+            if not candidates.any():
+                break
+            scores = np.where(candidates, (1 - self.diversity) * relevance - self.diversity * redundancy, -np.inf)
+            best = int(np.argmax(scores))
+            chosen.append(best)
+            candidates[best] = False
+            remaining -= tokens[best]
+            redundancy = np.maximum(redundancy, vectors @ vectors[best])
+
+        if not chosen:
+            # Every note is over budget on its own; keep the start of the most central one
+            return [cluster_texts[int(np.argmax(relevance))][:self.token_budget * 4]]
+        return [cluster_texts[i] for i in sorted(chosen)]
@@ -0,0 +1,145 @@
+import json
+import openai as ai
+from concurrent.futures import ThreadPoolExecutor
+from src.util.config_helper import CONFIG
+from src.affinity_grouper.label_cache import LabelCache
+
+LABEL_PROMPT = "Briefly summarize the main theme of these related items as an activity in 5-7 words: {combined_text}"
+DRAFT_PROMPT = "\nDraft label: {draft}\nKeep the draft if it fits the items, otherwise improve it."
+
+class ClusterLabeler:
+    """Summarizes clusters into activity labels with an LLM.
+
+    Up to AI_LABEL_CONCURRENCY requests are in flight at once. Each request is bounded by
+    AI_LABEL_TIMEOUT and retried up to AI_LABEL_RETRIES times by the OpenAI client on
+    transient failures (connection errors, 408/409/429 and 5xx, honoring Retry-After).
+
+    AI_LABEL_MODE = "batch" packs many clusters into one prompt and asks for a JSON list
+    of labels keyed by cluster id, chunked to AI_LABEL_BATCH_TOKENS of prompt. Clusters
+    whose label is missing or unparsable are relabeled one request each.
+
+    With AI_LABEL_CACHE_TOGGLE on, labels are looked up in a LabelCache first and only
+    clusters with no cached (or near-identical) label are sent to the model.
+
+    Prompts can be built from per-cluster digests instead of every note; the cache is
+    still keyed by the full membership. Draft labels (e.g. from LocalLabeler) can be passed
+    along for the model to refine rather than summarize from scratch.
+    """
+    def __init__(self, api_key=None, base_url=None):
+        api_key = api_key if api_key else CONFIG["credentials"]["OPENAI_API_KEY"]
+        base_url = base_url if base_url else CONFIG["ai_grouping"]["AI_LABEL_BASE_URL"]
+        self.model = CONFIG["ai_grouping"]["AI_LABEL_MODEL"]
+        self.concurrency = CONFIG["ai_grouping"]["AI_LABEL_CONCURRENCY"]
+        self.label_mode = CONFIG["ai_grouping"]["AI_LABEL_MODE"]
+        self.batch_tokens = CONFIG["ai_grouping"]["AI_LABEL_BATCH_TOKENS"]
+        self.batch_max_clusters = CONFIG["ai_grouping"]["AI_LABEL_BATCH_MAX_CLUSTERS"]
+        self.cache_toggle = CONFIG["ai_grouping"]["AI_LABEL_CACHE_TOGGLE"]
+        self.client = ai.OpenAI(api_key=api_key,
+                                base_url=base_url if base_url else None,
+                                timeout=CONFIG["ai_grouping"]["AI_LABEL_TIMEOUT"],
+                                max_retries=CONFIG["ai_grouping"]["AI_LABEL_RETRIES"])
+
+    def labelCluster(self, cluster_texts, draft=None):
+        # Use average centroid of all sentences as label; combine all sentences in the cluster
+        combined_text = " ".join(cluster_texts)
+
+        # Create a prompt for summarization
+        prompt = LABEL_PROMPT.format(combined_text=combined_text)
+        if draft:
+            prompt += DRAFT_PROMPT.format(draft=draft)
+
+        # Requesting a summary from ChatGPT (using the chat-completion API)
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": f"{prompt}"}
+            ],
+            max_tokens=100,  # Limit the length of the summary
+            temperature=0.3  # Controls randomness, lower is more deterministic
+        )
+
+        # Extract and assign label as the summary from the response
+        response_dict = response.to_dict()
+        return response_dict['choices'][0]['message']['content'].strip()
+
+    @staticmethod
+    def estimateTokens(text):
+        # Roughly 4 characters per token for English text; good enough for budgeting prompts
+        return len(text) // 4 + 1
+
+    def __batches(self, clusters_texts):
+        batches, batch, batch_tokens = [], [], 0
+        for cluster_id, cluster_texts in enumerate(clusters_texts):
+            tokens = self.estimateTokens(" ".join(cluster_texts)) + 10
+            if batch and (batch_tokens + tokens > self.batch_tokens or len(batch) >= self.batch_max_clusters):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(cluster_id)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def __labelBatch(self, cluster_ids, clusters_texts, drafts):
+        groups = "\n".join(f"Group {cluster_id}: {' '.join(clusters_texts[cluster_id])}"
+                           + (f" (draft label: {drafts[cluster_id]})" if drafts[cluster_id] else "")
+                           for cluster_id in cluster_ids)
+        prompt = ("For each group of related items below, briefly summarize the main theme as an activity in 5-7 words. "
+                  + ("Where a group has a draft label, keep it if it fits the items, otherwise improve it. "
+                     if any(drafts[cluster_id] for cluster_id in cluster_ids) else "")
+                  + "Respond only with JSON of the form {\"labels\": [{\"id\": <group number>, \"label\": \"<activity>\"}]}.\n"
+                  f"{groups}")
+
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": f"{prompt}"}
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=30 * len(cluster_ids) + 50,
+                temperature=0.3
+            )
+            content = response.to_dict()['choices'][0]['message']['content']
+            labels = {int(item["id"]): str(item["label"]).strip() for item in json.loads(content)["labels"]
+                      if str(item.get("label", "")).strip()}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # An unparsable answer; API errors propagate so a refusing endpoint isn't asked once per cluster
+            labels = {}
+
+        # Anything the model skipped, renamed or mangled gets its own request
+        return {cluster_id: labels[cluster_id] if cluster_id in labels else self.labelCluster(clusters_texts[cluster_id], drafts[cluster_id])
+                for cluster_id in cluster_ids}
+
+    def __requestLabels(self, clusters_texts, drafts=None):
+        drafts = drafts if drafts else [None] * len(clusters_texts)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            if self.label_mode == "single":
+                return list(executor.map(self.labelCluster, clusters_texts, drafts))
+            elif self.label_mode == "batch":
+                labels = {}
+                for batch_labels in executor.map(lambda batch: self.__labelBatch(batch, clusters_texts, drafts), self.__batches(clusters_texts)):
+                    labels.update(batch_labels)
+                return [labels[cluster_id] for cluster_id in range(len(clusters_texts))]
+            else:
+                raise ValueError(f"Unknown label mode: {self.label_mode}")
+
+    def labelClusters(self, clusters_texts, digests=None, drafts=None):
+        """Labels every cluster concurrently; labels come back in the order of the input."""
+        digests = digests if digests else clusters_texts
+        if not self.cache_toggle:
+            return self.__requestLabels(digests, drafts)
+
+        # Refined labels are cached apart from labels written from scratch
+        cache = LabelCache(self.model, LABEL_PROMPT + DRAFT_PROMPT if drafts else LABEL_PROMPT)
+        labels = [cache.get(cluster_texts) for cluster_texts in clusters_texts]
+        misses = [cluster_id for cluster_id, label in enumerate(labels) if label is None]
+        if misses:
+            miss_drafts = [drafts[cluster_id] for cluster_id in misses] if drafts else None
+            for cluster_id, label in zip(misses, self.__requestLabels([digests[cluster_id] for cluster_id in misses], miss_drafts)):
+                labels[cluster_id] = label
+                cache.put(clusters_texts[cluster_id], label)
+        cache.save()
+        return labels
@@ -0,0 +1,78 @@
+import numpy as np
+from collections.abc import Mapping
+
+class ClusterResult(Mapping):
+    """Clustered notes held in contiguous arrays.
+
+    order      - note indices sorted by cluster, so cluster c is order[offsets[c]:offsets[c + 1]]
+    labels     - 0-based cluster of every note, in board order
+    offsets    - start of each cluster in `order`, plus the total note count
+    embeddings - the note embeddings, once attached
+    centroids  - mean embedding per cluster, once embeddings are attached
+    distances  - each note's distance to its cluster centroid, once embeddings are attached
+
+    It also reads as a {summary: [note texts]} mapping, which is what printAffinityGroups and
+    JiraConnector.postGroupsToJira iterate. items(), keys() and values() list every cluster,
+    even when two clusters share a summary.
+    """
+    def __init__(self, notes, labels, summaries=None):
+        self.notes = list(notes)
+        labels = np.asarray(labels)
+        self.order = np.argsort(labels, kind="stable")
+        sorted_labels = labels[self.order]
+        starts = np.r_[True, sorted_labels[1:] != sorted_labels[:-1]] if len(labels) else np.zeros(0, dtype=bool)
+        self.offsets = np.r_[np.flatnonzero(starts), len(labels)]
+        self.labels = np.empty(len(labels), dtype=np.int64)
+        self.labels[self.order] = np.cumsum(starts) - 1
+        self.embeddings = None
+        self.centroids = None
+        self.distances = None
+        self.summaries = list(summaries) if summaries else [str(cluster) for cluster in range(self.nClusters())]
+        # Offline labels for every cluster, once computed by AffinityGrouper.localLabels
+        self.local_labels = None
+
+    def nClusters(self):
+        return len(self.offsets) - 1
+
+    def sizes(self):
+        return np.diff(self.offsets)
+
+    def members(self, cluster):
+        return self.order[self.offsets[cluster]:self.offsets[cluster + 1]]
+
+    def texts(self, cluster):
+        return [self.notes[i] for i in self.members(cluster)]
+
+    def clustersTexts(self):
+        return [self.texts(cluster) for cluster in range(self.nClusters())]
+
+    def setEmbeddings(self, embeddings, metric="cosine"):
+        self.embeddings = np.asarray(embeddings)
+        embeddings = np.asarray(embeddings, dtype=np.float64)
+        if metric == "cosine":
+            embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        self.centroids = np.add.reduceat(embeddings[self.order], self.offsets[:-1], axis=0) / self.sizes()[:, None]
+        note_centroids = self.centroids[self.labels]
+        if metric == "cosine":
+            norms = np.maximum(np.linalg.norm(note_centroids, axis=1), 1e-12)
+            self.distances = 1 - np.einsum("ij,ij->i", embeddings, note_centroids) / norms
+        else:
+            self.distances = np.linalg.norm(embeddings - note_centroids, axis=1)
+
+    def __getitem__(self, summary):
+        return self.texts(self.summaries.index(summary))
+
+    def __iter__(self):
+        return iter(self.summaries)
+
+    def __len__(self):
+        return self.nClusters()
+
+    def keys(self):
+        return list(self.summaries)
+
+    def values(self):
+        return self.clustersTexts()
+
+    def items(self):
+        return list(zip(self.summaries, self.clustersTexts()))
@@ -0,0 +1,170 @@
+import math
+import numpy as np
+from src.util.config_helper import CONFIG
+from src.affinity_grouper.dendrogram import Dendrogram
+from sklearn.cluster import AgglomerativeClustering, MiniBatchKMeans
+from sklearn.neighbors import kneighbors_graph
+from sklearn.preprocessing import normalize
+
+class ClusteringBackend:
+    """Agglomerative clustering that scales with the number of notes.
+
+    exact      - full pairwise agglomerative clustering, O(n^2) memory (the original path)
+    knn        - agglomerative restricted to a sparse k-nearest-neighbour connectivity graph
+    two_stage  - coarse MiniBatchKMeans partitions, then exact agglomerative inside each one
+    auto       - exact up to AI_EXACT_MAX_NOTES, knn up to AI_KNN_MAX_NOTES, two_stage above
+    """
+    def __init__(self, backend=None):
+        self.backend = backend if backend else CONFIG["ai_grouping"]["AI_CLUSTERING_BACKEND"]
+        self.linkage = CONFIG["ai_grouping"]["AI_LINKAGE_TYPE"]
+        self.metric = CONFIG["ai_grouping"]["AI_METRIC_TYPE"]
+        self.exact_max_notes = CONFIG["ai_grouping"]["AI_EXACT_MAX_NOTES"]
+        self.knn_max_notes = CONFIG["ai_grouping"]["AI_KNN_MAX_NOTES"]
+        self.knn_neighbors = CONFIG["ai_grouping"]["AI_KNN_NEIGHBORS"]
+        self.partition_size = CONFIG["ai_grouping"]["AI_PARTITION_SIZE"]
+
+    def selectBackend(self, n_notes):
+        if self.backend != "auto":
+            return self.backend
+        if n_notes <= self.exact_max_notes:
+            return "exact"
+        if n_notes <= self.knn_max_notes:
+            return "knn"
+        return "two_stage"
+
+    def __agglomerative(self, n_clusters, distance_threshold, connectivity=None):
+        return AgglomerativeClustering(n_clusters=n_clusters, distance_threshold=distance_threshold, linkage=self.linkage,
+                                       metric=self.metric, connectivity=connectivity, compute_full_tree=True)
+
+    def __fit_exact(self, embeddings, n_clusters, distance_threshold):
+        return self.__agglomerative(n_clusters, distance_threshold).fit(embeddings).labels_
+
+    def __knn_connectivity(self, embeddings):
+        # Merges are only considered along the k nearest neighbours of each note, so the
+        # linkage works on an O(n*k) sparse graph instead of the full distance matrix
+        return kneighbors_graph(embeddings, n_neighbors=min(self.knn_neighbors, len(embeddings) - 1),
+                                metric=self.metric, include_self=False)
+
+    def __fit_knn(self, embeddings, n_clusters, distance_threshold):
+        return self.__agglomerative(n_clusters, distance_threshold, self.__knn_connectivity(embeddings)).fit(embeddings).labels_
+
+    def __stage_one(self, embeddings, partition_clusters, distance_threshold=None):
+        # Coarse MiniBatchKMeans partitions, then exact agglomerative inside each one.
+        # partition_clusters(size) gives the clusters to cut a partition into, or None to cut
+        # at distance_threshold. Returns the sub-cluster of every note and the sub-cluster count.
+        n_partitions = math.ceil(len(embeddings) / self.partition_size)
+        vectors = normalize(embeddings) if self.metric == "cosine" else embeddings
+        partitions = MiniBatchKMeans(n_clusters=n_partitions, n_init=3, random_state=0).fit_predict(vectors)
+
+        sub_labels = np.empty(len(embeddings), dtype=np.int64)
+        n_sub_clusters = 0
+        for partition in range(n_partitions):
+            members = np.flatnonzero(partitions == partition)
+            if len(members) < 2:
+                sub_labels[members] = np.arange(n_sub_clusters, n_sub_clusters + len(members))
+                n_sub_clusters += len(members)
+                continue
+            partition_labels = self.__agglomerative(partition_clusters(len(members)), distance_threshold).fit(embeddings[members]).labels_
+            sub_labels[members] = partition_labels + n_sub_clusters
+            n_sub_clusters += partition_labels.max() + 1
+        return sub_labels, n_sub_clusters
+
+    @staticmethod
+    def __centroids(embeddings, sub_labels, n_sub_clusters):
+        counts = np.bincount(sub_labels, minlength=n_sub_clusters)
+        centroids = np.zeros((n_sub_clusters, embeddings.shape[1]))
+        np.add.at(centroids, sub_labels, embeddings)
+        return centroids / counts[:, None]
+
+    def __fit_two_stage(self, embeddings, n_clusters, distance_threshold):
+        # In cluster-count mode over-split each partition; stage two merges back down
+        n_notes = len(embeddings)
+        sub_labels, n_sub_clusters = self.__stage_one(
+            embeddings, lambda size: None if n_clusters is None else min(size, max(1, 4 * math.ceil(n_clusters * size / n_notes))),
+            distance_threshold)
+
+        # Stage two: cluster the sub-cluster centroids so groups cut by a partition
+        # boundary are joined again
+        centroids = self.__centroids(embeddings, sub_labels, n_sub_clusters)
+        if n_sub_clusters < 2 or (n_clusters is not None and n_sub_clusters <= n_clusters):
+            return sub_labels
+        if n_sub_clusters <= self.exact_max_notes:
+            merged = self.__fit_exact(centroids, n_clusters, distance_threshold)
+        else:
+            merged = self.__fit_knn(centroids, n_clusters, distance_threshold)
+        return merged[sub_labels]
+
+    def __two_stage_dendrogram(self, embeddings, note_ids):
+        # Stage one splits the board into about AI_EXACT_MAX_NOTES sub-clusters and stage two
+        # builds the tree over their centroids. Notes of a sub-cluster are merged at height 0
+        # below it, so every cut down to the sub-cluster count is a cut of the centroid tree.
+        n_notes = len(embeddings)
+        sub_labels, n_sub_clusters = self.__stage_one(
+            embeddings, lambda size: min(size, max(1, math.ceil(self.exact_max_notes * size / n_notes))))
+
+        rows, sizes, roots = [], [], []
+        def merge(left, right, distance):
+            size = (sizes[left - n_notes] if left >= n_notes else 1) + (sizes[right - n_notes] if right >= n_notes else 1)
+            rows.append((left, right, distance, size))
+            sizes.append(size)
+            return n_notes + len(rows) - 1
+
+        order = np.argsort(sub_labels, kind="stable")
+        starts = np.searchsorted(sub_labels[order], np.arange(n_sub_clusters + 1))
+        for sub_cluster in range(n_sub_clusters):
+            members = order[starts[sub_cluster]:starts[sub_cluster + 1]]
+            node = members[0]
+            for member in members[1:]:
+                node = merge(node, member, 0.0)
+            roots.append(node)
+
+        if n_sub_clusters > 1:
+            centroids = self.__centroids(embeddings, sub_labels, n_sub_clusters)
+            connectivity = self.__knn_connectivity(centroids) if n_sub_clusters > self.exact_max_notes else None
+            clustering_model = self.__agglomerative(None, 0, connectivity).fit(centroids)
+            for (left, right), distance in zip(clustering_model.children_, np.maximum.accumulate(clustering_model.distances_)):
+                roots.append(merge(roots[left], roots[right], distance))
+        return Dendrogram(np.array(rows, dtype=np.float64).reshape(-1, 4), note_ids)
+
+    def treeSettings(self, n_notes):
+        """Every setting the merge tree for n_notes depends on, e.g. to key a saved tree."""
+        backend = self.selectBackend(n_notes)
+        settings = [self.linkage, self.metric, backend]
+        if backend == "knn":
+            settings.append(self.knn_neighbors)
+        elif backend == "two_stage":
+            # Sub-clusters are merged over a k-NN graph once there are more than exact_max_notes of them
+            settings += [self.partition_size, self.exact_max_notes, self.knn_neighbors]
+        return settings
+
+    def fitDendrogram(self, embeddings, note_ids):
+        """Fits the full merge tree once so it can be cut at any threshold later. two_stage
+        builds it over the stage-one sub-clusters, so it cannot split one of them."""
+        embeddings = np.asarray(embeddings)
+        backend = self.selectBackend(len(embeddings))
+        if backend == "exact":
+            connectivity = None
+        elif backend == "knn":
+            connectivity = self.__knn_connectivity(embeddings)
+        elif backend == "two_stage":
+            return self.__two_stage_dendrogram(embeddings, note_ids)
+        else:
+            raise ValueError(f"Unknown clustering backend: {backend}")
+        # distance_threshold=0 with n_clusters=None forces the whole tree and its merge distances
+        clustering_model = self.__agglomerative(None, 0, connectivity).fit(embeddings)
+        return Dendrogram.fromAgglomerative(clustering_model, note_ids)
+
+    def fitPredict(self, embeddings, n_clusters=None, distance_threshold=None):
+        embeddings = np.asarray(embeddings)
+        if len(embeddings) < 2:
+            return np.zeros(len(embeddings), dtype=np.int64)
+
+        backend = self.selectBackend(len(embeddings))
+        if backend == "exact":
+            return self.__fit_exact(embeddings, n_clusters, distance_threshold)
+        elif backend == "knn":
+            return self.__fit_knn(embeddings, n_clusters, distance_threshold)
+        elif backend == "two_stage":
+            return self.__fit_two_stage(embeddings, n_clusters, distance_threshold)
+        else:
+            raise ValueError(f"Unknown clustering backend: {backend}")
@@ -0,0 +1,57 @@
+import numpy as np
+from src.util.config_helper import CONFIG
+from sklearn.metrics import pairwise_distances
+
+class CutSelector:
+    """Picks the cluster count for AI_AGGLOMERATIVE_TYPE = "auto".
+
+    Every candidate cut comes from the same dendrogram and is scored with the mean
+    silhouette over one fixed sample of notes. The sample's pairwise distances are
+    computed once and every candidate is scored from them with a few matrix products.
+    """
+    def __init__(self, sample_size=None, min_clusters=None, max_clusters=None):
+        self.metric = CONFIG["ai_grouping"]["AI_METRIC_TYPE"]
+        self.sample_size = sample_size if sample_size else CONFIG["ai_grouping"]["AI_AUTO_SAMPLE_SIZE"]
+        self.min_clusters = min_clusters if min_clusters else CONFIG["ai_grouping"]["AI_AUTO_MIN_CLUSTERS"]
+        self.max_clusters = max_clusters if max_clusters else CONFIG["ai_grouping"]["AI_AUTO_MAX_CLUSTERS"]
+
+    def __silhouette(self, distances, labels):
+        # Vectorized silhouette: column j of `sums` holds each note's total distance to cluster j
+        _, labels = np.unique(labels, return_inverse=True)
+        n_labels = labels.max() + 1
+        if n_labels < 2 or n_labels >= len(labels):
+            return -1.0
+        one_hot = np.zeros((len(labels), n_labels))
+        one_hot[np.arange(len(labels)), labels] = 1.0
+        counts = one_hot.sum(axis=0)
+        sums = distances @ one_hot
+
+        own = np.arange(len(labels)), labels
+        own_counts = counts[labels]
+        a = np.divide(sums[own], own_counts - 1, out=np.zeros(len(labels)), where=own_counts > 1)
+        means = sums / counts
+        means[own] = np.inf
+        b = means.min(axis=1)
+        scores = np.where(own_counts > 1, (b - a) / np.maximum(np.maximum(a, b), 1e-12), 0.0)
+        return float(scores.mean())
+
+    def selectCut(self, dendrogram, embeddings):
+        """Returns (labels, n_clusters, scores) where scores maps each candidate count to its silhouette."""
+        embeddings = np.asarray(embeddings)
+        n_notes = len(embeddings)
+        sample = np.arange(n_notes)
+        if n_notes > self.sample_size:
+            sample = np.sort(np.random.default_rng(0).choice(n_notes, self.sample_size, replace=False))
+        distances = pairwise_distances(embeddings[sample], metric=self.metric)
+
+        scores = {}
+        best = None
+        for n_clusters in range(self.min_clusters, min(self.max_clusters, n_notes - 1) + 1):
+            labels = dendrogram.cut(n_clusters=n_clusters)
+            scores[n_clusters] = self.__silhouette(distances, labels[sample])
+            if best is None or scores[n_clusters] > scores[best[1]]:
+                best = (labels, n_clusters)
+
+        if best is None:
+            return dendrogram.cut(n_clusters=1), 1, scores
+        return best[0], best[1], scores
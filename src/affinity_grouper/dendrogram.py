@@ -0,0 +1,96 @@
+import os
+import hashlib
+import numpy as np
+from scipy.cluster.hierarchy import fcluster
+
+class Dendrogram:
+    """Full agglomerative merge tree that can be re-cut without refitting.
+
+    The tree is kept as a scipy linkage matrix (one row per merge: child a, child b,
+    merge distance, size) next to the ids of the notes it was fit on, and is saved to
+    disk with np.savez so later runs over the same notes can skip embedding and fitting.
+    """
+    def __init__(self, linkage_matrix, note_ids):
+        self.linkage_matrix = linkage_matrix
+        self.note_ids = list(note_ids)
+
+    @classmethod
+    def fromAgglomerative(cls, clustering_model, note_ids):
+        # sklearn's children_/distances_ describe the same merges scipy expects, minus sizes
+        n_notes = len(note_ids)
+        children = clustering_model.children_
+        sizes = np.zeros(len(children))
+        for i, (left, right) in enumerate(children):
+            sizes[i] = (1 if left < n_notes else sizes[left - n_notes]) + (1 if right < n_notes else sizes[right - n_notes])
+        # Connectivity-constrained trees can have small inversions; scipy needs monotonic heights
+        distances = np.maximum.accumulate(clustering_model.distances_)
+        linkage_matrix = np.column_stack([children, distances, sizes]).astype(np.float64)
+        return cls(linkage_matrix, note_ids)
+
+    @staticmethod
+    def cacheKey(note_ids, *settings):
+        digest = hashlib.sha1("\n".join(map(str, settings)).encode())
+        for note_id in note_ids:
+            digest.update(note_id.encode())
+        return digest.hexdigest()
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, linkage_matrix=self.linkage_matrix, note_ids=np.array(self.note_ids))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path) as data:
+                dendrogram = cls(data["linkage_matrix"], data["note_ids"].tolist())
+            # The modification time doubles as the last use for prune()
+            os.utime(path)
+        except FileNotFoundError:
+            # Never saved, or pruned by another run in the meantime
+            return None
+        return dendrogram
+
+    @staticmethod
+    def prune(folder, max_files):
+        """Deletes the least recently used saved trees in folder beyond max_files."""
+        trees = []
+        for entry in os.scandir(folder):
+            if entry.name.endswith(".npz") and not entry.name.endswith(".tmp.npz"):
+                try:
+                    trees.append((entry.stat().st_mtime_ns, entry.path))
+                except FileNotFoundError:
+                    continue
+        for _, path in sorted(trees)[:max(0, len(trees) - max_files)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def cut(self, distance_threshold=None, n_clusters=None):
+        """Returns 0-based cluster labels for a cut at a distance or a cluster count."""
+        if len(self.note_ids) < 2:
+            return np.zeros(len(self.note_ids), dtype=np.int64)
+        if distance_threshold is not None:
+            # sklearn merges while distance < threshold; fcluster keeps merges <= t
+            labels = fcluster(self.linkage_matrix, t=np.nextafter(distance_threshold, -np.inf), criterion="distance")
+        elif n_clusters is not None:
+            labels = fcluster(self.linkage_matrix, t=n_clusters, criterion="maxclust")
+        else:
+            raise ValueError("Either distance_threshold or n_clusters is required to cut the dendrogram")
+        return labels - 1
+
+    def hierarchy(self, distance_thresholds, notes):
+        """Nests several cuts of the tree, coarsest first, e.g. activity -> task -> story.
+
+        Returns {level_0_label: {level_1_label: ... [notes]}} with the notes as leaves.
+        """
+        levels = [self.cut(distance_threshold=threshold) for threshold in sorted(distance_thresholds, reverse=True)]
+        tree = {}
+        for position, note in enumerate(notes):
+            node = tree
+            for level in levels[:-1]:
+                node = node.setdefault(int(level[position]), {})
+            node.setdefault(int(levels[-1][position]), []).append(note)
+        return tree
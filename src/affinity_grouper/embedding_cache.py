@@ -0,0 +1,220 @@
+import os
+import json
+import fcntl
+import hashlib
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+from src.util.config_helper import CONFIG
+
+# Log records folded into index.json at least this many at a time
+COMPACT_MIN_RECORDS = 1000
+
+class EmbeddingCache:
+    """On-disk embedding store keyed by (model name, normalized text hash).
+
+    Vectors live in a float32 memory-mapped file with one slot per entry. index.json holds
+    the capacity, the free slots and the entries in least recently used order; index.log
+    records every insert, use and eviction since, so a store only appends what it changed.
+    The log is folded back into index.json once it outgrows it. Each instance keeps the
+    index in memory and only reads what other processes appended since.
+
+    A lock file gives readers a shared lock and writers an exclusive one, so several
+    processes can use the same cache at once, and an instance can be shared between threads.
+    Raising AI_EMBEDDING_CACHE_SIZE grows the vector file; lowering it evicts on the next store.
+    """
+    def __init__(self, model_name, cache_folder=None, max_entries=None):
+        self.model_name = model_name
+        cache_folder = cache_folder if cache_folder else CONFIG["ai_grouping"]["AI_EMBEDDING_CACHE_FOLDER"]
+        self.max_entries = max_entries if max_entries else CONFIG["ai_grouping"]["AI_EMBEDDING_CACHE_SIZE"]
+        self.folder = os.path.join(cache_folder, hashlib.sha1(model_name.encode()).hexdigest()[:16])
+        self.index_path = os.path.join(self.folder, "index.json")
+        self.log_path = os.path.join(self.folder, "index.log")
+        self.vectors_path = os.path.join(self.folder, "vectors.f32")
+        os.makedirs(self.folder, exist_ok=True)
+        self.lock_file = open(os.path.join(self.folder, "lock"), "a")
+        self.lock = threading.Lock()
+
+        # In-memory copy of the index, brought up to date under the file lock
+        self.dim = None
+        self.capacity = 0
+        self.next_slot = 0
+        self.free = set()
+        self.entries = OrderedDict()
+        self.index_version = None
+        self.log_offset = 0
+        self.log_records = 0
+
+        # Keys hit by lookups since the last store(); their recency is persisted by it
+        self.__touched = set()
+
+    @staticmethod
+    def key(text):
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    def __load_index(self):
+        self.dim, self.capacity, self.next_slot = None, 0, 0
+        self.free, self.entries = set(), OrderedDict()
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.dim = index["dim"]
+        self.capacity, self.next_slot = index["capacity"], index["next_slot"]
+        self.free = set(index["free"])
+        self.entries = OrderedDict(index["entries"])
+
+    def __apply(self, record):
+        op, key = record[0], record[1]
+        if op == "p":
+            slot = record[2]
+            self.entries[key] = slot
+            self.entries.move_to_end(key)
+            self.free.discard(slot)
+            self.next_slot = max(self.next_slot, slot + 1)
+        elif op == "u" and key in self.entries:
+            self.entries.move_to_end(key)
+        elif op == "e" and key in self.entries:
+            self.free.add(self.entries.pop(key))
+
+    def __refresh(self):
+        # Reload index.json if it was rewritten since, then replay the log lines not seen yet
+        try:
+            stat = os.stat(self.index_path)
+            version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            version = None
+        if version != self.index_version:
+            self.__load_index()
+            self.index_version, self.log_offset, self.log_records = version, 0, 0
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self.log_offset)
+            data = f.read()
+        self.log_offset += len(data)
+        for line in data.split(b"\n"):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # An empty line, or a torn one from a crashed writer
+                continue
+            self.__apply(record)
+            self.log_records += 1
+
+    def __write_index(self):
+        index = {"dim": self.dim, "capacity": self.capacity, "next_slot": self.next_slot,
+                 "free": sorted(self.free), "entries": list(self.entries.items())}
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, prefix=".index-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        open(self.log_path, "wb").close()
+        stat = os.stat(self.index_path)
+        self.index_version, self.log_offset, self.log_records = (stat.st_ino, stat.st_mtime_ns, stat.st_size), 0, 0
+
+    def __append_log(self, records):
+        with open(self.log_path, "ab") as f:
+            # Start on a fresh line if a crashed writer left a torn one
+            if f.tell() and self.__last_byte() != b"\n":
+                f.write(b"\n")
+            f.write("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+            self.log_offset = f.tell()
+        self.log_records += len(records)
+
+    def __last_byte(self):
+        with open(self.log_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1)
+
+    def __rows(self):
+        return os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+
+    def __vectors(self, mode):
+        # The shape comes from the file, so a changed AI_EMBEDDING_CACHE_SIZE never misreads it
+        return np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(self.__rows(), self.dim))
+
+    def lookup(self, texts):
+        """Returns (embeddings, missing): rows for cache hits are filled, `missing` lists the
+        positions of texts that still need encoding. embeddings is None if the cache is empty."""
+        keys = [self.key(text) for text in texts]
+        with self.lock:
+            fcntl.flock(self.lock_file, fcntl.LOCK_SH)
+            try:
+                self.__refresh()
+                if self.dim is None or not os.path.exists(self.vectors_path):
+                    return None, list(range(len(texts)))
+                hits = [(position, self.entries[key]) for position, key in enumerate(keys) if key in self.entries]
+                embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+                if hits:
+                    positions, slots = zip(*hits)
+                    embeddings[list(positions)] = self.__vectors("r")[list(slots)]
+            finally:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+            self.__touched.update(keys[position] for position, _ in hits)
+
+        hit_positions = {position for position, _ in hits}
+        return embeddings, [position for position in range(len(texts)) if position not in hit_positions]
+
+    def store(self, texts, embeddings):
+        """Writes new embeddings and records recency for everything used since the last store."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self.lock:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            try:
+                # Catch up first: another process may have written since our last look
+                self.__refresh()
+                rewrite_index = False
+                if self.dim is None:
+                    if not len(embeddings):
+                        return
+                    self.dim = embeddings.shape[1]
+                    rewrite_index = True
+                if self.capacity < self.max_entries:
+                    with open(self.vectors_path, "ab") as f:
+                        f.truncate(self.max_entries * self.dim * 4)
+                    self.capacity = self.max_entries
+                    rewrite_index = True
+
+                records = []
+                for key in self.__touched:
+                    if key in self.entries:
+                        self.entries.move_to_end(key)
+                        records.append(["u", key])
+
+                new_items = {self.key(text): vector for text, vector in zip(texts, embeddings)}
+                new_items = {key: vector for key, vector in new_items.items() if key not in self.entries}
+                # If a single batch is larger than the whole store, keep its last entries
+                new_items = dict(list(new_items.items())[-self.max_entries:])
+                if new_items:
+                    vectors = self.__vectors("r+")
+                    for key, vector in new_items.items():
+                        # Evict the least recently used entries once the store is full
+                        while len(self.entries) >= self.max_entries or not (self.free or self.next_slot < self.capacity):
+                            evicted, slot = self.entries.popitem(last=False)
+                            self.free.add(slot)
+                            records.append(["e", evicted])
+                        if self.free:
+                            slot = self.free.pop()
+                        else:
+                            slot = self.next_slot
+                            self.next_slot += 1
+                        vectors[slot] = vector
+                        self.entries[key] = slot
+                        records.append(["p", key, slot])
+                    vectors.flush()
+                    del vectors
+
+                if rewrite_index or self.log_records + len(records) > max(COMPACT_MIN_RECORDS, len(self.entries)):
+                    self.__write_index()
+                elif records:
+                    self.__append_log(records)
+            finally:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+            self.__touched = set()
+
+    def close(self):
+        self.lock_file.close()
@@ -0,0 +1,115 @@
+import os
+import atexit
+import threading
+import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from src.util.config_helper import CONFIG
+from src.affinity_grouper import model_registry
+
+
+# Worker pools kept per (model name, worker count) for the life of the process, so each
+# spawned worker starts and loads the model once rather than on every encode() call
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _init_worker(ai_grouping_config, model_name):
+    # Spawned workers start with an empty CONFIG; give them the [ai_grouping] section only
+    CONFIG["ai_grouping"] = ai_grouping_config
+    model_registry.get_model(model_name)
+
+
+def _get_pool(model_name, workers):
+    with _POOLS_LOCK:
+        pool = _POOLS.get((model_name, workers))
+        if pool is None:
+            ai_grouping_config = dict(CONFIG["ai_grouping"])
+            if ai_grouping_config["AI_TORCH_THREADS"] <= 0:
+                # Split the cores between workers instead of every worker using all of them
+                ai_grouping_config["AI_TORCH_THREADS"] = max(1, (os.cpu_count() or 1) // workers)
+            # spawn rather than fork: forking a process that has already initialized torch can deadlock
+            pool = _POOLS[(model_name, workers)] = ProcessPoolExecutor(max_workers=workers,
+                                                                       mp_context=multiprocessing.get_context("spawn"),
+                                                                       initializer=_init_worker,
+                                                                       initargs=(ai_grouping_config, model_name))
+        return pool
+
+
+def shutdown_pools():
+    """Stops every worker pool; the next parallel encode() starts a new one."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_pools)
+
+
+def _encode_shard(shm_name, shape, model_name, batches):
+    # Each worker loads the model once through its own registry and writes its rows
+    # straight into the parent's shared output array
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        model = model_registry.get_model(model_name)
+        for indices, texts in batches:
+            out[indices] = model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+        del out
+    finally:
+        shm.close()
+
+
+class EmbeddingEngine:
+    """Encodes notes into a preallocated float32 array.
+
+    Notes are sorted by length and cut into AI_EMBEDDING_BATCH_SIZE batches so each batch
+    pads to a similar length. Inputs of at least AI_EMBEDDING_PARALLEL_MIN notes are
+    sharded across AI_EMBEDDING_WORKERS processes; smaller ones are encoded in-process.
+    The worker processes are kept per model until shutdown_pools() or exit.
+    """
+    def __init__(self, model_name=None, workers=None, batch_size=None, parallel_min=None):
+        self.model_name = model_name if model_name else CONFIG["ai_grouping"]["AI_MODEL_NAME"]
+        self.workers = workers if workers else CONFIG["ai_grouping"]["AI_EMBEDDING_WORKERS"]
+        self.batch_size = batch_size if batch_size else CONFIG["ai_grouping"]["AI_EMBEDDING_BATCH_SIZE"]
+        self.parallel_min = parallel_min if parallel_min else CONFIG["ai_grouping"]["AI_EMBEDDING_PARALLEL_MIN"]
+
+    def __batches(self, notes):
+        order = sorted(range(len(notes)), key=lambda i: len(notes[i]))
+        return [(order[i:i + self.batch_size], [notes[j] for j in order[i:i + self.batch_size]])
+                for i in range(0, len(order), self.batch_size)]
+
+    def encode(self, notes):
+        model = model_registry.get_model(self.model_name)
+        shape = (len(notes), model.get_sentence_embedding_dimension())
+        batches = self.__batches(notes)
+
+        if self.workers <= 1 or len(notes) < self.parallel_min:
+            out = np.empty(shape, dtype=np.float32)
+            for indices, texts in batches:
+                out[indices] = model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+            return out
+
+        # Deal batches round-robin so every shard gets a similar mix of short and long notes
+        shards = [batches[i::self.workers] for i in range(self.workers)]
+        shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 4))
+        try:
+            pool = _get_pool(self.model_name, self.workers)
+            try:
+                futures = [pool.submit(_encode_shard, shm.name, shape, self.model_name, shard) for shard in shards if shard]
+                for future in futures:
+                    future.result()
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); let the next call start a fresh pool
+                with _POOLS_LOCK:
+                    if _POOLS.get((self.model_name, self.workers)) is pool:
+                        del _POOLS[(self.model_name, self.workers)]
+                raise
+            return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
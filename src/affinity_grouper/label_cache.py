@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import tempfile
+from src.util.config_helper import CONFIG
+from src.affinity_grouper.embedding_cache import EmbeddingCache
+
+class LabelCache:
+    """Persistent cluster labels keyed by (model, prompt template, sorted member texts).
+
+    Entries expire after AI_LABEL_CACHE_TTL seconds and the least recently used are evicted
+    beyond AI_LABEL_CACHE_SIZE. When no exact entry exists, a cached cluster from the same
+    model and template whose members overlap by at least AI_LABEL_CACHE_SIMILARITY (Jaccard)
+    lends its label, so adding one sticky to a big group does not trigger a new request.
+    save() merges into whatever other runs saved meanwhile, under an exclusive lock file.
+    """
+    def __init__(self, model, prompt_template, cache_path=None):
+        self.cache_path = cache_path if cache_path else CONFIG["ai_grouping"]["AI_LABEL_CACHE_PATH"]
+        self.ttl = CONFIG["ai_grouping"]["AI_LABEL_CACHE_TTL"]
+        self.max_entries = CONFIG["ai_grouping"]["AI_LABEL_CACHE_SIZE"]
+        self.similarity = CONFIG["ai_grouping"]["AI_LABEL_CACHE_SIMILARITY"]
+        self.scope = hashlib.sha1(f"{model}\n{prompt_template}".encode()).hexdigest()
+        self.entries = self.__load()
+
+    def __load(self):
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except ValueError:
+            # A damaged cache only costs fresh labels; it is rewritten by the next save
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        now = time.time()
+        return {key: entry for key, entry in entries.items() if now - entry.get("created", 0) < self.ttl}
+
+    def __key(self, members):
+        return hashlib.sha1(f"{self.scope}\n{'|'.join(members)}".encode()).hexdigest()
+
+    @staticmethod
+    def members(cluster_texts):
+        return sorted({EmbeddingCache.key(text) for text in cluster_texts})
+
+    def get(self, cluster_texts):
+        members = self.members(cluster_texts)
+        entry = self.entries.get(self.__key(members))
+        if entry is None and self.similarity < 1:
+            member_set = set(members)
+            best_score = self.similarity
+            for candidate in self.entries.values():
+                if candidate["scope"] != self.scope:
+                    continue
+                candidate_set = set(candidate["members"])
+                score = len(member_set & candidate_set) / len(member_set | candidate_set)
+                if score >= best_score:
+                    entry, best_score = candidate, score
+        if entry is None:
+            return None
+        entry["used"] = time.time()
+        return entry["label"]
+
+    def put(self, cluster_texts, label):
+        members = self.members(cluster_texts)
+        now = time.time()
+        self.entries[self.__key(members)] = {"scope": self.scope, "members": members, "label": label, "created": now, "used": now}
+
+    def save(self):
+        folder = os.path.dirname(self.cache_path) or "."
+        os.makedirs(folder, exist_ok=True)
+        with open(f"{self.cache_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Re-read under the lock: other labelers may have saved since this cache loaded
+                entries = self.__load()
+                for key, entry in self.entries.items():
+                    if key not in entries or entries[key]["used"] <= entry["used"]:
+                        entries[key] = entry
+                if len(entries) > self.max_entries:
+                    keep = sorted(entries, key=lambda key: entries[key]["used"], reverse=True)[:self.max_entries]
+                    entries = {key: entries[key] for key in keep}
+
+                fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".labels-", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        json.dump(entries, f)
+                    os.replace(tmp_path, self.cache_path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+                self.entries = entries
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,68 @@
+import numpy as np
+from src.util.config_helper import CONFIG
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+class LocalLabeler:
+    """Labels clusters without any network access.
+
+    Each label is the cluster's top TF-IDF keyphrases (every cluster is one document, so
+    terms shared by all clusters score low) followed by the note nearest the cluster
+    centroid, truncated to AI_LOCAL_LABEL_WORDS words.
+    """
+    def __init__(self, n_keyphrases=None, max_words=None):
+        self.n_keyphrases = n_keyphrases if n_keyphrases else CONFIG["ai_grouping"]["AI_LOCAL_KEYPHRASES"]
+        self.max_words = max_words if max_words else CONFIG["ai_grouping"]["AI_LOCAL_LABEL_WORDS"]
+
+    @staticmethod
+    def centroidNotes(embeddings, labels):
+        """Returns the index of the note nearest each cluster centroid, in sorted label order."""
+        vectors = normalize(np.asarray(embeddings, dtype=np.float64))
+        _, labels = np.unique(labels, return_inverse=True)
+        centroids = np.zeros((labels.max() + 1, vectors.shape[1]))
+        np.add.at(centroids, labels, vectors)
+        similarities = np.einsum("ij,ij->i", vectors, normalize(centroids)[labels])
+        # Sort by label, then by descending similarity; the first note of each label wins
+        order = np.lexsort((-similarities, labels))
+        first = np.r_[True, labels[order][1:] != labels[order][:-1]]
+        return order[first]
+
+    def keyphrases(self, clusters_texts):
+        documents = [" ".join(cluster_texts) for cluster_texts in clusters_texts]
+        try:
+            tfidf = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), sublinear_tf=True).fit(documents)
+        except ValueError:
+            # Only stop words or punctuation on the board
+            return [[] for _ in documents]
+        weights = tfidf.transform(documents).tocsr()
+        terms = tfidf.get_feature_names_out()
+
+        phrases = []
+        for row in range(weights.shape[0]):
+            start, end = weights.indptr[row], weights.indptr[row + 1]
+            top = np.argsort(-weights.data[start:end], kind="stable")[:self.n_keyphrases * 3]
+            chosen = []
+            for term in terms[weights.indices[start:end][top]]:
+                # Skip words already covered by a higher ranked bigram and vice versa
+                if any(term in other or other in term for other in chosen):
+                    continue
+                chosen.append(term)
+                if len(chosen) == self.n_keyphrases:
+                    break
+            phrases.append(chosen)
+        return phrases
+
+    def labelClusters(self, notes, embeddings, labels):
+        """Returns one label per cluster, in sorted label order."""
+        centroid_notes = [notes[i] for i in self.centroidNotes(embeddings, labels)]
+        _, labels = np.unique(labels, return_inverse=True)
+        clusters_texts = [[] for _ in range(labels.max() + 1)]
+        for note, label in zip(notes, labels):
+            clusters_texts[label].append(note)
+
+        summaries = []
+        for phrases, centroid_note in zip(self.keyphrases(clusters_texts), centroid_notes):
+            words = centroid_note.split()
+            sentence = " ".join(words[:self.max_words]) + ("..." if len(words) > self.max_words else "")
+            summaries.append(f"{', '.join(phrase.title() for phrase in phrases)}: {sentence}" if phrases else sentence)
+        return summaries
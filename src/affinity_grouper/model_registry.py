@@ -0,0 +1,53 @@
+import threading
+import torch
+from src.util.config_helper import CONFIG
+from sentence_transformers import SentenceTransformer
+
+# Process-wide SentenceTransformer instances keyed by model name. Loading reads the
+# weights from disk and initializes torch, so each model is loaded once and shared.
+_MODELS = {}
+_LOCK = threading.Lock()
+_TORCH_CONFIGURED = False
+
+
+def __configure_torch():
+    global _TORCH_CONFIGURED
+    if _TORCH_CONFIGURED:
+        return
+    threads = CONFIG["ai_grouping"]["AI_TORCH_THREADS"]
+    interop_threads = CONFIG["ai_grouping"]["AI_TORCH_INTEROP_THREADS"]
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # torch only accepts this before its first parallel op; keep the current value
+            pass
+    _TORCH_CONFIGURED = True
+
+
+def get_model(model_name=None):
+    """Returns the shared model, loading it on first use. Safe to call from any thread."""
+    model_name = model_name if model_name else CONFIG["ai_grouping"]["AI_MODEL_NAME"]
+    model = _MODELS.get(model_name)
+    if model is not None:
+        return model
+    with _LOCK:
+        # Another thread may have finished loading while we waited for the lock
+        if model_name not in _MODELS:
+            __configure_torch()
+            _MODELS[model_name] = SentenceTransformer(model_name)
+        return _MODELS[model_name]
+
+
+def warm_up(model_names=None):
+    """Eagerly loads the given models (default: AI_MODEL_NAME), e.g. at startup."""
+    model_names = model_names if model_names else [CONFIG["ai_grouping"]["AI_MODEL_NAME"]]
+    for model_name in model_names:
+        get_model(model_name)
+
+
+def clear():
+    with _LOCK:
+        _MODELS.clear()
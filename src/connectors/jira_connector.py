@@ -1,62 +1,404 @@
 import uuid
+import asyncio
+import hashlib
+import requests
+from collections import Counter
+from collections.abc import Mapping
 from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
 from src.util.http_helper import HTTPHelper
+from src.util.async_http_helper import AsyncHTTPHelper
 from src.util.config_helper import CONFIG
 
 class JiraConnector(HTTPHelper):
-    def __init__(self):
+    def __init__(self, session=None, board_id=None):
         self.uuid = str(uuid.uuid4())
-        super().__init__(f"jira_conn_{self.uuid}")
+        super().__init__(f"jira_conn_{self.uuid}", session)
+        # concurrent mode posts on the shared event loop instead of a thread per cluster
+        self.async_http = AsyncHTTPHelper(f"jira_async_{self.uuid}")
         self.user = CONFIG["credentials"]["JIRA_USER"]
         self.api_key = CONFIG["credentials"]["JIRA_API_KEY"]
         self.base_url = CONFIG["jira"]["JIRA_BASE_URL"]
         self.project_key = CONFIG["jira"]["JIRA_PROJECT_KEY"]
         self.http_content_type = CONFIG["jira"]["JIRA_HTTP_CONTENT_TYPE"]
-        
+        self.post_mode = CONFIG["jira"]["JIRA_POST_MODE"]
+        self.bulk_limit = CONFIG["jira"]["JIRA_BULK_LIMIT"]
+        self.workers = CONFIG["jira"]["JIRA_WORKERS"]
+        self.sync_label = CONFIG["jira"]["JIRA_SYNC_LABEL"]
+        self.close_transition = CONFIG["jira"]["JIRA_CLOSE_TRANSITION"]
+        self.search_page_size = CONFIG["jira"]["JIRA_SEARCH_PAGE_SIZE"]
+        # sync only sees and closes issues carrying the label of the board being synced
+        self.board_id = board_id if board_id else CONFIG["miro"]["MIRO_BOARD_ID"]
+        self.board_label = f"{self.sync_label}-board-{''.join(f'{self.board_id}'.split())}"
+
         auth_str = f"{self.user}:{self.api_key}"
         self.b64_auth = b64encode(auth_str.encode()).decode()
 
+        # Items that could not be created on the last postGroupsToJira run, as
+        # {"cluster": ..., "note": ..., "error": ...} so they can be traced to the sticky note
+        self.failed_items = []
 
-    def __postEpic(self, epic_name):
-        url = f"{self.base_url}/issue"
-        headers = {
+        # Issue keys written by the last sync run, per kind of write
+        self.sync_changes = {}
+
+        # Optional JiraJournal for the current postGroupsToJira run
+        self.journal = None
+
+    def __headers(self):
+        return {
             "Authorization": f"Basic {self.b64_auth}",
             "Content-Type": f"{self.http_content_type}"
         }
 
-        data = {
+    def __fingerprint(self, text):
+        # Stable across runs for the same text, stored on the issue as a label so sync can find it again
+        digest = hashlib.sha1(" ".join(text.split()).lower().encode()).hexdigest()[:16]
+        return f"{self.sync_label}-{digest}"
+
+    def __labels(self, text):
+        return [self.sync_label, self.board_label, self.__fingerprint(text)]
+
+    def __epicFields(self, epic_name):
+        return {
             "fields": {
                 "project": {"key": self.project_key},
                 "summary": epic_name,
                 "description": f"Automagically created through programmatic affinity grouping from a Miro board",
-                "issuetype": {"name": "Epic"}
+                "issuetype": {"name": "Epic"},
+                "labels": self.__labels(epic_name)
             }
         }
-        
-        return super().post(self, url=url, headers=headers, json=data)
- 
-        # TODO: Figure out to incorporate the intent here.
-#        super().getHTTPErrorMessage(super().post(self, url=url, headers=headers, json=data), "jira connector")
-
-    def __postStory(self, epic_key, summary, description):
-        url = f"{self.base_url}/issue"
-        headers = {
-            "Authorization": f"Basic {self.b64_auth}",
-            "Content-Type": f"{self.http_content_type}"
-        }
 
-        data = {
+    def __storyFields(self, epic_key, summary, description):
+        return {
             "fields": {
                 "project": {"key": self.project_key},
                 "summary": summary,
                 "description": description,
                 "issuetype": {"name": "Story"},
-                "parent": {"key": epic_key}  # Jira field 10018 is Parent Link. Epic link deprecated.
+                "parent": {"key": epic_key},  # Jira field 10018 is Parent Link. Epic link deprecated.
+                "labels": self.__labels(description)
             }
         }
-        return super().post(self, url=url, headers=headers, json=data)
 
-    def postGroupsToJira(self, affinity_groups):
+    def __postEpic(self, epic_name):
+        url = f"{self.base_url}/issue"
+        return super().post(self, url=url, headers=self.__headers(), json=self.__epicFields(epic_name))
+
+        # TODO: Figure out to incorporate the intent here.
+#        super().getHTTPErrorMessage(super().post(self, url=url, headers=headers, json=data), "jira connector")
+
+    def __postStory(self, epic_key, summary, description):
+        url = f"{self.base_url}/issue"
+        return super().post(self, url=url, headers=self.__headers(), json=self.__storyFields(epic_key, summary, description))
+
+    def __postBulk(self, issue_updates):
+        # POST one chunk to /issue/bulk and return a (key, error) pair per input item, in input order.
+        # Jira lists created issues in order and reports failures by their index in the request.
+        url = f"{self.base_url}/issue/bulk"
+        try:
+            response = super().post(self, url=url, headers=self.__headers(), json={"issueUpdates": issue_updates})
+            body = response.json()
+        except requests.HTTPError as e:
+            # Jira answers 400 when every item in the chunk fails, with the same error body
+            try:
+                body = e.response.json()
+            except ValueError:
+                return [(None, str(e))] * len(issue_updates)
+            body.setdefault("issues", [])
+        except requests.RequestException as e:
+            return [(None, str(e))] * len(issue_updates)
+
+        errors = {}
+        for error in body.get("errors", []):
+            element_errors = error.get("elementErrors", {})
+            messages = element_errors.get("errorMessages", []) + [f"{k}: {v}" for k, v in element_errors.get("errors", {}).items()]
+            errors[error["failedElementNumber"]] = "; ".join(messages) or f"HTTP {error.get('status')}"
+
+        created = iter(body.get("issues", []))
+        results = []
+        for index in range(len(issue_updates)):
+            if index in errors:
+                results.append((None, errors[index]))
+            else:
+                issue = next(created, None)
+                results.append((issue["key"], None) if issue else (None, "Missing from bulk response"))
+        return results
+
+    def __chunk(self, items):
+        return [items[i:i + self.bulk_limit] for i in range(0, len(items), self.bulk_limit)]
+
+    def __journaled(self, item_id, post):
+        # Skips a write the journal already saw complete; otherwise logs it around the post
+        if self.journal is None:
+            return post()
+        issue_key = self.journal.key(item_id)
+        if issue_key:
+            return issue_key
+        self.journal.intend([item_id])
+        issue_key = post()
+        self.journal.complete(item_id, issue_key)
+        return issue_key
+
+    def __journalKey(self, item_id):
+        return self.journal.key(item_id) if self.journal else None
+
+    def __postStoriesBulk(self, story_items):
+        # story_items are (story id, cluster_id, epic_key, story); already journaled ones are skipped
+        story_items = [item for item in story_items if not self.__journalKey(item[0])]
+        for story_chunk in self.__chunk(story_items):
+            if self.journal:
+                self.journal.intend([story_id for story_id, _, _, _ in story_chunk])
+            results = self.__postBulk([self.__storyFields(epic_key, f"{story}", story) for _, _, epic_key, story in story_chunk])
+            for (story_id, cluster_id, _, story), (story_key, error) in zip(story_chunk, results):
+                if error:
+                    self.failed_items.append({"cluster": cluster_id, "note": story, "error": error})
+                elif self.journal:
+                    self.journal.complete(story_id, story_key)
+
+    def __postGroupsBulk(self, affinity_groups):
+        epic_keys = {}
+        clusters = list(enumerate(affinity_groups))
+
+        # On resume, epics the journal already holds only need their missing stories
+        journaled = [(position, cluster) for position, cluster in clusters if self.__journalKey(f"{position}")]
+        for position, _ in journaled:
+            epic_keys[position] = self.__journalKey(f"{position}")
+        self.__postStoriesBulk([(f"{position}/{index}", cluster_id, epic_keys[position], story)
+                                for position, (cluster_id, stories) in journaled for index, story in enumerate(stories)])
+        epic_chunks = self.__chunk([(position, cluster) for position, cluster in clusters if position not in epic_keys])
+
+        def post_epics(chunk):
+            if self.journal:
+                self.journal.intend([f"{position}" for position, _ in chunk])
+            return self.__postBulk([self.__epicFields(f"{cluster_id}") for _, (cluster_id, _) in chunk])
+
+        # Epic chunks are posted in order on a single background worker so the next epic
+        # chunk is already in flight while the stories of the previous one are posted
+        with ThreadPoolExecutor(max_workers=1) as epic_executor:
+            epic_futures = [epic_executor.submit(post_epics, chunk) for chunk in epic_chunks]
+
+            for chunk, future in zip(epic_chunks, epic_futures):
+                story_items = []
+                for (position, (cluster_id, stories)), (epic_key, error) in zip(chunk, future.result()):
+                    if error:
+                        self.failed_items.append({"cluster": cluster_id, "note": None, "error": error})
+                        self.failed_items.extend({"cluster": cluster_id, "note": story, "error": "Parent epic was not created"} for story in stories)
+                        continue
+                    if self.journal:
+                        self.journal.complete(f"{position}", epic_key)
+                    epic_keys[position] = epic_key
+                    story_items.extend((f"{position}/{index}", cluster_id, epic_key, story) for index, story in enumerate(stories))
+
+                self.__postStoriesBulk(story_items)
+
+        return [epic_keys[position] for position, _ in clusters if position in epic_keys]
+
+    def __postCluster(self, position, cluster_id, stories):
+        # Runs on a worker thread. Any failure stays inside this cluster and is
+        # recorded so the other clusters keep posting.
+        try:
+            epic_key = self.__journaled(f"{position}", lambda: self.__postEpic(f"{cluster_id}").json()["key"])
+        except Exception as e:
+            self.failed_items.append({"cluster": cluster_id, "note": None, "error": str(e)})
+            self.failed_items.extend({"cluster": cluster_id, "note": story, "error": "Parent epic was not created"} for story in stories)
+            return None
+
+        for index, story in enumerate(stories):
+            try:
+                self.__journaled(f"{position}/{index}", lambda: self.__postStory(epic_key, f"{story}", story).json()["key"])
+            except Exception as e:
+                self.failed_items.append({"cluster": cluster_id, "note": story, "error": str(e)})
+        return epic_key
+
+    async def __postIssueAsync(self, fields):
+        url = f"{self.base_url}/issue"
+        response = await self.async_http.post_with_retry(url, headers=self.__headers(), json=fields)
+        return response.json()["key"]
+
+    async def __journaledAsync(self, item_id, post):
+        # __journaled for a write that has to be awaited
+        if self.journal is None:
+            return await post()
+        issue_key = self.journal.key(item_id)
+        if issue_key:
+            return issue_key
+        self.journal.intend([item_id])
+        issue_key = await post()
+        self.journal.complete(item_id, issue_key)
+        return issue_key
+
+    async def __postClusterAsync(self, position, cluster_id, stories):
+        # Like __postCluster, but every story of the cluster is in flight at once once its epic exists
+        try:
+            epic_key = await self.__journaledAsync(f"{position}", lambda: self.__postIssueAsync(self.__epicFields(f"{cluster_id}")))
+        except Exception as e:
+            self.failed_items.append({"cluster": cluster_id, "note": None, "error": str(e)})
+            self.failed_items.extend({"cluster": cluster_id, "note": story, "error": "Parent epic was not created"} for story in stories)
+            return None
+
+        results = await asyncio.gather(*[
+            self.__journaledAsync(f"{position}/{index}", lambda story=story: self.__postIssueAsync(self.__storyFields(epic_key, f"{story}", story)))
+            for index, story in enumerate(stories)], return_exceptions=True)
+        for story, result in zip(stories, results):
+            if isinstance(result, Exception):
+                self.failed_items.append({"cluster": cluster_id, "note": story, "error": str(result)})
+        return epic_key
+
+    def __postGroupsConcurrent(self, affinity_groups):
+        async def post_all():
+            # Up to JIRA_WORKERS clusters at once; gather keeps cluster order
+            semaphore = asyncio.Semaphore(self.workers)
+
+            async def post(position, cluster_id, stories):
+                async with semaphore:
+                    return await self.__postClusterAsync(position, cluster_id, stories)
+
+            return await asyncio.gather(*[post(position, cluster_id, stories) for position, (cluster_id, stories) in enumerate(affinity_groups)])
+
+        return [epic_key for epic_key in self.async_http.run(post_all()) if epic_key]
+
+    def __searchIssues(self):
+        # Every open issue an earlier run created, paged through once
+        url = f"{self.base_url}/search"
+        jql = f'project = "{self.project_key}" AND labels = "{self.board_label}" AND statusCategory != Done'
+        issues = []
+        while True:
+            params = {"jql": jql, "fields": "summary,labels,parent,issuetype", "startAt": len(issues), "maxResults": self.search_page_size}
+            body = super().get(self, url=url, headers=self.__headers(), params=params).json()
+            issues.extend(body.get("issues", []))
+            if not body.get("issues") or len(issues) >= body.get("total", 0):
+                return issues
+
+    def __updateIssue(self, issue_key, fields):
+        url = f"{self.base_url}/issue/{issue_key}"
+        super().put(self, url=url, headers=self.__headers(), json={"fields": fields})
+        return issue_key
+
+    def __closeIssue(self, issue_key):
+        url = f"{self.base_url}/issue/{issue_key}/transitions"
+        transitions = super().get(self, url=url, headers=self.__headers()).json().get("transitions", [])
+        transition = next((t for t in transitions if self.close_transition in (t.get("name"), t.get("to", {}).get("name"))), None)
+        if transition is None:
+            raise ValueError(f"No '{self.close_transition}' transition available for {issue_key}")
+        super().post(self, url=url, headers=self.__headers(), json={"transition": {"id": transition["id"]}})
+        return issue_key
+
+    def __syncWrite(self, change, cluster_id, note, write):
+        # Runs one write returning an issue key; records it under `change`, or as a failed item
+        try:
+            issue_key = write()
+        except Exception as e:
+            self.failed_items.append({"cluster": cluster_id, "note": note, "error": str(e)})
+            return None
+        self.sync_changes[change].append(issue_key)
+        return issue_key
+
+    def __postGroupsSync(self, affinity_groups):
+        self.sync_changes = {"created": [], "updated": [], "reparented": [], "closed": []}
+
+        # Index the open issues by fingerprint; a fingerprint can repeat when the board has duplicate notes
+        epics, epics_by_fingerprint, stories = {}, {}, {}
+        for issue in self.__searchIssues():
+            fields = issue["fields"]
+            fingerprint = next((label for label in fields.get("labels", [])
+                                if label.startswith(f"{self.sync_label}-") and label != self.board_label), None)
+            if fingerprint is None:
+                continue
+            if fields["issuetype"]["name"] == "Epic":
+                epics[issue["key"]] = fields["summary"]
+                epics_by_fingerprint.setdefault(fingerprint, issue["key"])
+            else:
+                stories.setdefault(fingerprint, []).append({"key": issue["key"], "parent": (fields.get("parent") or {}).get("key")})
+
+        epic_keys = []
+        for cluster_id, notes in affinity_groups:
+            summary = f"{cluster_id}"
+            fingerprints = [self.__fingerprint(note) for note in notes]
+
+            # Keep the epic that already holds most of this cluster's stories, so a reworded
+            # label is an update rather than a new epic; fall back to an epic with the same summary
+            parents = Counter(match["parent"] for fingerprint in fingerprints for match in stories.get(fingerprint, [])
+                              if match["parent"] in epics and match["parent"] not in epic_keys)
+            epic_key = parents.most_common(1)[0][0] if parents else None
+            if epic_key is None and epics_by_fingerprint.get(self.__fingerprint(summary)) not in epic_keys:
+                epic_key = epics_by_fingerprint.get(self.__fingerprint(summary))
+
+            if epic_key is None:
+                epic_key = self.__syncWrite("created", cluster_id, None, lambda: self.__postEpic(summary).json()["key"])
+                if epic_key is None:
+                    self.failed_items.extend({"cluster": cluster_id, "note": note, "error": "Parent epic was not created"} for note in notes)
+                    continue
+            elif epics[epic_key] != summary:
+                fields = {"summary": summary, "labels": self.__labels(summary)}
+                self.__syncWrite("updated", cluster_id, None, lambda: self.__updateIssue(epic_key, fields))
+            epic_keys.append(epic_key)
+
+            for note, fingerprint in zip(notes, fingerprints):
+                matches = stories.get(fingerprint)
+                if not matches:
+                    self.__syncWrite("created", cluster_id, note, lambda: self.__postStory(epic_key, f"{note}", note).json()["key"])
+                    continue
+                story = matches.pop(0)
+                if story["parent"] != epic_key:
+                    self.__syncWrite("reparented", cluster_id, note, lambda: self.__updateIssue(story["key"], {"parent": {"key": epic_key}}))
+
+        # Whatever is left no longer appears on the board
+        for matches in stories.values():
+            for story in matches:
+                self.__syncWrite("closed", None, None, lambda: self.__closeIssue(story["key"]))
+        for epic_key in epics:
+            if epic_key not in epic_keys:
+                self.__syncWrite("closed", None, None, lambda: self.__closeIssue(epic_key))
+
+        print("Jira sync: " + ", ".join(f"{len(keys)} {change}" for change, keys in self.sync_changes.items()))
+        return epic_keys
+
+    def postGroupsToJira(self, affinity_groups, post_mode=None, journal=None):
+        """affinity_groups is a ClusterResult, any {epic summary: [story texts]} mapping, or a
+        list of (epic summary, [story texts]) pairs, which keeps clusters that share a summary.
+
+        With a JiraJournal every write is journaled and writes it already records as done are
+        skipped. sync mode converges on its own and does not use the journal."""
+        post_mode = post_mode if post_mode else self.post_mode
+        affinity_groups = list(affinity_groups.items()) if isinstance(affinity_groups, Mapping) else list(affinity_groups)
+        self.startPosting(journal)
+
+        if post_mode == "bulk":
+            created_epics = self.__postGroupsBulk(affinity_groups)
+        elif post_mode == "concurrent":
+            created_epics = self.__postGroupsConcurrent(affinity_groups)
+        elif post_mode == "single":
+            created_epics = self.__postGroupsSingle(affinity_groups)
+        elif post_mode == "sync":
+            created_epics = self.__postGroupsSync(affinity_groups)
+        else:
+            raise ValueError(f"Unknown Jira post mode: {post_mode}")
+
+        self.finishPosting()
+        return created_epics
+
+    def startPosting(self, journal=None):
+        """Resets failed_items and sets the journal for a run of postGroupsToJira or postGroup calls."""
+        self.failed_items = []
+        self.journal = journal
+
+    def postGroup(self, position, cluster_id, stories):
+        """Posts one cluster as soon as it is ready, e.g. from a pipeline; safe to call from
+        several threads. position is the cluster's place in the whole run."""
+        if self.journal:
+            self.journal.addGroup(position, cluster_id, stories)
+        if self.post_mode == "concurrent":
+            return self.async_http.run(self.__postClusterAsync(position, cluster_id, stories))
+        return self.__postCluster(position, cluster_id, stories)
+
+    def finishPosting(self):
+        if self.journal:
+            self.journal.flush()
+        for failed in self.failed_items:
+            print(f"Failed to create Jira issue for cluster '{failed['cluster']}' note '{failed['note']}': {failed['error']}")
+
+    def __postGroupsSingle(self, affinity_groups):
         created_epics = []
 
         # Create an epic for each cluster that was created from affinity grouping
@@ -66,17 +408,16 @@ class JiraConnector(HTTPHelper):
 #            for story in stories:
 #                self.__postStory
 
-        for cluster_id, stories in affinity_groups.items():
+        for position, (cluster_id, stories) in enumerate(affinity_groups):
             story_count = 0
-            epic_response = self.__postEpic(f"{cluster_id}")
+            epic_key = self.__journaled(f"{position}", lambda: self.__postEpic(f"{cluster_id}").json()["key"])
 #            print(f"Epic: Activity {cluster_id}")
-            epic_key = epic_response.json()["key"]
             created_epics.append(epic_key)
-            for story in stories:
+            for index, story in enumerate(stories):
                 # NOTE : The summary is the story text, but we can modify this to include more context or a summarization of the story text if needed.
                 summary = f"{story}"
 #                print(f"└── Story: {summary}")
-                self.__postStory(epic_key, summary, story)
-        
+                self.__journaled(f"{position}/{index}", lambda: self.__postStory(epic_key, summary, story).json()["key"])
+
         return created_epics
- 
\ No newline at end of file
+
@@ -0,0 +1,112 @@
+import os
+import json
+import threading
+from collections.abc import Mapping
+from src.util.config_helper import CONFIG
+
+class JiraJournal:
+    """Append-only record of a Jira import so an interrupted run can be resumed.
+
+    The plan (each affinity group being imported, with its position) is logged before any of
+    its writes, either all up front or group by group when groups arrive from a pipeline.
+    Every issue write is logged as an intent before it is sent and as done with its key once
+    Jira answers.
+    Epics are identified by the cluster's position in the plan and stories by
+    "<cluster position>/<story position>", so a resumed run replays the same plan and skips
+    everything already done. Lines are flushed as they are written and fsynced every
+    JIRA_JOURNAL_FSYNC_EVERY writes, so a process crash loses nothing and a power loss at
+    most that many completions.
+    """
+    def __init__(self, journal_path=None, fsync_every=None):
+        self.journal_path = journal_path if journal_path else CONFIG["jira"]["JIRA_JOURNAL_PATH"]
+        self.fsync_every = fsync_every if fsync_every else CONFIG["jira"]["JIRA_JOURNAL_FSYNC_EVERY"]
+        self.completed = {}
+        self.pending = set()
+        # Plan positions in order when resuming, since a pipeline run can leave gaps
+        self.positions = None
+        self.file = None
+        self.unsynced = 0
+        self.lock = threading.Lock()
+
+    def start(self, affinity_groups=None):
+        """Begins a new import, discarding any previous journal."""
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        self.file = open(self.journal_path, "w", encoding="utf-8")
+        if affinity_groups:
+            groups = affinity_groups.items() if isinstance(affinity_groups, Mapping) else affinity_groups
+            for position, (cluster_id, stories) in enumerate(groups):
+                self.addGroup(position, cluster_id, stories)
+        self.flush()
+
+    def addGroup(self, position, cluster_id, stories):
+        with self.lock:
+            self.__append({"op": "group", "position": position, "cluster": f"{cluster_id}", "stories": list(stories)})
+
+    def resume(self):
+        """Loads the journal of the last import and returns its affinity groups as a list of
+        (cluster id, stories) pairs in plan order; clusters may share a summary."""
+        if not os.path.exists(self.journal_path):
+            raise ValueError(f"No Jira import journal to resume at {self.journal_path}")
+
+        plan = {}
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from the crash; everything before it is intact
+                    break
+                if entry["op"] == "group":
+                    plan[entry["position"]] = (entry["cluster"], entry["stories"])
+                elif entry["op"] == "intent":
+                    self.pending.add(entry["id"])
+                elif entry["op"] == "done":
+                    self.pending.discard(entry["id"])
+                    self.completed[entry["id"]] = entry["key"]
+        if not plan:
+            raise ValueError(f"Jira import journal at {self.journal_path} has no plan")
+
+        print(f"Resuming Jira import: {len(self.completed)} issues already created, {len(self.pending)} were in flight and will be retried")
+        self.file = open(self.journal_path, "a", encoding="utf-8")
+        self.positions = sorted(plan)
+        return [plan[position] for position in self.positions]
+
+    def __append(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every:
+            self.flush()
+
+    def __id(self, item_id):
+        # Maps a position in the resumed groups back to its position in the original plan
+        if self.positions is None:
+            return item_id
+        position, separator, story = item_id.partition("/")
+        return f"{self.positions[int(position)]}{separator}{story}"
+
+    def key(self, item_id):
+        return self.completed.get(self.__id(item_id))
+
+    def intend(self, item_ids):
+        with self.lock:
+            for item_id in item_ids:
+                self.__append({"op": "intent", "id": self.__id(item_id)})
+
+    def complete(self, item_id, issue_key):
+        with self.lock:
+            self.completed[self.__id(item_id)] = issue_key
+            self.__append({"op": "done", "id": self.__id(item_id), "key": issue_key})
+
+    def flush(self):
+        if self.file and self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    def close(self):
+        if self.file:
+            with self.lock:
+                self.flush()
+                self.file.close()
+                self.file = None
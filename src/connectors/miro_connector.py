@@ -2,24 +2,76 @@ import uuid
 import re
 import urllib.parse
 from src.util.http_helper import HTTPHelper
+from src.connectors.miro_snapshot import MiroSnapshot
 from src.util.config_helper import CONFIG
 
+# Compiled once rather than per note; Miro stores sticky-note content as HTML
+HTML_TAG_PATTERN = re.compile('<.*?>')
+
+# Largest page size the Miro items endpoint accepts
+MIRO_MAX_RESULT_LIMIT = 50
+
 class MiroConnector(HTTPHelper):
-    def __init__(self):
+    def __init__(self, session=None):
         # Load configuration values from the config file
         self.uuid = str(uuid.uuid4())
-        super().__init__(f"miro_{self.uuid}")
+        super().__init__(f"miro_{self.uuid}", session)
         self.api_key = CONFIG["credentials"]["MIRO_API_KEY"]
         self.base_url = CONFIG["miro"]["MIRO_BASE_URL"]
         self.board_id = CONFIG["miro"]["MIRO_BOARD_ID"]
         self.http_accept = CONFIG["miro"]["MIRO_HTTP_ACCEPT"]
         self.http_content_type = CONFIG["miro"]["MIRO_HTTP_CONTENT_TYPE"]
         self.result_limit = CONFIG["miro"]["MIRO_RESULT_LIMIT"]
+        self.fetch_mode = CONFIG["miro"]["MIRO_FETCH_MODE"]
+        self.snapshot_folder = CONFIG["miro"]["MIRO_SNAPSHOT_FOLDER"]
     
     def getBoard(self,
                   api_key=None,
                   base_url=None,
                   board_id=None):
+        # Make the GET request to Miro API which uses first/prior/next/last full URL
+        try:
+            sticky_notes = [note for page in self.getBoardStream(api_key, base_url, board_id) for note in page]
+            if not sticky_notes:
+                raise ValueError("No sticky notes found in Miro board")
+            return sticky_notes
+        except Exception as e:
+            self.logger.error(f"Error fetching Miro board: {str(e)}")
+            return None
+
+    def getBoardStream(self,
+                       api_key=None,
+                       base_url=None,
+                       board_id=None):
+        for notes in self.getStickyNoteStream(api_key, base_url, board_id):
+            yield [note["content"] for note in notes]
+
+    def syncBoard(self,
+                  api_key=None,
+                  base_url=None,
+                  board_id=None):
+        # Delta sync against the local snapshot: the lean listing is still paged through
+        # (Miro has no modified-since filter and deletions must be detected), but only the
+        # added/changed/deleted notes need to be re-processed downstream
+        notes = [note for page in self.getStickyNoteStream(api_key, base_url, board_id) for note in page]
+        return self.changeSet(notes, board_id)
+
+    def changeSet(self, notes, board_id=None):
+        """Diffs fully listed notes against the board's snapshot without updating it."""
+        board_id = board_id if board_id else self.board_id
+        return MiroSnapshot(board_id, self.snapshot_folder).diff(notes)
+
+    def commitSync(self, change_set, board_id=None):
+        """Saves the notes of a change set as the board's snapshot. Call it only once everything
+        downstream has processed the changes, so a failed run sees them again next time."""
+        board_id = board_id if board_id else self.board_id
+        notes = change_set["added"] + change_set["changed"] + change_set["unchanged"]
+        MiroSnapshot(board_id, self.snapshot_folder).save(notes)
+
+    def getStickyNoteStream(self,
+                            api_key=None,
+                            base_url=None,
+                            board_id=None):
         # Use provided parameters or fall back to class attributes from config file
         api_key = api_key if api_key else self.api_key
         base_url = base_url if base_url else self.base_url
@@ -29,7 +81,13 @@ class MiroConnector(HTTPHelper):
         board_id = urllib.parse.quote(board_id, safe="")
         url = f"{base_url}{board_id}/items"
         headers = { "Authorization": f"Bearer {api_key}" }
-        params = { "limit": self.result_limit }
+        if self.fetch_mode == "filtered":
+            # Let Miro drop shapes, frames, images etc. and return as few pages as possible
+            params = { "type": "sticky_note", "limit": MIRO_MAX_RESULT_LIMIT }
+        elif self.fetch_mode == "all":
+            params = { "limit": self.result_limit }
+        else:
+            raise ValueError(f"Unknown Miro fetch mode: {self.fetch_mode}")
 
         # Create a dictionary of API details
  #       api_details = {
@@ -39,34 +97,26 @@ class MiroConnector(HTTPHelper):
  #           "headers": headers
 ##            "params": params
  #       }
-        # Make the GET request to Miro API which uses first/prior/next/last full URL
-        try:
-            response = super().get_paginated(self,
+        # Yield the sticky notes of each page as it arrives; the next page is prefetched
+        # while the caller works on this one, and non-sticky items are dropped per page
+        for page in super().iter_paginated(self,
                             url=url,
                             headers=headers,
-                            params=params)
-         
-            if response:
-              return self.__parse_miro_response(response)
-        except Exception as e:
-            self.logger.error(f"Error fetching Miro board: {str(e)}")
-            return None
-     
-    def __parse_miro_response(self, response):
-        try:
-            if not response:
-                raise ValueError("Empty response from Miro API")
-            
-            sticky_notes = [item for item in response if item["type"] == "sticky_note"]
-            if not sticky_notes:
-                raise ValueError("No sticky notes found in Miro board")
-            
-            return [self.__remove_html_tags(note["data"]["content"]) for note in sticky_notes]
-        except Exception as e:
-            self.logger.error(f"Error parsing Miro response: {str(e)}")
-            raise e
-    
+                            params=params):
+            yield [self.__extract_sticky_note(item) for item in page if item["type"] == "sticky_note"]
+
+    def __extract_sticky_note(self, item):
+        # Keep only the fields downstream stages use and let the rest of the item be freed
+        position = item.get("position") or {}
+        parent = item.get("parent") or {}
+        return {
+            "id": item.get("id"),
+            "content": self.__remove_html_tags(item["data"]["content"]),
+            "x": position.get("x"),
+            "y": position.get("y"),
+            "parent_id": parent.get("id"),
+            "modified_at": item.get("modifiedAt")
+        }
+
     def __remove_html_tags(self, text):
-        clean = re.compile('<.*?>')
-        return re.sub(clean, '', text)
-   
\ No newline at end of file
+        return HTML_TAG_PATTERN.sub('', text)
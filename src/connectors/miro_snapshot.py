@@ -0,0 +1,52 @@
+import os
+import json
+import urllib.parse
+from src.util.config_helper import CONFIG
+
+class MiroSnapshot:
+    """Local copy of a board's sticky notes keyed by Miro item id.
+
+    Each entry keeps the lean note fields plus Miro's modifiedAt, which is what
+    diff() uses to decide whether a note changed since the last run.
+    """
+    def __init__(self, board_id, snapshot_folder=None):
+        self.board_id = board_id
+        self.snapshot_folder = snapshot_folder if snapshot_folder else CONFIG["miro"]["MIRO_SNAPSHOT_FOLDER"]
+        self.items = self.__load()
+
+    def __path(self):
+        file_name = urllib.parse.quote(self.board_id, safe="")
+        return os.path.join(self.snapshot_folder, f"{file_name}.json")
+
+    def __load(self):
+        if not os.path.exists(self.__path()):
+            return {}
+        with open(self.__path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def diff(self, notes):
+        """Compares the current notes with the snapshot and returns the change set."""
+        change_set = {"added": [], "changed": [], "deleted": [], "unchanged": []}
+        seen = set()
+        for note in notes:
+            seen.add(note["id"])
+            previous = self.items.get(note["id"])
+            if previous is None:
+                change_set["added"].append(note)
+            elif previous.get("modified_at") != note.get("modified_at") or previous.get("content") != note.get("content"):
+                change_set["changed"].append(note)
+            else:
+                change_set["unchanged"].append(note)
+        change_set["deleted"] = [note for item_id, note in self.items.items() if item_id not in seen]
+        return change_set
+
+    def save(self, notes):
+        """Replaces the snapshot with the given notes, atomically."""
+        self.items = {note["id"]: note for note in notes}
+        os.makedirs(self.snapshot_folder, exist_ok=True)
+        tmp_path = f"{self.__path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.items, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.__path())
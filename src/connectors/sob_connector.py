@@ -32,7 +32,7 @@ class SobConnector(HTTPHelper):
             "headers": headers
         }
 
-        response = super().get(getURL, headers=headers)
+        response = super().get(self, getURL, headers=headers)
         if response.status_code == 200:
             return self.__parse_sob_response(response.json()["data"])
 
@@ -54,7 +54,7 @@ class SobConnector(HTTPHelper):
             "headers": headers
         }
 
-        response = super().put(putURL, json=data, headers=headers)
+        response = super().put(self, putURL, json=data, headers=headers)
         if response.status_code == 200:
             return response.json()
 
@@ -83,7 +83,7 @@ class SobConnector(HTTPHelper):
                     "title": cluster_title,
                     "cardType": "epic",  # or "step" for yellow, "story" for white
                 }
-                epic_response = super().post(postURL, headers=headers, json=epic_payload)
+                epic_response = super().post(self, postURL, headers=headers, json=epic_payload)
                 epic_response.raise_for_status()
                 epic_id = epic_response.json()['id']
                 json_data += json_data + json.dumps(epic_response.json())
@@ -96,7 +96,7 @@ class SobConnector(HTTPHelper):
                         "cardType": "story",
                         "parentId": epic_id
                     }
-                    story_response = super().post(postURL, headers=headers, json=story_payload)
+                    story_response = super().post(self, postURL, headers=headers, json=story_payload)
                     story_response.raise_for_status()
                 json_data += json_data + json.dumps(epic_response.json())
 
@@ -2,70 +2,105 @@
 import requests
 import logging
 import os
+import argparse
+import json
 from src.util import config_helper
-from src.connectors import miro_connector as miro_conn
+from src.util.config_helper import CONFIG
 from src.connectors import jira_connector as jira_conn
+from src.connectors import jira_journal
 from src.affinity_grouper import affinity_grouper as aff_grouper
+from src.affinity_grouper import model_registry
+from src.pipeline import board_pipeline
+from src.pipeline import batch_runner
+from src.pipeline import mapper_service
 from src.loggers import err_logger
 
-# Load the configuration when the module is imported
-config_helper.load_config("/app/pyproject.toml")
-# config_helper#.load_aws_credentials(os.path.expanduser("~/.aws/credentials"))
-from src.util.config_helper import CONFIG
+def main():
+    # Everything runs from here rather than at import time: the embedding engine starts spawned
+    # worker processes, and each of them imports the __main__ module again
+    parser = argparse.ArgumentParser(description="Group a Miro board into epics and stories and import them into Jira")
+    parser.add_argument("--resume", action="store_true", help="Finish the last interrupted Jira import from its journal")
+    parser.add_argument("--board-ids", nargs="+", help="Map several Miro boards in one process instead of MIRO_BOARD_ID")
+    parser.add_argument("--boards", help="JSON file listing boards to map, each {\"board_id\": ..., \"jira\": {...}} with per-board config")
+    parser.add_argument("--serve", action="store_true", help="Stay resident and map boards posted to the local job endpoint or drop folder")
+    args = parser.parse_args()
+
+    # Load the configuration
+    config_helper.load_config("/app/pyproject.toml")
+    # config_helper#.load_aws_credentials(os.path.expanduser("~/.aws/credentials"))
+
+    errLog = err_logger.ErrLogger()
+    errLog.getLogger()
+    # Log the start of the application 
+
+    errLog.logMessage("Initializing User Story Mapper...")
+    errLog.logMessage(f"Configuration loaded: {CONFIG}")
 
-errLog = err_logger.ErrLogger()
-errLog.getLogger()
-# Log the start of the application 
+    # Optionally load the sentence-transformer at startup rather than on the first grouping call
+    if CONFIG["ai_grouping"]["AI_MODEL_WARM_UP"]:
+        model_registry.warm_up()
 
-errLog.logMessage("Initializing User Story Mapper...")
-errLog.logMessage(f"Configuration loaded: {CONFIG}")
+    affinity_groups = None
+    journal = None
+    if not (args.serve or args.boards or args.board_ids) and (CONFIG["jira"]["JIRA_JOURNAL_TOGGLE"] or args.resume):
+        journal = jira_journal.JiraJournal()
 
-# Connect to the Miro board of interest and pull the board items
-try:
-    if CONFIG["miro"]["MIRO_ON_TOGGLE"]:
-        print("Attempting to connect to Miro board...")
-        miroConn = miro_conn.MiroConnector()
-        miro_data = miroConn.getBoard()
-        print("Successfully connected to Miro board.")
-        print(miro_data[:5])
-    else:
-        print("Miro toggled off per config")
-except requests.ConnectionError as e:
-    print(f"Connection error: {e}")
-except ValueError as e:
-    print(f"Value error: {e}")
-except Exception as e:
-    print(f"An unexpected error occurred: {e}")
+    # TODO Connect to the SoB API using the SobConnector class
+    # StoriesOnBoard no longer provides a public API. So we'll try loading the
+    # affinity groups in to Jira. Then we can either use Jira or the Jira->SoB connector
+    # to use StoriesOnBoard
 
-# Group the Miro board items into a dynamic number of groups using affinity grouping AI
-try:
-    if miro_data:
-        affGrouper = aff_grouper.AffinityGrouper()
-        affinity_groups = affGrouper.getAffinityGroups(miro_data)
-        print("Affinity groups created successfully.")
-        print("Miro data as tree:")
-        affGrouper.printAffinityGroups(affinity_groups)
+    try:
+        if args.serve:
+            # Service mode: load everything once and map boards as jobs arrive, until interrupted
+            mapper_service.MapperService().serveForever()
+        elif args.boards or args.board_ids:
+            # Batch mode: one warm process for many boards, each with its own journal and output file
+            boards = list(args.board_ids or [])
+            if args.boards:
+                with open(args.boards, "r", encoding="utf-8") as f:
+                    boards.extend(json.load(f))
+            for report in batch_runner.BatchRunner(boards).run():
+                print(f"Board {report['board_id']}: {report['status']}, {report['clusters']} clusters, "
+                      f"{len(report['epic_keys'])} epics" + (f" ({report['error']})" if report["error"] else ""))
+                for stage, errors in report["errors"].items():
+                    for e in errors:
+                        print(f"  Error in {stage} stage: {e}")
+                if report["failed_items"]:
+                    print(f"  {len(report['failed_items'])} Jira items failed; see the board's output file")
+        elif args.resume:
+            # A resumed import replays the groups saved in the journal instead of fetching and grouping again
+            print("Resuming the last Jira import; skipping Miro and grouping")
+            affinity_groups = journal.resume()
+            if CONFIG["jira"]["JIRA_ON_TOGGLE"]:
+                jira_epics = jira_conn.JiraConnector().postGroupsToJira(affinity_groups, journal=journal)
+        else:
+            # Miro pages are embedded as they arrive and clusters are posted to Jira as soon as
+            # they are labeled; a failing stage is reported on its own below
+            print("Mapping Miro board into Jira...")
+            pipeline = board_pipeline.BoardPipeline(journal=journal)
+            affinity_groups = pipeline.run()
+            for stage, errors in pipeline.errors.items():
+                for e in errors:
+                    print(f"Error in {stage} stage: {e}")
+            print("Stage timings: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in pipeline.timings.items()))
 
-except Exception as e:
-    print(f"An error occurred while grouping notes: {e}")
+        if affinity_groups:
+            print("Affinity groups created successfully.")
+            print("Miro data as tree:")
+            aff_grouper.AffinityGrouper().printAffinityGroups(affinity_groups)
+    except requests.ConnectionError as e:
+        print(f"Connection error: {e}")
+    except ValueError as e:
+        print(f"Value error: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+    finally:
+        if journal:
+            journal.close()
 
-# TODO Connect to the SoB API using the SobConnector class
-# StoriesOnBoard no longer provides a public API. So we'll try loading the
-# affinity groups in to Jira. Then we can either use Jira or the Jira->SoB connector
-# to use StoriesOnBoard
+    print("Miro Import into Jira Complete")
 
-#TODO: Figure out how to dump the entire error response body
-try:
-    if affinity_groups and CONFIG["jira"]["JIRA_ON_TOGGLE"]:
-        print("Attempting to connect to Jira project...")
-        jiraConn = jira_conn.JiraConnector()
-        print("Successfully connected to Jira project.")
-        jira_epics = jiraConn.postGroupsToJira(affinity_groups)
-except requests.ConnectionError as e:
-    print(f"Connection error: {e}")
-except ValueError as e:
-    print(f"Value error: {e}")
-except Exception as e:
-    print(f"An unexpected error occurred: {e}")
 
-print("Miro Import into Jira Complete")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import os
+import json
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from src.util.config_helper import CONFIG, config_overrides
+from src.util.http_helper import HTTPHelper
+from src.connectors.miro_connector import MiroConnector
+from src.connectors.jira_connector import JiraConnector
+from src.connectors.jira_journal import JiraJournal
+from src.affinity_grouper import model_registry, embedding_engine
+from src.affinity_grouper.affinity_grouper import AffinityGrouper
+from src.pipeline.board_pipeline import BoardPipeline
+
+# Settings a board may override; they are only read while its connectors are built.
+# Base URLs stay fixed so a board can never send the shared credentials to another host, and
+# [ai_grouping] is read while grouping runs, so it stays the same for the whole batch.
+BOARD_OVERRIDES = {
+    "miro": ("MIRO_FETCH_MODE", "MIRO_RESULT_LIMIT", "MIRO_DELTA_TOGGLE"),
+    "jira": ("JIRA_PROJECT_KEY", "JIRA_POST_MODE", "JIRA_BULK_LIMIT", "JIRA_WORKERS"),
+    "pipeline": ("PIPELINE_QUEUE_SIZE", "PIPELINE_EMBED_WORKERS", "PIPELINE_LABEL_WORKERS",
+                 "PIPELINE_LABEL_CHUNK", "PIPELINE_PUBLISH_WORKERS"),
+}
+
+class BatchRunner:
+    """Maps many Miro boards in one process.
+
+    Every board runs its own BoardPipeline, BATCH_WORKERS boards at a time. The boards share
+    the loaded model, one pooled HTTP session, the loaded credentials and the grouper. A board
+    is described as {"board_id": ..., "miro": {...}, "jira": {...}, "pipeline": {...}}, where
+    the sections override the config for that board only (e.g. its JIRA_PROJECT_KEY); only the
+settings in BOARD_OVERRIDES can be changed.
+
+    A failing board never stops the others. Each board gets its own Jira journal and writes its
+    groups and report to BATCH_OUTPUT_FOLDER/<board_id>.json. A board whose Jira writes partly
+    failed is reported "partial" with its failed_items, or "failed" if no epic was created.
+    """
+    def __init__(self, boards=None, workers=None, output_folder=None):
+        self.boards = [self.boardSpec(board) for board in boards] if boards else []
+        self.workers = workers if workers else CONFIG["batch"]["BATCH_WORKERS"]
+        self.output_folder = output_folder if output_folder else CONFIG["batch"]["BATCH_OUTPUT_FOLDER"]
+        self.journal_toggle = CONFIG["jira"]["JIRA_JOURNAL_TOGGLE"]
+
+        # Warm state shared by every board, created by open()
+        self.grouper = None
+        self.shared_http = None
+
+    @staticmethod
+    def boardSpec(board):
+        return board if isinstance(board, dict) else {"board_id": board}
+
+    def open(self):
+        """Loads the model and opens the shared HTTP session; run() calls this itself."""
+        if self.shared_http is None:
+            # Load the model before the boards start so they don't queue up behind the first load
+            model_registry.warm_up()
+            self.grouper = AffinityGrouper()
+            self.shared_http = HTTPHelper("batch")
+
+    def close(self):
+        if self.shared_http is not None:
+            self.shared_http.close()
+            self.shared_http = None
+        embedding_engine.shutdown_pools()
+
+    @staticmethod
+    def checkOverrides(board):
+        """Raises ValueError if the board overrides anything outside BOARD_OVERRIDES."""
+        unknown = set(board) - set(BOARD_OVERRIDES) - {"board_id"}
+        if unknown:
+            raise ValueError(f"Board {board['board_id']} overrides unsupported config sections: {sorted(unknown)}")
+        for section, keys in BOARD_OVERRIDES.items():
+            values = board.get(section, {})
+            if not isinstance(values, dict):
+                raise ValueError(f"Board {board['board_id']} section {section} must be a table of settings")
+            unknown = set(values) - set(keys)
+            if unknown:
+                raise ValueError(f"Board {board['board_id']} overrides unsupported {section} settings: {sorted(unknown)}")
+
+    def __overrides(self, board):
+        self.checkOverrides(board)
+        overrides = {section: dict(board.get(section, {})) for section in BOARD_OVERRIDES}
+        overrides["miro"]["MIRO_BOARD_ID"] = board["board_id"]
+        return overrides
+
+    def __outputPath(self, board_id, suffix):
+        # Miro ids may contain "/" and ids come from job files, so keep them inside the folder
+        return os.path.join(self.output_folder, urllib.parse.quote(f"{board_id}", safe="") + suffix)
+
+    def __build(self, board):
+        # Connectors read their settings when built, so the board's overrides only need to
+        # hold while they are constructed
+        with config_overrides(self.__overrides(board)):
+            journal = None
+            if self.journal_toggle:
+                journal = JiraJournal(self.__outputPath(board["board_id"], ".journal.jsonl"))
+            miro = MiroConnector(self.shared_http.session) if CONFIG["miro"]["MIRO_ON_TOGGLE"] else None
+            jira = JiraConnector(self.shared_http.session, board["board_id"]) if CONFIG["jira"]["JIRA_ON_TOGGLE"] else None
+            return BoardPipeline(journal=journal, miro=miro, grouper=self.grouper, jira=jira)
+
+    @staticmethod
+    def __report(board_id, error=None):
+        return {"board_id": board_id, "status": "failed", "error": error, "errors": {}, "timings": {}, "clusters": 0,
+                "epic_keys": [], "failed_items": []}
+
+    def mapBoard(self, board):
+        """Maps one board with the shared state from open() and returns its report; never raises."""
+        board = self.boardSpec(board)
+        board_id = board["board_id"]
+        try:
+            pipeline = self.__build(board)
+        except Exception as e:
+            return self.__report(board_id, str(e))
+
+        report = self.__report(board_id)
+        result = None
+        try:
+            result = pipeline.run(board_id)
+            report["errors"] = {stage: [str(e) for e in errors] for stage, errors in pipeline.errors.items()}
+            report["timings"] = pipeline.timings
+            report["epic_keys"] = pipeline.epic_keys
+            # Jira writes that failed are caught per item, so they never show up as stage errors
+            report["failed_items"] = list(pipeline.jira.failed_items) if pipeline.jira else []
+            if result is not None:
+                report["clusters"] = result.nClusters()
+                if report["failed_items"] and not report["epic_keys"]:
+                    report["status"] = "failed"
+                else:
+                    report["status"] = "partial" if report["errors"] or report["failed_items"] else "ok"
+            elif pipeline.unchanged:
+                report["status"] = "unchanged"
+        except Exception as e:
+            report["error"] = str(e)
+        finally:
+            if pipeline.journal:
+                pipeline.journal.close()
+
+        groups = [[summary, stories] for summary, stories in result.items()] if result is not None else []
+        os.makedirs(self.output_folder, exist_ok=True)
+        with open(self.__outputPath(board_id, ".json"), "w", encoding="utf-8") as f:
+            json.dump({**report, "groups": groups}, f, indent=2)
+        return report
+
+    def run(self):
+        """Returns one report per board, in input order."""
+        self.open()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                return list(executor.map(self.mapBoard, self.boards))
+        finally:
+            self.close()
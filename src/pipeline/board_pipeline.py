@@ -0,0 +1,182 @@
+import threading
+import numpy as np
+from src.util.config_helper import CONFIG
+from src.pipeline.pipeline import Pipeline, Stage
+from src.connectors.miro_connector import MiroConnector
+from src.connectors.jira_connector import JiraConnector
+from src.affinity_grouper.affinity_grouper import AffinityGrouper
+
+# Jira post modes that can take one cluster at a time; bulk and sync need every group first
+STREAMING_POST_MODES = ("single", "concurrent")
+
+class BoardPipeline:
+    """Maps one Miro board into Jira as overlapping stages.
+
+    fetch    - Miro pages as they are listed
+    embed    - pages as they arrive, on PIPELINE_EMBED_WORKERS threads; with AI_EMBEDDING_WORKERS
+               > 1 pages are pooled up to AI_EMBEDDING_PARALLEL_MIN notes so the engine can
+               shard them across processes
+    cluster  - waits for every page, then clusters the whole board once
+    label    - clusters in chunks of PIPELINE_LABEL_CHUNK, on PIPELINE_LABEL_WORKERS threads;
+               local labels are computed once for the whole board when clustering finishes
+    publish  - each labeled cluster as its own epic and stories, on PIPELINE_PUBLISH_WORKERS
+               threads; bulk and sync post modes publish once every cluster is labeled
+
+    With MIRO_DELTA_TOGGLE the listed notes are diffed against the board's Miro snapshot: an
+    unchanged board stops before clustering, and the snapshot is only committed once a run
+    finished without stage errors or failed Jira items, so failed changes are retried. A changed
+    board is still grouped as a whole, so delta mode needs JIRA_POST_MODE = "sync" to limit the
+    Jira writes to what changed; the other post modes would import the whole board again.
+
+    Connectors and the grouper can be passed in so several boards share them.
+    """
+    def __init__(self, journal=None, miro=None, grouper=None, jira=None):
+        self.embed_workers = CONFIG["pipeline"]["PIPELINE_EMBED_WORKERS"]
+        self.queue_size = CONFIG["pipeline"]["PIPELINE_QUEUE_SIZE"]
+        self.label_workers = CONFIG["pipeline"]["PIPELINE_LABEL_WORKERS"]
+        self.label_chunk = CONFIG["pipeline"]["PIPELINE_LABEL_CHUNK"]
+        self.publish_workers = CONFIG["pipeline"]["PIPELINE_PUBLISH_WORKERS"]
+        self.label_engine = CONFIG["ai_grouping"]["AI_LABEL_ENGINE"]
+        # Notes pooled per encode call; 0 encodes every page on its own
+        self.embed_batch = CONFIG["ai_grouping"]["AI_EMBEDDING_PARALLEL_MIN"] if CONFIG["ai_grouping"]["AI_EMBEDDING_WORKERS"] > 1 else 0
+        self.miro_toggle = CONFIG["miro"]["MIRO_ON_TOGGLE"]
+        self.jira_toggle = CONFIG["jira"]["JIRA_ON_TOGGLE"]
+        self.delta_toggle = CONFIG["miro"]["MIRO_DELTA_TOGGLE"]
+        self.journal = journal
+        self.miro = miro if miro else (MiroConnector() if self.miro_toggle else None)
+        self.grouper = grouper if grouper else AffinityGrouper()
+        self.jira = jira if jira else (JiraConnector() if self.jira_toggle else None)
+        if self.delta_toggle and self.jira is not None and self.jira.post_mode != "sync":
+            raise ValueError(f"MIRO_DELTA_TOGGLE needs JIRA_POST_MODE = \"sync\", not \"{self.jira.post_mode}\"; "
+                             "other post modes would create every epic and story again on each change")
+
+        # Outcome of the last run
+        self.result = None
+        self.epic_keys = []
+        self.errors = {}
+        self.timings = {}
+        self.change_set = None
+        self.unchanged = False
+
+    def __fetch(self, board_id, emit):
+        try:
+            if not self.delta_toggle:
+                for index, page in enumerate(self.miro.getBoardStream(board_id=board_id)):
+                    if page:
+                        emit((index, page))
+                return
+            # Pages still stream into embedding; the diff needs the whole listing
+            listed = []
+            for index, notes in enumerate(self.miro.getStickyNoteStream(board_id=board_id)):
+                listed.extend(notes)
+                if notes:
+                    emit((index, [note["content"] for note in notes]))
+            self.change_set = self.miro.changeSet(listed, board_id)
+        except Exception:
+            self.pages_missing = True
+            raise
+
+    def __embed(self, page, emit):
+        with self.lock:
+            self.unembedded.append(page)
+            self.unembedded_notes += len(page[1])
+            if self.unembedded_notes < self.embed_batch:
+                return
+            pages, self.unembedded, self.unembedded_notes = self.unembedded, [], 0
+        self.__encodePages(pages, emit)
+
+    def __embedRest(self, emit):
+        if self.unembedded:
+            self.__encodePages(self.unembedded, emit)
+
+    def __encodePages(self, pages, emit):
+        try:
+            embeddings = self.grouper.encode([note for _, notes in pages for note in notes])
+        except Exception:
+            self.pages_missing = True
+            raise
+        start = 0
+        for index, notes in pages:
+            emit((index, notes, embeddings[start:start + len(notes)]))
+            start += len(notes)
+
+    def __collect(self, page, emit):
+        with self.lock:
+            self.pages.append(page)
+
+    def __cluster(self, emit):
+        if self.pages_missing:
+            raise ValueError("Some Miro pages failed to fetch or embed; not grouping a partial board")
+        if self.change_set is not None and not any(self.change_set[change] for change in ("added", "changed", "deleted")):
+            self.unchanged = True
+            return
+        if not self.pages:
+            raise ValueError("No sticky notes found in Miro board")
+        self.pages.sort(key=lambda page: page[0])
+        notes = [note for _, page_notes, _ in self.pages for note in page_notes]
+        embeddings = np.vstack([page_embeddings for _, _, page_embeddings in self.pages])
+        self.result = self.grouper.clusterNotes(notes, embeddings=embeddings)
+        if self.label_engine != "llm":
+            self.grouper.localLabels(self.result)
+        clusters = list(range(self.result.nClusters()))
+        for start in range(0, len(clusters), self.label_chunk):
+            emit(clusters[start:start + self.label_chunk])
+
+    def __label(self, clusters, emit):
+        for cluster, summary in zip(clusters, self.grouper.labelClusters(self.result, clusters)):
+            self.result.summaries[cluster] = summary
+            emit((cluster, summary, self.result.texts(cluster)))
+
+    def __publish(self, group, emit):
+        cluster, summary, stories = group
+        if self.jira is None or self.jira.post_mode not in STREAMING_POST_MODES:
+            return
+        emit((cluster, self.jira.postGroup(cluster, summary, stories)))
+
+    def __publishAll(self, emit):
+        if self.jira is None or self.jira.post_mode in STREAMING_POST_MODES or self.result is None:
+            return
+        if self.journal:
+            self.journal.start(self.result)
+        for epic_key in self.jira.postGroupsToJira(self.result, journal=self.journal):
+            emit((None, epic_key))
+
+    def run(self, board_id=None):
+        """Returns the labeled ClusterResult, or None if the board could not be grouped;
+        per-stage errors and timings are left in errors and timings."""
+        self.result, self.epic_keys, self.errors, self.timings = None, [], {}, {}
+        self.change_set, self.unchanged = None, False
+        if self.miro is None:
+            print("Miro toggled off per config")
+            return None
+
+        self.pages = []
+        self.pages_missing = False
+        self.unembedded, self.unembedded_notes = [], 0
+        self.lock = threading.Lock()
+        if self.jira and self.jira.post_mode in STREAMING_POST_MODES:
+            self.jira.startPosting(self.journal)
+            if self.journal:
+                self.journal.start()
+
+        pipeline = Pipeline([
+            Stage("fetch", self.__fetch),
+            Stage("embed", self.__embed, workers=self.embed_workers, flush=self.__embedRest),
+            Stage("cluster", self.__collect, flush=self.__cluster),
+            Stage("label", self.__label, workers=self.label_workers),
+            Stage("publish", self.__publish, workers=self.publish_workers, flush=self.__publishAll),
+        ], queue_size=self.queue_size)
+        published = pipeline.run([board_id])
+        if self.jira and self.jira.post_mode in STREAMING_POST_MODES:
+            self.jira.finishPosting()
+
+        # Streamed epics finish in any order; report them in cluster order
+        self.epic_keys = [epic_key for _, epic_key in sorted(published, key=lambda item: item[0] or 0) if epic_key]
+        self.errors, self.timings = pipeline.errors, pipeline.timings
+
+        if self.unchanged:
+            print("Miro board unchanged since the last run; nothing to map")
+        elif self.change_set is not None and self.result is not None and not self.errors \
+                and not (self.jira and self.jira.failed_items):
+            self.miro.commitSync(self.change_set, board_id)
+        return self.result
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from src.util.config_helper import CONFIG
+from src.pipeline.batch_runner import BatchRunner
+
+# Marks the end of the job queue for one worker
+_STOP = object()
+
+class MapperService:
+    """Keeps the mapper resident and maps boards on request.
+
+    The model, config, credentials, grouper and pooled HTTP session are loaded once by start()
+    and shared by every job, so a job only pays for its own Miro, grouping and Jira work. Jobs
+    are taken from a local HTTP endpoint and, if SERVICE_DROP_FOLDER is set, from JSON files
+    dropped in that folder. Each job is a board as BatchRunner takes it ({"board_id": ...,
+    "jira": {...}}, limited to BatchRunner's BOARD_OVERRIDES) and runs on one of SERVICE_WORKERS
+    threads; jobs for the same board run one after the other since they share its output and
+    journal files.
+
+    POST /jobs          queues a board posted as application/json, answers 202 with the job
+    GET  /jobs          every job kept, newest first
+    GET  /jobs/<id>     one job: status (queued/running/ok/partial/unchanged/failed), the report
+                        and its timings (queued, run and per-stage seconds)
+    GET  /health        worker count and queued/running jobs
+    """
+    def __init__(self, host=None, port=None, workers=None, drop_folder=None, output_folder=None):
+        self.host = host if host else CONFIG["service"]["SERVICE_HOST"]
+        self.port = port if port is not None else CONFIG["service"]["SERVICE_PORT"]
+        self.workers = workers if workers else CONFIG["service"]["SERVICE_WORKERS"]
+        self.drop_folder = drop_folder if drop_folder else CONFIG["service"]["SERVICE_DROP_FOLDER"]
+        self.poll_seconds = CONFIG["service"]["SERVICE_DROP_POLL_SECONDS"]
+        self.max_jobs = CONFIG["service"]["SERVICE_MAX_JOBS"]
+        self.runner = BatchRunner(output_folder=output_folder)
+
+        self.jobs = {}
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.board_locks = {}
+        self.stopping = threading.Event()
+        self.threads = []
+        self.server = None
+
+    def start(self):
+        """Loads the shared state and starts the workers, the endpoint and the drop folder watcher."""
+        self.runner.open()
+        self.stopping.clear()
+        self.threads = [threading.Thread(target=self.__work, name=f"mapper-{i}", daemon=True) for i in range(self.workers)]
+        if self.drop_folder:
+            self.threads.append(threading.Thread(target=self.__watch, name="mapper-drop", daemon=True))
+        self.server = ThreadingHTTPServer((self.host, self.port), _handler(self))
+        # Port 0 picks a free port; report the one actually bound
+        self.port = self.server.server_address[1]
+        self.threads.append(threading.Thread(target=self.server.serve_forever, name="mapper-http", daemon=True))
+        for thread in self.threads:
+            thread.start()
+        print(f"Mapper service ready on http://{self.host}:{self.port} with {self.workers} workers"
+              + (f", watching {self.drop_folder}" if self.drop_folder else ""))
+
+    def stop(self):
+        """Stops taking jobs, lets running jobs finish and releases the shared state."""
+        self.stopping.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for _ in range(self.workers):
+            self.queue.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        self.runner.close()
+
+    def serveForever(self):
+        self.start()
+        try:
+            while not self.stopping.wait(1):
+                pass
+        except KeyboardInterrupt:
+            print("Stopping mapper service...")
+        finally:
+            self.stop()
+
+    @staticmethod
+    def __board(board):
+        if not isinstance(board, (dict, str)):
+            raise ValueError("A mapping job is a board id or {\"board_id\": ...}")
+        board = BatchRunner.boardSpec(board)
+        if not board.get("board_id"):
+            raise ValueError("A mapping job needs a board_id")
+        BatchRunner.checkOverrides(board)
+        return board
+
+    def submit(self, board):
+        """Queues a board and returns its job."""
+        board = self.__board(board)
+        job = {"id": uuid.uuid4().hex, "board_id": board["board_id"], "status": "queued",
+               "submitted": time.time(), "report": None, "timings": {}}
+        with self.lock:
+            self.jobs[job["id"]] = job
+            self.__prune()
+        self.queue.put((job["id"], board))
+        return self.job(job["id"])
+
+    def job(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def listJobs(self):
+        with self.lock:
+            return [json.loads(json.dumps(job)) for job in sorted(self.jobs.values(), key=lambda job: -job["submitted"])]
+
+    def health(self):
+        with self.lock:
+            statuses = [job["status"] for job in self.jobs.values()]
+        return {"status": "ok", "workers": self.workers, "queued": statuses.count("queued"), "running": statuses.count("running")}
+
+    def __prune(self):
+        # Forget the oldest finished jobs once more than SERVICE_MAX_JOBS are kept
+        finished = sorted((job for job in self.jobs.values() if job["status"] not in ("queued", "running")),
+                          key=lambda job: job["submitted"])
+        for job in finished[:max(0, len(self.jobs) - self.max_jobs)]:
+            del self.jobs[job["id"]]
+
+    def __boardLock(self, board_id):
+        with self.lock:
+            return self.board_locks.setdefault(board_id, threading.Lock())
+
+    def __work(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+            job_id, board = item
+            with self.__boardLock(board["board_id"]):
+                started = time.time()
+                with self.lock:
+                    job = self.jobs[job_id]
+                    job["status"] = "running"
+                    job["timings"]["queued"] = started - job["submitted"]
+                try:
+                    report = self.runner.mapBoard(board)
+                except Exception as e:
+                    # e.g. the output folder is not writable; the worker stays up for the next job
+                    report = {"status": "failed", "error": str(e), "timings": {}}
+                with self.lock:
+                    job["status"] = report["status"]
+                    job["report"] = report
+                    job["timings"]["run"] = time.time() - started
+                    job["timings"].update(report["timings"])
+                    run_seconds = job["timings"]["run"]
+            print(f"Job {job_id} for board {board['board_id']}: {report['status']} in {run_seconds:.2f}s")
+
+    def __watch(self):
+        while not self.stopping.is_set():
+            self.scanDropFolder()
+            self.stopping.wait(self.poll_seconds)
+
+    def scanDropFolder(self):
+        """Queues every *.json file in the drop folder, holding one board or a list of boards.
+
+        A picked-up file is moved to accepted/ with the ids of its jobs, or to rejected/ with
+        the reason it could not be read.
+        """
+        for folder in ("accepted", "rejected"):
+            os.makedirs(os.path.join(self.drop_folder, folder), exist_ok=True)
+        for name in sorted(os.listdir(self.drop_folder)):
+            path = os.path.join(self.drop_folder, name)
+            if not name.endswith(".json") or not os.path.isfile(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    boards = json.load(f)
+                boards = [self.__board(board) for board in (boards if isinstance(boards, list) else [boards])]
+                jobs = [self.submit(board) for board in boards]
+                folder, note = "accepted", {"jobs": [job["id"] for job in jobs]}
+            except ValueError as e:
+                folder, note = "rejected", {"error": str(e)}
+            os.replace(path, os.path.join(self.drop_folder, folder, name))
+            with open(os.path.join(self.drop_folder, folder, name + ".status"), "w", encoding="utf-8") as f:
+                json.dump(note, f)
+
+def _handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def __send(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/health":
+                self.__send(200, service.health())
+            elif path == "/jobs":
+                self.__send(200, service.listJobs())
+            elif path.startswith("/jobs/"):
+                job = service.job(path[len("/jobs/"):])
+                self.__send(200, job) if job else self.__send(404, {"error": "Unknown job"})
+            else:
+                self.__send(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                self.__send(404, {"error": "Not found"})
+                return
+            # Browsers send text/plain cross-site without asking; a JSON body needs a preflight
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type != "application/json":
+                self.__send(415, {"error": "Jobs must be posted as application/json"})
+                return
+            try:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self.__send(202, service.submit(json.loads(body)))
+            except (ValueError, TypeError) as e:
+                self.__send(400, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            # Jobs are reported by the workers; keep request lines out of the console
+            pass
+
+    return Handler
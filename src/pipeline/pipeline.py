@@ -0,0 +1,113 @@
+import time
+import queue
+import threading
+from src.util.config_helper import CONFIG
+
+# Marks the end of a stage's input
+_DONE = object()
+
+class Stage:
+    """One step of a Pipeline.
+
+    work(item, emit) runs for every input item on one of `workers` threads and calls emit()
+    for each output. flush(emit), if given, runs once after all input was processed, for
+    steps that need everything first (e.g. clustering a whole board).
+    """
+    def __init__(self, name, work, workers=1, flush=None):
+        self.name = name
+        self.work = work
+        self.workers = workers
+        self.flush = flush
+
+class Pipeline:
+    """Runs stages concurrently, connected by bounded queues.
+
+    A stage blocks when the queue to the next stage is full, so a fast producer can only run
+    PIPELINE_QUEUE_SIZE items ahead. An exception while handling an item is recorded in
+    errors[stage name] and the stage moves on to the next item, so one bad page or cluster
+    never stalls or aborts the stages around it. timings[stage name] is the wall time from
+    the stage's first item to its last output.
+    """
+    def __init__(self, stages, queue_size=None):
+        self.stages = stages
+        self.queue_size = queue_size if queue_size else CONFIG["pipeline"]["PIPELINE_QUEUE_SIZE"]
+        self.errors = {}
+        self.timings = {}
+
+    def __record(self, stage, error):
+        self.errors.setdefault(stage.name, []).append(error)
+
+    def __runStage(self, stage, inbox, outbox):
+        started = []
+
+        def emit(item):
+            outbox.put(item)
+
+        def work():
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    return
+                if not started:
+                    started.append(time.perf_counter())
+                try:
+                    stage.work(item, emit)
+                except Exception as e:
+                    self.__record(stage, e)
+
+        workers = [threading.Thread(target=work, name=f"{stage.name}-{i}", daemon=True) for i in range(stage.workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        if stage.flush:
+            if not started:
+                started.append(time.perf_counter())
+            try:
+                stage.flush(emit)
+            except Exception as e:
+                self.__record(stage, e)
+        self.timings[stage.name] = time.perf_counter() - started[0] if started else 0.0
+        outbox.put(_DONE)
+
+    def run(self, inputs):
+        """Feeds inputs to the first stage and returns everything the last stage emitted."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        runners = []
+        for stage, inbox, outbox in zip(self.stages, queues, queues[1:]):
+            # Every worker of a stage needs its own end marker; the runner forwards one downstream
+            runners.append(threading.Thread(target=self.__runStage, args=(stage, _Fanout(inbox, stage.workers), outbox),
+                                            name=stage.name, daemon=True))
+        for runner in runners:
+            runner.start()
+
+        for item in inputs:
+            queues[0].put(item)
+        queues[0].put(_DONE)
+
+        results = []
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            results.append(item)
+        for runner in runners:
+            runner.join()
+        return results
+
+class _Fanout:
+    """Queue view that turns the single end marker from upstream into one per worker."""
+    def __init__(self, inbox, workers):
+        self.inbox = inbox
+        self.remaining = workers
+        self.lock = threading.Lock()
+
+    def get(self):
+        item = self.inbox.get()
+        if item is _DONE:
+            with self.lock:
+                self.remaining -= 1
+                if self.remaining > 0:
+                    self.inbox.put(_DONE)
+        return item
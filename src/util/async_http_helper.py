@@ -0,0 +1,272 @@
+import json
+import atexit
+import asyncio
+import threading
+import aiohttp
+from .config_helper import CONFIG
+from .rate_limiter import get_rate_limiter, parse_wait_seconds
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable
+
+# One shared event loop per process. It runs on a daemon thread so synchronous code
+# (main.py, the connectors) can submit coroutines to it and every AsyncHTTPHelper shares
+# the same connection pool. An aiohttp session only works on the loop it was created on,
+# so sessions are kept per loop; callers awaiting the verbs on a loop of their own (e.g.
+# asyncio.run) should await close_session() before that loop ends.
+_LOOP = None
+_LOOP_THREAD = None
+_SESSIONS = {}
+_LOCK = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Returns the shared background event loop, starting it on first use."""
+    global _LOOP, _LOOP_THREAD
+    with _LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            _LOOP = asyncio.new_event_loop()
+            _LOOP_THREAD = threading.Thread(target=_LOOP.run_forever, name="async_http_loop", daemon=True)
+            _LOOP_THREAD.start()
+    return _LOOP
+
+
+def run(coro: Awaitable) -> Any:
+    """Runs a coroutine on the shared loop and blocks until it completes."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        # Forget sessions of loops that have since been closed; they can never be used again
+        for closed_loop in [other for other in _SESSIONS if other.is_closed()]:
+            del _SESSIONS[closed_loop]
+        session = _SESSIONS.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=CONFIG['http']['HTTP_ASYNC_LIMIT'],
+                                         limit_per_host=CONFIG['http']['HTTP_ASYNC_LIMIT_PER_HOST'],
+                                         force_close=not CONFIG['http']['HTTP_KEEP_ALIVE'])
+        session = aiohttp.ClientSession(connector=connector)
+        with _LOCK:
+            _SESSIONS[loop] = session
+    return session
+
+
+async def close_session():
+    """Closes the session of the running loop."""
+    with _LOCK:
+        session = _SESSIONS.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def shutdown():
+    """Closes the shared session and stops the background loop."""
+    global _LOOP, _LOOP_THREAD
+    if _LOOP is None:
+        return
+    run(close_session())
+    _LOOP.call_soon_threadsafe(_LOOP.stop)
+    _LOOP_THREAD.join()
+    _LOOP.close()
+    _LOOP = None
+    _LOOP_THREAD = None
+
+
+atexit.register(shutdown)
+
+
+class AsyncHTTPResponse:
+    """Fully read response so callers can use it after the connection is released."""
+    def __init__(self, status_code: int, reason: str, headers: Dict[str, str], content: bytes, url: str):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class AsyncHTTPHelper:
+    def __init__(self, name):
+        self.name = name
+        self.timeout = CONFIG['http']['HTTP_TIMEOUT']
+        self.rate_limit = CONFIG['http']['HTTP_RATE_LIMIT_TOGGLE']
+
+    async def request(self,
+                      method: str,
+                      url: str,
+                      headers: Optional[Dict[str, str]] = None,
+                      params: Optional[Dict[str, Any]] = None,
+                      data: Optional[Any] = None,
+                      json: Optional[Any] = None,
+                      timeout: Optional[int] = None) -> AsyncHTTPResponse:
+        effective_timeout = timeout if timeout is not None else self.timeout
+        limiter = get_rate_limiter(url, headers) if self.rate_limit else None
+        if limiter:
+            await limiter.acquire_async()
+        session = await _get_session()
+        async with session.request(method, url, headers=headers, params=params, data=data, json=json,
+                                   timeout=aiohttp.ClientTimeout(total=effective_timeout)) as response:
+            if limiter:
+                limiter.update(response.status, response.headers)
+            response.raise_for_status()
+            content = await response.read()
+            return AsyncHTTPResponse(response.status, response.reason, dict(response.headers), content, str(response.url))
+
+    @staticmethod
+    def __retry_delay(error, attempt, backoff_factor) -> float:
+        # Prefer the server's Retry-After over our own exponential backoff, as HTTPHelper does
+        headers = getattr(error, "headers", None)
+        if headers:
+            retry_after = parse_wait_seconds(headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after
+        return backoff_factor * (2 ** attempt)
+
+    async def request_with_retry(self,
+                                 method: str,
+                                 url: str,
+                                 retries: int = 3,
+                                 backoff_factor: float = 0.3,
+                                 **kwargs) -> AsyncHTTPResponse:
+        """request() retried on connection errors, timeouts and error statuses like HTTPHelper's *_with_retry."""
+        for attempt in range(retries):
+            try:
+                return await self.request(method, url, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < retries - 1:
+                    await asyncio.sleep(self.__retry_delay(e, attempt, backoff_factor))
+                else:
+                    raise e
+
+    async def get(self,
+                  url: str,
+                  headers: Optional[Dict[str, str]] = None,
+                  params: Optional[Dict[str, Any]] = None,
+                  timeout: Optional[int] = None) -> AsyncHTTPResponse:
+        return await self.request("GET", url, headers=headers, params=params, timeout=timeout)
+
+    async def post(self,
+                   url: str,
+                   data: Optional[Any] = None,
+                   json: Optional[Any] = None,
+                   headers: Optional[Dict[str, str]] = None,
+                   timeout: Optional[int] = None) -> AsyncHTTPResponse:
+        return await self.request("POST", url, headers=headers, data=data, json=json, timeout=timeout)
+
+    async def put(self,
+                  url: str,
+                  data: Optional[Any] = None,
+                  json: Optional[Any] = None,
+                  headers: Optional[Dict[str, str]] = None,
+                  timeout: Optional[int] = None) -> AsyncHTTPResponse:
+        return await self.request("PUT", url, headers=headers, data=data, json=json, timeout=timeout)
+
+    async def patch(self,
+                    url: str,
+                    data: Optional[Any] = None,
+                    json: Optional[Any] = None,
+                    headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[int] = None) -> AsyncHTTPResponse:
+        return await self.request("PATCH", url, headers=headers, data=data, json=json, timeout=timeout)
+
+    async def delete(self,
+                     url: str,
+                     headers: Optional[Dict[str, str]] = None,
+                     timeout: Optional[int] = None) -> AsyncHTTPResponse:
+        return await self.request("DELETE", url, headers=headers, timeout=timeout)
+
+    async def get_with_retry(self,
+                             url: str,
+                             headers: Optional[Dict[str, str]] = None,
+                             params: Optional[Dict[str, Any]] = None,
+                             timeout: Optional[int] = None,
+                             retries: int = 3,
+                             backoff_factor: float = 0.3) -> AsyncHTTPResponse:
+        return await self.request_with_retry("GET", url, retries, backoff_factor, headers=headers, params=params, timeout=timeout)
+
+    async def post_with_retry(self,
+                              url: str,
+                              data: Optional[Any] = None,
+                              json: Optional[Any] = None,
+                              headers: Optional[Dict[str, str]] = None,
+                              timeout: Optional[int] = None,
+                              retries: int = 3,
+                              backoff_factor: float = 0.3) -> AsyncHTTPResponse:
+        return await self.request_with_retry("POST", url, retries, backoff_factor, headers=headers, data=data, json=json, timeout=timeout)
+
+    async def put_with_retry(self,
+                             url: str,
+                             data: Optional[Any] = None,
+                             json: Optional[Any] = None,
+                             headers: Optional[Dict[str, str]] = None,
+                             timeout: Optional[int] = None,
+                             retries: int = 3,
+                             backoff_factor: float = 0.3) -> AsyncHTTPResponse:
+        return await self.request_with_retry("PUT", url, retries, backoff_factor, headers=headers, data=data, json=json, timeout=timeout)
+
+    async def patch_with_retry(self,
+                               url: str,
+                               data: Optional[Any] = None,
+                               json: Optional[Any] = None,
+                               headers: Optional[Dict[str, str]] = None,
+                               timeout: Optional[int] = None,
+                               retries: int = 3,
+                               backoff_factor: float = 0.3) -> AsyncHTTPResponse:
+        return await self.request_with_retry("PATCH", url, retries, backoff_factor, headers=headers, data=data, json=json, timeout=timeout)
+
+    async def delete_with_retry(self,
+                                url: str,
+                                headers: Optional[Dict[str, str]] = None,
+                                timeout: Optional[int] = None,
+                                retries: int = 3,
+                                backoff_factor: float = 0.3) -> AsyncHTTPResponse:
+        return await self.request_with_retry("DELETE", url, retries, backoff_factor, headers=headers, timeout=timeout)
+
+    async def get_paginated(self,
+                            url: str,
+                            headers: Optional[Dict[str, str]] = None,
+                            params: Optional[Dict[str, Any]] = None,
+                            timeout: Optional[int] = None,
+                            next_key: str = "next",
+                            results_key: str = "data") -> AsyncIterator[Any]:
+        # Same links.next walk as HTTPHelper.get_paginated, but items are yielded as
+        # each page arrives instead of being accumulated into one list
+        while True:
+            response = await self.get(url, headers=headers, params=params, timeout=timeout)
+            data = response.json()
+            for item in data.get(results_key, []):
+                yield item
+            next_url = data.get("links", {}).get(next_key)
+            if not next_url:
+                break
+            url = next_url
+            params = None  # next_url is a full URL including the query string
+
+    async def get_paginated_with_cursor(self,
+                                        url: str,
+                                        headers: Optional[Dict[str, str]] = None,
+                                        params: Optional[Dict[str, Any]] = None,
+                                        timeout: Optional[int] = None,
+                                        cursor_key: str = "cursor",
+                                        results_key: str = "data") -> AsyncIterator[Any]:
+        params = dict(params or {})
+        while True:
+            response = await self.get(url, headers=headers, params=params, timeout=timeout)
+            data = response.json()
+            for item in data.get(results_key, []):
+                yield item
+            cursor = data.get(cursor_key)
+            if not cursor:
+                break
+            params[cursor_key] = cursor
+
+    def run(self, coro: Awaitable) -> Any:
+        """Synchronous bridge for callers that are not running inside the shared loop."""
+        return run(coro)
@@ -2,10 +2,13 @@ import tomllib as toml
 import os
 import boto3
 import json
+import threading
+from contextlib import contextmanager
 from botocore.exceptions import ClientError
 
 # Define a global variable to store the configuration
 CONFIG = {}
+_OVERRIDE_LOCK = threading.RLock()
 
 def load_config(config_file_path):
     """Loads the TOML configuration file into the global CONFIG variable."""
@@ -15,6 +18,23 @@ def load_config(config_file_path):
         CONFIG.update(toml.load(f))
         __get_aws_secret()
 
+@contextmanager
+def config_overrides(overrides):
+    """Temporarily merges {section: {key: value}} into CONFIG, e.g. while one board's
+    connectors read their settings. Only one override is active at a time."""
+    with _OVERRIDE_LOCK:
+        saved = {section: CONFIG.get(section) for section in overrides}
+        for section, values in overrides.items():
+            CONFIG[section] = {**CONFIG.get(section, {}), **values}
+        try:
+            yield CONFIG
+        finally:
+            for section, values in saved.items():
+                if values is None:
+                    CONFIG.pop(section, None)
+                else:
+                    CONFIG[section] = values
+
 def __get_aws_secret():
     secret_name = CONFIG["aws"]["AWS_USM_SECRET"]
     region_name = CONFIG["aws"]["AWS_REGION"]
@@ -2,16 +2,73 @@ import json
 import requests
 import time
 import urllib.parse
+from requests.adapters import HTTPAdapter
 from .config_helper import CONFIG
-from typing import Optional, Dict, Any, List, Union
+from .rate_limiter import get_rate_limiter, parse_wait_seconds
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Union, Iterator
 
 # TODO: abstract hardcoded values
 # TODO: add retry logic based on https://tinyurl.com/yck3tn2f
 class HTTPHelper: 
-    def __init__(self, name):
+    def __init__(self, name, session=None):
         self.name = name
         self.timeout = CONFIG['http']['HTTP_TIMEOUT']
-        
+        self.pool_connections = CONFIG['http']['HTTP_POOL_CONNECTIONS']
+        self.pool_maxsize = CONFIG['http']['HTTP_POOL_MAXSIZE']
+        self.pool_block = CONFIG['http']['HTTP_POOL_BLOCK']
+        self.keep_alive = CONFIG['http']['HTTP_KEEP_ALIVE']
+        self.rate_limit = CONFIG['http']['HTTP_RATE_LIMIT_TOGGLE']
+
+        # Every verb below goes through this session so a connector reuses the same
+        # TCP/TLS connections for its whole lifetime instead of a handshake per call.
+        # A session passed in is shared with other connectors and closed by its owner.
+        self.owns_session = session is None
+        self.session = session if session else self.__build_session()
+
+    def __build_session(self) -> requests.Session:
+        session = requests.Session()
+
+        # pool_connections is the number of per-host pools kept, pool_maxsize the
+        # number of live connections kept in each of them
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+        return session
+
+    def __send(self, method, url, headers=None, **kwargs) -> requests.Response:
+        # Pace against the shared per-host/credential budget, then feed the response's
+        # rate-limit headers back so every connector sees what the server told us
+        limiter = get_rate_limiter(url, headers) if self.rate_limit else None
+        if limiter:
+            limiter.acquire()
+        response = self.session.request(method, url, headers=headers, **kwargs)
+        if limiter:
+            limiter.update(response.status_code, response.headers)
+        return response
+
+    def __retry_delay(self, error, attempt, backoff_factor) -> float:
+        # Prefer the server's Retry-After over our own exponential backoff
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = parse_wait_seconds(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after
+        return backoff_factor * (2 ** attempt)
+
+    def close(self):
+        if self.owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     @staticmethod
     def get(self,
             url: str,
@@ -23,7 +80,7 @@ class HTTPHelper:
 #            params = urllib.parse.quote(params, safe='/')
             params = urllib.parse.urlencode(params)
 
-        response = requests.get(url, headers=headers, params=params, timeout=effective_timeout)
+        response = self.__send("GET", url, headers=headers, params=params, timeout=effective_timeout)
         response.raise_for_status()
         return response
     
@@ -36,7 +93,7 @@ class HTTPHelper:
              timeout: Optional[int] = None) -> requests.Response:
         effective_timeout = timeout if timeout is not None else self.timeout
 
-        response = requests.post(url, data=data, json=json, headers=headers, timeout=effective_timeout)
+        response = self.__send("POST", url, data=data, json=json, headers=headers, timeout=effective_timeout)
         response.raise_for_status()
         
         return response
@@ -50,7 +107,7 @@ class HTTPHelper:
             timeout: Optional[int] = None) -> requests.Response:
         effective_timeout = timeout if timeout is not None else self.timeout
 
-        response = requests.put(url, data=data, json=json, headers=headers, timeout=effective_timeout)
+        response = self.__send("PUT", url, data=data, json=json, headers=headers, timeout=effective_timeout)
         response.raise_for_status()
         return response
 
@@ -61,7 +118,7 @@ class HTTPHelper:
                timeout: Optional[int] = None) -> requests.Response:
         effective_timeout = timeout if timeout is not None else self.timeout
 
-        response = requests.delete(url, headers=headers, timeout=effective_timeout)
+        response = self.__send("DELETE", url, headers=headers, timeout=effective_timeout)
         response.raise_for_status()
         return response
     
@@ -73,7 +130,7 @@ class HTTPHelper:
               headers: Optional[Dict[str, str]] = None,
               timeout: Optional[int] = None) -> requests.Response:
         effective_timeout = timeout if timeout is not None else self.timeout
-        response = requests.patch(url, data=data, json=json, headers=headers, timeout=effective_timeout)
+        response = self.__send("PATCH", url, data=data, json=json, headers=headers, timeout=effective_timeout)
         response.raise_for_status()
         return response
     
@@ -88,7 +145,7 @@ class HTTPHelper:
         effective_timeout = timeout if timeout is not None else self.timeout
         results = []
         while True:
-            response = requests.get(url, headers=headers, params=params, timeout=effective_timeout)
+            response = self.__send("GET", url, headers=headers, params=params, timeout=effective_timeout)
             response.raise_for_status()
             data = response.json()
             results.extend(data.get(results_key, []))
@@ -99,6 +156,33 @@ class HTTPHelper:
 #            params = None  # Assume next_url is a full URL
         return results
     
+    @staticmethod
+    def iter_paginated(self,
+                       url: str,
+                       headers: Optional[Dict[str, str]] = None,
+                       params: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[int] = None,
+                       next_key: str = "next",
+                       results_key: str = "data") -> Iterator[List[Any]]:
+        # Yields one page of results at a time instead of accumulating the whole board.
+        # The next page is requested on a background worker as soon as its link is known,
+        # so the network fetch overlaps with the caller processing the current page.
+        effective_timeout = timeout if timeout is not None else self.timeout
+
+        def fetch(page_url, page_params):
+            response = self.__send("GET", page_url, headers=headers, params=page_params, timeout=effective_timeout)
+            response.raise_for_status()
+            return response.json()
+
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            pending = prefetcher.submit(fetch, url, params)
+            while pending:
+                data = pending.result()
+                next_url = data.get("links", {}).get(next_key)
+                # next_url is a full URL that already carries limit and cursor
+                pending = prefetcher.submit(fetch, next_url, None) if next_url else None
+                yield data.get(results_key, [])
+
     @staticmethod
     def get_paginated_with_cursor(self,
                                    url: str,
@@ -114,7 +198,7 @@ class HTTPHelper:
         while True:
             if cursor:
                 params[cursor_key] = cursor
-            response = requests.get(url, headers=headers, params=params, timeout=effective_timeout)
+            response = self.__send("GET", url, headers=headers, params=params, timeout=effective_timeout)
             response.raise_for_status()
             data = response.json()
             results.extend(data.get(results_key, []))
@@ -137,12 +221,12 @@ class HTTPHelper:
         effective_timeout = timeout if timeout is not None else self.timeout
         for attempt in range(retries):
             try:
-                response = requests.get(url, headers=headers, params=params, timeout=effective_timeout)
+                response = self.__send("GET", url, headers=headers, params=params, timeout=effective_timeout)
                 response.raise_for_status()
                 return response
             except requests.RequestException as e:
                 if attempt < retries - 1:
-                    time.sleep(backoff_factor * (2 ** attempt))
+                    time.sleep(self.__retry_delay(e, attempt, backoff_factor))
                 else:
                     raise e
     
@@ -158,12 +242,12 @@ class HTTPHelper:
         effective_timeout = timeout if timeout is not None else self.timeout
         for attempt in range(retries):
             try:
-                response = requests.post(url, data=data, json=json, headers=headers, timeout=effective_timeout)
+                response = self.__send("POST", url, data=data, json=json, headers=headers, timeout=effective_timeout)
                 response.raise_for_status()
                 return response
             except requests.RequestException as e:
                 if attempt < retries - 1:
-                    time.sleep(backoff_factor * (2 ** attempt))
+                    time.sleep(self.__retry_delay(e, attempt, backoff_factor))
                 else:
                     raise e
     
@@ -179,12 +263,12 @@ class HTTPHelper:
         effective_timeout = timeout if timeout is not None else self.timeout
         for attempt in range(retries):
             try:
-                response = requests.put(url, data=data, json=json, headers=headers, timeout=effective_timeout)
+                response = self.__send("PUT", url, data=data, json=json, headers=headers, timeout=effective_timeout)
                 response.raise_for_status()
                 return response
             except requests.RequestException as e:
                 if attempt < retries - 1:
-                    time.sleep(backoff_factor * (2 ** attempt))
+                    time.sleep(self.__retry_delay(e, attempt, backoff_factor))
                 else:
                     raise e
                 
@@ -198,12 +282,12 @@ class HTTPHelper:
         effective_timeout = timeout if timeout is not None else self.timeout
         for attempt in range(retries):
             try:
-                response = requests.delete(url, headers=headers, timeout=effective_timeout)
+                response = self.__send("DELETE", url, headers=headers, timeout=effective_timeout)
                 response.raise_for_status()
                 return response
             except requests.RequestException as e:
                 if attempt < retries - 1:
-                    time.sleep(backoff_factor * (2 ** attempt))
+                    time.sleep(self.__retry_delay(e, attempt, backoff_factor))
                 else:
                     raise e
                 
@@ -219,12 +303,12 @@ class HTTPHelper:
         effective_timeout = timeout if timeout is not None else self.timeout
         for attempt in range(retries):
             try:
-                response = requests.patch(url, data=data, json=json, headers=headers, timeout=effective_timeout)
+                response = self.__send("PATCH", url, data=data, json=json, headers=headers, timeout=effective_timeout)
                 response.raise_for_status()
                 return response
             except requests.RequestException as e:
                 if attempt < retries - 1:
-                    time.sleep(backoff_factor * (2 ** attempt))
+                    time.sleep(self.__retry_delay(e, attempt, backoff_factor))
                 else:
                     raise e
     
@@ -266,7 +350,7 @@ class HTTPHelper:
         effective_timeout = timeout if timeout is not None else self.timeout
 
         try:
-            response = requests.get(url, headers=headers, timeout=effective_timeout)
+            response = self.__send("GET", url, headers=headers, timeout=effective_timeout)
             response.raise_for_status()
             return True
         except requests.RequestException:
@@ -0,0 +1,135 @@
+import time
+import asyncio
+import hashlib
+import threading
+import urllib.parse
+from email.utils import parsedate_to_datetime
+from datetime import datetime
+from .config_helper import CONFIG
+from typing import Optional, Dict
+
+# Process-wide limiters keyed by (host, credential hash) so every connector, thread and
+# async task talking to the same API with the same credentials draws from one budget
+_LIMITERS = {}
+_LOCK = threading.Lock()
+
+# Share of the configured rate won back by each successful response after a 429
+RECOVERY_STEP = 0.1
+
+
+def get_rate_limiter(url: str, headers: Optional[Dict[str, str]] = None) -> "RateLimiter":
+    """Returns the shared limiter for the host and Authorization credential of a request."""
+    host = urllib.parse.urlsplit(url).netloc
+    auth = (headers or {}).get("Authorization", "")
+    key = (host, hashlib.sha256(auth.encode()).hexdigest()[:16])
+    with _LOCK:
+        if key not in _LIMITERS:
+            _LIMITERS[key] = RateLimiter(CONFIG['http']['HTTP_RATE_PER_SECOND'],
+                                         CONFIG['http']['HTTP_RATE_BURST'],
+                                         CONFIG['http']['HTTP_RATE_WINDOW'])
+        return _LIMITERS[key]
+
+
+def reset_rate_limiters():
+    with _LOCK:
+        _LIMITERS.clear()
+
+
+def parse_wait_seconds(value: Optional[str]) -> Optional[float]:
+    # Retry-After / X-RateLimit-Reset come as delta seconds, epoch seconds, an HTTP date
+    # (Retry-After) or an ISO timestamp (Jira). Normalise all of them to seconds from now.
+    if value is None:
+        return None
+    try:
+        number = float(value)
+        return max(0.0, number - time.time()) if number > 1e9 else max(0.0, number)
+    except ValueError:
+        pass
+    for parse in (parsedate_to_datetime, datetime.fromisoformat):
+        try:
+            return max(0.0, parse(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class RateLimiter:
+    """Token bucket that paces requests ahead of time and learns its budget from responses.
+
+    Tokens are in the unit the server reports (Miro counts credits, Jira counts requests).
+    `cost` is how many tokens one request is observed to consume and starts at 1.
+    A 429 halves the rate; each later success adds RECOVERY_STEP of the configured rate
+    back until it is reached again.
+    """
+    def __init__(self, rate: float, burst: float, window: float):
+        self.rate = float(rate)         # tokens refilled per second
+        self.configured_rate = self.rate    # rate to recover to after backing off
+        self.capacity = float(burst)
+        self.window = float(window)     # seconds a server-reported X-RateLimit-Limit covers
+        self.tokens = float(burst)
+        self.cost = 1.0
+        self.last_remaining = None
+        self.blocked_until = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Takes one request's worth of tokens and returns how long the caller must wait."""
+        with self.lock:
+            now = time.monotonic()
+            self.__refill(now)
+            # Tokens may go negative: later callers queue up behind earlier reservations
+            self.tokens -= self.cost
+            return max(0.0, -self.tokens / self.rate, self.blocked_until - now)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def update(self, status_code: int, headers: Dict[str, str]):
+        """Feeds rate-limit headers and throttling responses back into the bucket."""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        with self.lock:
+            now = time.monotonic()
+            self.__refill(now)
+            retry_after = parse_wait_seconds(headers.get("retry-after"))
+            reset = parse_wait_seconds(headers.get("x-ratelimit-reset"))
+
+            limit = headers.get("x-ratelimit-limit")
+            if limit:
+                self.capacity = float(limit)
+                self.rate = self.configured_rate = self.capacity / self.window
+
+            remaining = headers.get("x-ratelimit-remaining")
+            if remaining is not None:
+                remaining = float(remaining)
+                if self.last_remaining is not None and remaining < self.last_remaining:
+                    # Smooth the observed per-request consumption (Miro charges by endpoint level)
+                    self.cost = 0.8 * self.cost + 0.2 * (self.last_remaining - remaining)
+                self.last_remaining = remaining
+                self.tokens = min(self.tokens, remaining)
+                if remaining < self.cost and reset is not None:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+
+            if status_code == 429:
+                # Back off multiplicatively until the server's headers tell us the real budget
+                self.rate = max(self.rate / 2, 0.1)
+                self.tokens = min(self.tokens, 0.0)
+                pause = retry_after if retry_after is not None else reset
+                if pause is not None:
+                    self.blocked_until = max(self.blocked_until, now + pause)
+            else:
+                if retry_after is not None:
+                    self.blocked_until = max(self.blocked_until, now + retry_after)
+                if self.rate < self.configured_rate:
+                    self.rate = min(self.configured_rate, self.rate + RECOVERY_STEP * self.configured_rate)
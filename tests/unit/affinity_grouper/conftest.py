@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import patch
+
+
+AI_GROUPING_CONFIG = {
+    "ai_grouping": {
+        "AI_MODEL_NAME": "all-MiniLM-L6-v2",
+        "AI_MODEL_WARM_UP": False,
+        "AI_TORCH_THREADS": 0,
+        "AI_TORCH_INTEROP_THREADS": 0,
+        "AI_CLUSTERS": 2,
+        "AI_DISTANCE_THRESHOLD": 0.62,
+        "AI_AGGLOMERATIVE_TYPE": "distance",
+        "AI_LINKAGE_TYPE": "average",
+        "AI_METRIC_TYPE": "cosine",
+        "AI_CLUSTERING_BACKEND": "auto",
+        "AI_EXACT_MAX_NOTES": 5000,
+        "AI_KNN_MAX_NOTES": 50000,
+        "AI_KNN_NEIGHBORS": 5,
+        "AI_PARTITION_SIZE": 20,
+        "AI_DENDROGRAM_CACHE_TOGGLE": False,
+        "AI_DENDROGRAM_FOLDER": "cache/dendrograms",
+        "AI_DENDROGRAM_CACHE_SIZE": 200,
+        "AI_STORY_MAP_THRESHOLDS": [0.85, 0.62],
+        "AI_AUTO_MIN_CLUSTERS": 2,
+        "AI_AUTO_MAX_CLUSTERS": 10,
+        "AI_AUTO_SAMPLE_SIZE": 2000,
+        "AI_LABEL_ENGINE": "llm",
+        "AI_LOCAL_KEYPHRASES": 2,
+        "AI_LOCAL_LABEL_WORDS": 7,
+        "AI_LABEL_MODEL": "gpt-3.5-turbo",
+        "AI_LABEL_BASE_URL": "",
+        "AI_LABEL_CONCURRENCY": 4,
+        "AI_LABEL_TIMEOUT": 5,
+        "AI_LABEL_RETRIES": 2,
+        "AI_LABEL_MODE": "single",
+        "AI_LABEL_BATCH_TOKENS": 3000,
+        "AI_LABEL_BATCH_MAX_CLUSTERS": 40,
+        "AI_LABEL_DIGEST_TOKENS": 600,
+        "AI_LABEL_DIGEST_DIVERSITY": 0.3,
+        "AI_LABEL_CACHE_TOGGLE": False,
+        "AI_LABEL_CACHE_PATH": "cache/labels.json",
+        "AI_LABEL_CACHE_TTL": 3600,
+        "AI_LABEL_CACHE_SIZE": 100,
+        "AI_LABEL_CACHE_SIMILARITY": 0.8,
+        "AI_EMBEDDING_CACHE_TOGGLE": False,
+        "AI_EMBEDDING_CACHE_FOLDER": "cache/embeddings",
+        "AI_EMBEDDING_CACHE_SIZE": 1000,
+        "AI_EMBEDDING_WORKERS": 1,
+        "AI_EMBEDDING_BATCH_SIZE": 64,
+        "AI_EMBEDDING_PARALLEL_MIN": 5000,
+    },
+    "credentials": {"OPENAI_API_KEY": "key"},
+}
+
+
+def completion(content):
+    """Body of an OpenAI chat completion answering with content, for fake completion servers."""
+    return {"id": "cmpl", "object": "chat.completion", "created": 0, "model": "gpt-3.5-turbo",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}]}
+
+
+@pytest.fixture
+def ai_config():
+    """Patch the shared CONFIG with the [ai_grouping] section used by AffinityGrouper."""
+    with patch.dict("src.util.config_helper.CONFIG", AI_GROUPING_CONFIG):
+        yield AI_GROUPING_CONFIG
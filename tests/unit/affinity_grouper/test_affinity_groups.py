@@ -0,0 +1,40 @@
+"""Run getAffinityGroups end to end with a fake model and a fake completion server."""
+
+import json
+import numpy as np
+from unittest.mock import patch
+from src.affinity_grouper.affinity_grouper import AffinityGrouper
+from tests.unit.affinity_grouper.conftest import completion
+
+
+TOPICS = {"login": [1.0, 0.0, 0.0], "billing": [0.0, 1.0, 0.0], "search": [0.0, 0.0, 1.0]}
+
+
+class TopicModel:
+    """Embeds a note as the unit vector of the topic word it mentions."""
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        return np.array([next(vector for topic, vector in TOPICS.items() if topic in text) for text in texts])
+
+
+def test_affinity_groups(ai_config, stub_server):
+    """Test notes are grouped by topic and each group is keyed by its LLM label."""
+    def chat(req):
+        prompt = json.loads(req.body)["messages"][-1]["content"]
+        topic = next(topic for topic in TOPICS if topic in prompt)
+        return 200, {}, completion(f"Handle {topic}")
+
+    stub_server.routes["/chat/completions"] = chat
+    notes = ["login with sso", "pay billing invoice", "search filters", "reset login password", "billing history"]
+
+    with patch.dict(ai_config["ai_grouping"], {"AI_LABEL_BASE_URL": stub_server.url}), \
+         patch("src.affinity_grouper.embedding_engine.model_registry.get_model", return_value=TopicModel()):
+        groups = AffinityGrouper().getAffinityGroups(notes)
+
+    assert groups == {
+        "Handle login": ["login with sso", "reset login password"],
+        "Handle billing": ["pay billing invoice", "billing history"],
+        "Handle search": ["search filters"],
+    }
@@ -0,0 +1,48 @@
+"""Verify batched labeling packs clusters into JSON requests and falls back per cluster."""
+
+import re
+import json
+import openai as ai
+import pytest
+from unittest.mock import patch
+from src.affinity_grouper.cluster_labeler import ClusterLabeler
+from tests.unit.affinity_grouper.conftest import completion
+
+
+def test_batch_labels_with_fallback(ai_config, stub_server):
+    """Test clusters are chunked into JSON requests and a skipped cluster is relabeled alone."""
+    prompts = []
+
+    def chat(req):
+        prompt = json.loads(req.body)["messages"][-1]["content"]
+        prompts.append(prompt)
+        if prompt.startswith("Briefly summarize"):
+            return 200, {}, completion("Fallback label")
+        ids = [int(group_id) for group_id in re.findall(r"^Group (\d+):", prompt, re.MULTILINE)]
+        labels = [{"id": group_id, "label": f"Activity {group_id}"} for group_id in ids if group_id != 5]
+        return 200, {}, completion(json.dumps({"labels": labels}))
+
+    stub_server.routes["/chat/completions"] = chat
+    clusters_texts = [[f"note {n}a", f"note {n}b"] for n in range(10)]
+
+    with patch.dict(ai_config["ai_grouping"], {"AI_LABEL_MODE": "batch", "AI_LABEL_BATCH_MAX_CLUSTERS": 4}):
+        labels = ClusterLabeler(base_url=stub_server.url).labelClusters(clusters_texts)
+
+    assert labels == [f"Activity {n}" if n != 5 else "Fallback label" for n in range(10)]
+    assert len(prompts) == 3 + 1
+
+
+def test_batch_api_error_is_not_fanned_out(ai_config, stub_server):
+    """Test a refused batch request raises instead of being retried one request per cluster."""
+    prompts = []
+
+    def chat(req):
+        prompts.append(json.loads(req.body)["messages"][-1]["content"])
+        return 401, {}, {"error": {"message": "invalid api key"}}
+
+    stub_server.routes["/chat/completions"] = chat
+    clusters_texts = [[f"note {n}a", f"note {n}b"] for n in range(4)]
+
+    with patch.dict(ai_config["ai_grouping"], {"AI_LABEL_MODE": "batch"}), pytest.raises(ai.APIError):
+        ClusterLabeler(base_url=stub_server.url).labelClusters(clusters_texts)
+    assert len(prompts) == 1
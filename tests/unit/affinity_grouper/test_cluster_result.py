@@ -0,0 +1,25 @@
+"""Verify ClusterResult groups notes in one sort and reads like the old {summary: notes} dict."""
+
+import numpy as np
+from src.affinity_grouper.cluster_result import ClusterResult
+
+
+def test_cluster_result_arrays_and_mapping():
+    """Test offsets, centroids and distances, and that duplicate summaries keep both clusters."""
+    notes = ["a1", "b1", "a2", "c1", "b2"]
+    result = ClusterResult(notes, np.array([4, 9, 4, 2, 9]), summaries=["C", "A", "A"])
+
+    assert result.labels.tolist() == [1, 2, 1, 0, 2]
+    assert result.offsets.tolist() == [0, 1, 3, 5]
+    assert result.order.tolist() == [3, 0, 2, 1, 4]
+    assert result.clustersTexts() == [["c1"], ["a1", "a2"], ["b1", "b2"]]
+
+    result.setEmbeddings(np.array([[1.0, 0.0], [0.0, 2.0], [0.0, 1.0], [3.0, 4.0], [0.0, 1.0]]), metric="euclidean")
+    assert np.allclose(result.centroids, [[3.0, 4.0], [0.5, 0.5], [0.0, 1.5]])
+    assert np.allclose(result.distances, [np.sqrt(0.5), 0.5, np.sqrt(0.5), 0.0, 0.5])
+
+    assert result.items() == [("C", ["c1"]), ("A", ["a1", "a2"]), ("A", ["b1", "b2"])]
+    assert result.values() == [["c1"], ["a1", "a2"], ["b1", "b2"]]
+    assert result["A"] == ["a1", "a2"]
+    assert len(result) == 3
+    assert ClusterResult(["x", "y"], [0, 0], summaries=["X"]) == {"X": ["x", "y"]}
@@ -0,0 +1,41 @@
+"""Check each clustering backend separates well-formed groups."""
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.affinity_grouper.clustering_backend import ClusteringBackend
+
+
+def blobs():
+    rng = np.random.default_rng(0)
+    centers = np.eye(3)
+    return np.vstack([center + rng.normal(scale=0.02, size=(30, 3)) for center in centers])
+
+
+@pytest.mark.parametrize("backend", ["exact", "knn", "two_stage"])
+def test_backend_recovers_groups(ai_config, backend):
+    """Test every backend keeps each blob in a single cluster and apart from the others."""
+    labels = ClusteringBackend(backend).fitPredict(blobs(), distance_threshold=0.5)
+    groups = [set(labels[i * 30:(i + 1) * 30]) for i in range(3)]
+    assert all(len(group) == 1 for group in groups)
+    assert len(set.union(*groups)) == 3
+
+
+def test_auto_selects_by_note_count(ai_config):
+    """Test auto mode picks the backend from the note count."""
+    backend = ClusteringBackend("auto")
+    assert backend.selectBackend(100) == "exact"
+    assert backend.selectBackend(20000) == "knn"
+    assert backend.selectBackend(100000) == "two_stage"
+
+
+def test_tree_settings_follow_the_backend(ai_config):
+    """Test a saved tree is keyed by the neighbour and partition settings its backend was fit with."""
+    def settings(backend, **overrides):
+        with patch.dict(ai_config["ai_grouping"], overrides):
+            return ClusteringBackend(backend).treeSettings(100)
+
+    assert settings("exact") == settings("exact", AI_KNN_NEIGHBORS=9, AI_PARTITION_SIZE=7)
+    assert settings("knn") != settings("knn", AI_KNN_NEIGHBORS=9)
+    assert settings("two_stage") != settings("two_stage", AI_PARTITION_SIZE=7)
+    assert settings("two_stage") != settings("two_stage", AI_EXACT_MAX_NOTES=7)
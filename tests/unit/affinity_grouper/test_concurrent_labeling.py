@@ -0,0 +1,36 @@
+"""Exercise concurrent cluster labeling against a local fake completion server."""
+
+import json
+import threading
+import time
+from src.affinity_grouper.cluster_labeler import ClusterLabeler
+from tests.unit.affinity_grouper.conftest import completion
+
+
+def test_concurrent_labels_keep_order(ai_config, stub_server):
+    """Test requests overlap up to the limit, a transient 503 is retried and labels keep cluster order."""
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0, "failed_once": False}
+
+    def chat(req):
+        prompt = json.loads(req.body)["messages"][1]["content"]
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            fail = "cluster 3" in prompt and not state["failed_once"]
+            state["failed_once"] = state["failed_once"] or fail
+        time.sleep(0.1)
+        with lock:
+            state["in_flight"] -= 1
+        if fail:
+            return 503, {"Retry-After": "0"}, {"error": {"message": "overloaded"}}
+        return 200, {}, completion(f" Label for {prompt.split(': ')[1]} ")
+
+    stub_server.routes["/chat/completions"] = chat
+    clusters_texts = [[f"cluster {n}"] for n in range(10)]
+
+    labels = ClusterLabeler(base_url=stub_server.url).labelClusters(clusters_texts)
+
+    assert labels == [f"Label for cluster {n}" for n in range(10)]
+    assert 1 < state["peak"] <= 4
+    assert state["failed_once"]
@@ -0,0 +1,42 @@
+"""Verify automatic cut selection finds the natural cluster count from one tree."""
+
+import numpy as np
+from unittest.mock import patch
+from sklearn.metrics import silhouette_score
+from src.affinity_grouper.clustering_backend import ClusteringBackend
+from src.affinity_grouper.cut_selector import CutSelector
+from src.affinity_grouper.affinity_grouper import AffinityGrouper
+
+
+def test_auto_cut_picks_best_silhouette(ai_config):
+    """Test the sweep matches sklearn's silhouette and picks the planted cluster count."""
+    rng = np.random.default_rng(0)
+    vectors = np.vstack([center + rng.normal(scale=0.05, size=(12, 4)) for center in np.eye(4)])
+    dendrogram = ClusteringBackend("exact").fitDendrogram(vectors, [str(i) for i in range(len(vectors))])
+
+    with patch.object(dendrogram, "cut", wraps=dendrogram.cut) as cut:
+        labels, n_clusters, scores = CutSelector().selectCut(dendrogram, vectors)
+
+    assert n_clusters == 4
+    assert len(set(labels)) == 4
+    assert cut.call_count == len(scores) == 9
+    expected = silhouette_score(vectors, dendrogram.cut(n_clusters=3), metric="cosine")
+    assert np.isclose(scores[3], expected)
+
+
+def test_auto_cut_over_two_stage_tree(ai_config):
+    """Test auto mode on a board clustered two_stage cuts the centroid tree into the planted groups."""
+    rng = np.random.default_rng(0)
+    vectors = np.vstack([center + rng.normal(scale=0.05, size=(20, 3)) for center in np.eye(3)])
+    notes = [f"note {i}" for i in range(len(vectors))]
+    settings = {"AI_AGGLOMERATIVE_TYPE": "auto", "AI_CLUSTERING_BACKEND": "two_stage", "AI_EXACT_MAX_NOTES": 12}
+
+    with patch.dict(ai_config["ai_grouping"], settings):
+        dendrogram = ClusteringBackend().fitDendrogram(vectors, notes)
+        result = AffinityGrouper().clusterNotes(notes, embeddings=vectors)
+
+    assert len(dendrogram.linkage_matrix) == len(notes) - 1
+    assert len(set(dendrogram.cut(n_clusters=12))) == 12
+    assert result.nClusters() == 3
+    assert sorted(result.sizes().tolist()) == [20, 20, 20]
+    assert all(len(set(result.labels[i * 20:(i + 1) * 20])) == 1 for i in range(3))
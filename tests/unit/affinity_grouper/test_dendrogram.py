@@ -0,0 +1,55 @@
+"""Verify a saved merge tree re-cuts like a fresh fit and nests multi-level maps."""
+
+import os
+import numpy as np
+from src.affinity_grouper.clustering_backend import ClusteringBackend
+from src.affinity_grouper.dendrogram import Dendrogram
+
+
+def embeddings():
+    rng = np.random.default_rng(0)
+    # Two activities, each made of two tasks
+    centers = [[1, 0.3, 0, 0], [1, -0.3, 0, 0], [0, 0, 1, 0.3], [0, 0, 1, -0.3]]
+    return np.vstack([np.array(center) + rng.normal(scale=0.01, size=(5, 4)) for center in centers])
+
+
+def test_recut_matches_fit(ai_config, tmp_path):
+    """Test cuts of a loaded tree agree with fitting at that threshold or cluster count."""
+    vectors = embeddings()
+    note_ids = [str(i) for i in range(len(vectors))]
+    backend = ClusteringBackend("exact")
+    path = str(tmp_path / "tree.npz")
+    backend.fitDendrogram(vectors, note_ids).save(path)
+    dendrogram = Dendrogram.load(path)
+
+    for threshold in (0.01, 0.1, 0.6):
+        fitted = backend.fitPredict(vectors, distance_threshold=threshold)
+        cut = dendrogram.cut(distance_threshold=threshold)
+        assert len(set(zip(fitted, cut))) == len(set(fitted)) == len(set(cut))
+    assert len(set(dendrogram.cut(n_clusters=4))) == 4
+
+
+def test_multi_level_hierarchy(ai_config):
+    """Test coarse and fine cuts of one tree nest activities over tasks over notes."""
+    vectors = embeddings()
+    notes = [f"note {i}" for i in range(len(vectors))]
+    dendrogram = ClusteringBackend("exact").fitDendrogram(vectors, notes)
+
+    tree = dendrogram.hierarchy([0.02, 0.6], notes)
+    assert len(tree) == 2
+    assert all(len(tasks) == 2 for tasks in tree.values())
+    assert sorted(len(stories) for tasks in tree.values() for stories in tasks.values()) == [5, 5, 5, 5]
+
+
+def test_prune_keeps_recently_used_trees(ai_config, tmp_path):
+    """Test pruning deletes the least recently used trees and loading counts as a use."""
+    dendrogram = ClusteringBackend("exact").fitDendrogram(embeddings(), [str(i) for i in range(20)])
+    paths = [str(tmp_path / f"tree{i}.npz") for i in range(4)]
+    for age, path in enumerate(paths):
+        dendrogram.save(path)
+        os.utime(path, ns=(age * 10**9, age * 10**9))
+    Dendrogram.load(paths[0])
+
+    Dendrogram.prune(str(tmp_path), 2)
+    assert sorted(os.listdir(tmp_path)) == ["tree0.npz", "tree3.npz"]
+    assert Dendrogram.load(paths[1]) is None
@@ -0,0 +1,58 @@
+"""Verify the on-disk embedding cache serves hits and evicts least recently used entries."""
+
+import os
+import json
+import numpy as np
+from src.affinity_grouper.embedding_cache import EmbeddingCache
+
+
+def test_cache_hits_and_misses(tmp_path):
+    """Test stored embeddings come back for normalized text and only new text is missing."""
+    cache = EmbeddingCache("all-MiniLM-L6-v2", cache_folder=str(tmp_path), max_entries=10)
+    assert cache.lookup(["a", "b"]) == (None, [0, 1])
+    cache.store(["a", "b"], np.array([[1, 0], [0, 1]]))
+
+    reader = EmbeddingCache("all-MiniLM-L6-v2", cache_folder=str(tmp_path), max_entries=10)
+    embeddings, missing = reader.lookup(["  b ", "c", "a"])
+    assert missing == [1]
+    assert embeddings[0].tolist() == [0, 1]
+    assert embeddings[2].tolist() == [1, 0]
+    assert EmbeddingCache("other-model", cache_folder=str(tmp_path), max_entries=10).lookup(["a"])[1] == [0]
+
+
+def test_cache_lru_eviction(tmp_path):
+    """Test a full cache evicts the entry used longest ago."""
+    cache = EmbeddingCache("all-MiniLM-L6-v2", cache_folder=str(tmp_path), max_entries=2)
+    cache.store(["old", "recent"], np.ones((2, 3)))
+    cache.lookup(["old"])
+    cache.store([], np.empty((0, 3)))
+    cache.store(["new"], np.full((1, 3), 2.0))
+
+    embeddings, missing = cache.lookup(["old", "recent", "new"])
+    assert missing == [1]
+    assert embeddings[2].tolist() == [2.0, 2.0, 2.0]
+
+
+def test_cache_size_change_and_log(tmp_path):
+    """Test stores append to the log, other instances catch up, and a resized cache stays readable."""
+    writer = EmbeddingCache("all-MiniLM-L6-v2", cache_folder=str(tmp_path), max_entries=4)
+    reader = EmbeddingCache("all-MiniLM-L6-v2", cache_folder=str(tmp_path), max_entries=4)
+    writer.store(["a", "b"], np.array([[1, 0], [0, 1]]))
+    index_path = tmp_path / os.listdir(tmp_path)[0] / "index.json"
+    index = index_path.read_text()
+
+    writer.store(["c"], np.array([[1, 1]]))
+    assert index_path.read_text() == index
+    assert reader.lookup(["a", "c", "d"])[1] == [2]
+
+    grown = EmbeddingCache("all-MiniLM-L6-v2", cache_folder=str(tmp_path), max_entries=8)
+    grown.store(["d", "e", "f", "g", "h"], np.arange(10).reshape(5, 2))
+    assert grown.lookup(["a", "b", "c", "h"])[0][3].tolist() == [8, 9]
+    assert json.loads(index_path.read_text())["capacity"] == 8
+
+    shrunk = EmbeddingCache("all-MiniLM-L6-v2", cache_folder=str(tmp_path), max_entries=2)
+    shrunk.lookup(["a"])
+    shrunk.store(["i"], np.array([[5, 5]]))
+    embeddings, missing = reader.lookup(["a", "b", "i"])
+    assert missing == [1]
+    assert embeddings[0].tolist() == [1, 0] and embeddings[2].tolist() == [5, 5]
@@ -0,0 +1,54 @@
+"""Verify the embedding engine batches by length and fills rows in input order."""
+
+import numpy as np
+from unittest.mock import patch
+from src.affinity_grouper import embedding_engine
+from src.affinity_grouper.embedding_engine import EmbeddingEngine
+
+
+class FakeModel:
+    def __init__(self):
+        self.batches = []
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        self.batches.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts])
+
+
+def test_length_bucketed_batches(ai_config):
+    """Test notes of similar length share a batch and results land in their original rows."""
+    model = FakeModel()
+    notes = ["a" * 9, "a", "a" * 5, "a" * 2, "a" * 8]
+    with patch("src.affinity_grouper.embedding_engine.model_registry.get_model", return_value=model):
+        embeddings = EmbeddingEngine(batch_size=2).encode(notes)
+
+    assert embeddings.dtype == np.float32
+    assert embeddings[:, 0].tolist() == [9, 1, 5, 2, 8]
+    assert [[len(text) for text in batch] for batch in model.batches] == [[1, 2], [5, 8], [9]]
+
+
+def test_parallel_workers_match_in_process(ai_config, tmp_path):
+    """Test spawned workers load the model themselves, are reused across calls and fill the same rows as in-process encoding."""
+    from sentence_transformers import SentenceTransformer, models
+
+    model_path = str(tmp_path / "bow")
+    SentenceTransformer(modules=[models.BoW(vocab=["login", "billing", "search", "password"])]).save(model_path)
+    notes = ["login password", "billing", "search billing", "login", "password reset", "search"] * 3
+
+    try:
+        parallel = EmbeddingEngine(model_name=model_path, workers=2, batch_size=2, parallel_min=1).encode(notes)
+        pool = embedding_engine._POOLS[(model_path, 2)]
+        again = EmbeddingEngine(model_name=model_path, workers=2, batch_size=2, parallel_min=1).encode(notes[:4])
+        assert embedding_engine._POOLS[(model_path, 2)] is pool
+    finally:
+        embedding_engine.shutdown_pools()
+    serial = EmbeddingEngine(model_name=model_path, workers=1, batch_size=2).encode(notes)
+
+    assert parallel.shape == (18, 4)
+    assert np.array_equal(parallel, serial)
+    assert np.array_equal(again, serial[:4])
+    assert parallel[0].tolist() == [1, 0, 0, 1]
+    assert embedding_engine._POOLS == {}
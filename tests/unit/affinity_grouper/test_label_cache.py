@@ -0,0 +1,81 @@
+"""Verify cached cluster labels are reused across runs instead of asking the model again."""
+
+import json
+import time
+import itertools
+import threading
+from unittest.mock import patch
+from src.affinity_grouper.label_cache import LabelCache
+from src.affinity_grouper.cluster_labeler import ClusterLabeler
+from tests.unit.affinity_grouper.conftest import completion
+
+
+def test_rerun_reuses_cached_labels(ai_config, stub_server, tmp_path):
+    """Test an unchanged rerun sends no requests and a cluster with one added note reuses its label."""
+    prompts = []
+
+    def chat(req):
+        prompts.append(json.loads(req.body)["messages"][-1]["content"])
+        return 200, {}, completion(f"Activity {len(prompts)}")
+
+    stub_server.routes["/chat/completions"] = chat
+    clusters_texts = [[f"note {n}{suffix}" for suffix in "abcdefgh"] for n in range(3)]
+    cache_config = {"AI_LABEL_CACHE_TOGGLE": True, "AI_LABEL_CACHE_PATH": str(tmp_path / "labels.json")}
+
+    with patch.dict(ai_config["ai_grouping"], cache_config):
+        first = ClusterLabeler(base_url=stub_server.url).labelClusters(clusters_texts)
+        assert len(prompts) == 3
+
+        second = ClusterLabeler(base_url=stub_server.url).labelClusters(clusters_texts)
+        assert second == first
+        assert len(prompts) == 3
+
+        grown = [clusters_texts[0] + ["note 0i"], clusters_texts[1], ["something new"]]
+        third = ClusterLabeler(base_url=stub_server.url).labelClusters(grown)
+        assert third[:2] == first[:2]
+        assert len(prompts) == 4
+
+
+def test_expiry_and_eviction(ai_config, tmp_path):
+    """Test labels past the TTL are dropped on load and the least recently used are evicted on save."""
+    cache_path = str(tmp_path / "labels.json")
+    with patch.dict(ai_config["ai_grouping"], {"AI_LABEL_CACHE_SIZE": 2, "AI_LABEL_CACHE_SIMILARITY": 1}):
+        cache = LabelCache("model", "template", cache_path)
+        with patch("src.affinity_grouper.label_cache.time.time", side_effect=itertools.count(int(time.time()))):
+            for n in range(3):
+                cache.put([f"note {n}"], f"label {n}")
+            cache.get(["note 0"])
+        cache.save()
+
+        cache = LabelCache("model", "template", cache_path)
+        assert cache.get(["note 0"]) == "label 0"
+        assert cache.get(["note 1"]) is None
+        assert cache.get(["note 2"]) == "label 2"
+        assert LabelCache("other model", "template", cache_path).get(["note 0"]) is None
+
+        with patch.dict(ai_config["ai_grouping"], {"AI_LABEL_CACHE_TTL": 0}):
+            assert LabelCache("model", "template", cache_path).get(["note 0"]) is None
+
+
+def test_concurrent_saves_merge(ai_config, tmp_path):
+    """Test caches saving from several threads keep every label and a corrupt file reads as empty."""
+    cache_path = tmp_path / "labels.json"
+    cache_path.write_text("{not json")
+    with patch.dict(ai_config["ai_grouping"], {"AI_LABEL_CACHE_SIMILARITY": 1}):
+        assert LabelCache("model", "template", str(cache_path)).entries == {}
+
+        def label(worker):
+            for n in range(20):
+                cache = LabelCache("model", "template", str(cache_path))
+                cache.put([f"note {worker}-{n}"], f"label {worker}-{n}")
+                cache.save()
+
+        threads = [threading.Thread(target=label, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        cache = LabelCache("model", "template", str(cache_path))
+        assert all(cache.get([f"note {worker}-{n}"]) == f"label {worker}-{n}" for worker in range(4) for n in range(20))
+    assert not list(tmp_path.glob("*.tmp"))
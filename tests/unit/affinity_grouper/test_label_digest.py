@@ -0,0 +1,39 @@
+"""Verify label prompts are built from a token-budgeted digest of each cluster."""
+
+import json
+import numpy as np
+from unittest.mock import patch
+from src.affinity_grouper.cluster_digest import ClusterDigester
+from src.affinity_grouper.affinity_grouper import AffinityGrouper
+from tests.unit.affinity_grouper.conftest import completion
+from tests.unit.affinity_grouper.test_affinity_groups import TopicModel
+
+
+def test_digest_prefers_central_and_diverse_notes(ai_config):
+    """Test the digest stays in budget, keeps the central note and trades a duplicate for diversity."""
+    texts = ["central note here", "central note", "another angle on it", "far outlier text"]
+    embeddings = np.array([[1.0, 0.2, 0.0], [1.0, 0.2, 0.0], [0.8, 0.0, 0.5], [0.0, 1.0, 0.0]])
+
+    assert ClusterDigester(token_budget=10, diversity=0.5).digest(texts, embeddings) == ["central note here", "far outlier text"]
+    assert ClusterDigester(token_budget=10, diversity=0).digest(texts, embeddings) == ["central note here", "central note"]
+    assert ClusterDigester(token_budget=100).digest(texts, embeddings) == texts
+
+
+def test_large_cluster_prompt_is_bounded(ai_config, stub_server):
+    """Test a cluster of thousands of notes is labeled from a prompt within the token budget."""
+    prompts = []
+
+    def chat(req):
+        prompts.append(json.loads(req.body)["messages"][-1]["content"])
+        return 200, {}, completion("Handle login")
+
+    stub_server.routes["/chat/completions"] = chat
+    notes = [f"login issue number {n} reported by a user" for n in range(3000)]
+
+    with patch.dict(ai_config["ai_grouping"], {"AI_LABEL_BASE_URL": stub_server.url, "AI_LABEL_DIGEST_TOKENS": 200}), \
+         patch("src.affinity_grouper.embedding_engine.model_registry.get_model", return_value=TopicModel()):
+        groups = AffinityGrouper().getAffinityGroups(notes)
+
+    assert groups == {"Handle login": notes}
+    assert len(prompts) == 1
+    assert len(prompts[0]) < 200 * 4 + 200
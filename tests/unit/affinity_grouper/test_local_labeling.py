@@ -0,0 +1,58 @@
+"""Verify the offline labeler names clusters from centroid notes and keyphrases."""
+
+import json
+import numpy as np
+from unittest.mock import patch
+from src.affinity_grouper.local_labeler import LocalLabeler
+from src.affinity_grouper.affinity_grouper import AffinityGrouper
+from tests.unit.affinity_grouper.test_affinity_groups import TopicModel
+from tests.unit.affinity_grouper.conftest import completion
+
+
+def test_centroid_notes_and_keyphrases(ai_config):
+    """Test the note nearest each centroid is picked and keyphrases are distinctive per cluster."""
+    embeddings = np.array([[1.0, 0.0], [0.9, 0.1], [0.8, 0.6], [0.0, 1.0], [0.1, 0.9]])
+    labels = np.array([3, 3, 3, 7, 7])
+    assert LocalLabeler.centroidNotes(embeddings, labels).tolist() == [1, 3]
+
+    notes = ["export report as csv", "export report to pdf", "schedule report export",
+             "invite team member", "remove team member"]
+    summaries = LocalLabeler(n_keyphrases=1).labelClusters(notes, embeddings, labels)
+    assert summaries == ["Export: export report to pdf", "Member: invite team member"]
+
+
+def test_offline_affinity_groups(ai_config):
+    """Test getAffinityGroups labels every group locally without contacting a completion server."""
+    notes = ["login with sso", "pay billing invoice", "search filters", "reset login password", "billing history"]
+
+    with patch.dict(ai_config["ai_grouping"], {"AI_LABEL_ENGINE": "local", "AI_LABEL_BASE_URL": "http://127.0.0.1:9"}), \
+         patch("src.affinity_grouper.embedding_engine.model_registry.get_model", return_value=TopicModel()):
+        groups = AffinityGrouper().getAffinityGroups(notes)
+
+    assert sorted(groups.values()) == [["login with sso", "reset login password"],
+                                       ["pay billing invoice", "billing history"],
+                                       ["search filters"]]
+    assert all(label.split(": ")[0] for label in groups)
+
+
+def test_hybrid_refines_local_labels(ai_config, stub_server):
+    """Test hybrid labeling sends each local label to the LLM as the draft to refine."""
+    prompts = []
+
+    def chat(req):
+        prompts.append(json.loads(req.body)["messages"][-1]["content"])
+        return 200, {}, completion(f"Refined {len(prompts)}")
+
+    stub_server.routes["/chat/completions"] = chat
+    notes = ["login with sso", "pay billing invoice", "search filters", "reset login password", "billing history"]
+
+    with patch.dict(ai_config["ai_grouping"], {"AI_LABEL_ENGINE": "hybrid", "AI_LABEL_BASE_URL": stub_server.url,
+                                               "AI_LABEL_CONCURRENCY": 1}), \
+         patch("src.affinity_grouper.embedding_engine.model_registry.get_model", return_value=TopicModel()):
+        grouper = AffinityGrouper()
+        result = grouper.clusterNotes(notes)
+        summaries = grouper.labelClusters(result)
+
+    assert sorted(summaries) == ["Refined 1", "Refined 2", "Refined 3"]
+    drafts = sorted(prompt.split("Draft label: ")[1].split("\n")[0] for prompt in prompts)
+    assert drafts == sorted(result.local_labels)
@@ -0,0 +1,23 @@
+"""Ensure each sentence-transformer model is loaded once per process."""
+
+import threading
+from unittest.mock import patch
+from src.affinity_grouper import model_registry
+
+
+def test_model_loaded_once_across_threads(ai_config):
+    """Test concurrent first use loads the model a single time and shares it."""
+    model_registry.clear()
+    with patch.object(model_registry, "SentenceTransformer", side_effect=lambda name: object()) as load:
+        models = []
+        threads = [threading.Thread(target=lambda: models.append(model_registry.get_model())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert load.call_count == 1
+        assert all(model is models[0] for model in models)
+        model_registry.warm_up()
+        assert load.call_count == 1
+    model_registry.clear()
@@ -0,0 +1,88 @@
+import json
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from src.util.rate_limiter import reset_rate_limiters
+
+
+HTTP_CONFIG = {
+    "http": {
+        "HTTP_RETRIES": 3,
+        "HTTP_BACKOFF_FACTOR": 0.5,
+        "HTTP_TIMEOUT": 10,
+        "HTTP_POOL_CONNECTIONS": 4,
+        "HTTP_POOL_MAXSIZE": 8,
+        "HTTP_POOL_BLOCK": False,
+        "HTTP_KEEP_ALIVE": True,
+        "HTTP_ASYNC_LIMIT": 20,
+        "HTTP_ASYNC_LIMIT_PER_HOST": 10,
+        "HTTP_RATE_LIMIT_TOGGLE": True,
+        "HTTP_RATE_PER_SECOND": 1000,
+        "HTTP_RATE_BURST": 1000,
+        "HTTP_RATE_WINDOW": 60,
+    }
+}
+
+
+@pytest.fixture
+def http_config():
+    """Patch the shared CONFIG with the [http] section used by HTTPHelper."""
+    with patch.dict("src.util.config_helper.CONFIG", HTTP_CONFIG):
+        yield HTTP_CONFIG
+    reset_rate_limiters()
+
+
+class StubServer:
+    """Local HTTP server answering from a {path: handler} table.
+
+    A handler receives the request handler instance and returns (status, headers, body).
+    Every request path is recorded in `requests` so tests can assert on call patterns.
+    """
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.body = self.rfile.read(length) if length else b""
+                stub.requests.append(self.path)
+                route = stub.routes.get(self.path.split("?")[0])
+                status, headers, body = route(self) if route else (404, {}, {})
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Provide a running local stub server."""
+    server = StubServer()
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,10 @@
+import pytest
+from src.util.http_helper import HTTPHelper
+
+
+@pytest.fixture
+def http(http_config):
+    """Provide an HTTPHelper built from the patched config."""
+    helper = HTTPHelper("test_http")
+    yield helper
+    helper.close()
@@ -0,0 +1,43 @@
+"""Verify the shared rate limiter paces requests and honors Retry-After."""
+
+import time
+from src.util.rate_limiter import RateLimiter, get_rate_limiter
+
+
+def test_learns_budget_from_headers():
+    """Test X-RateLimit-* headers replace the starting budget and block until reset."""
+    limiter = RateLimiter(rate=1000, burst=1000, window=60)
+    limiter.update(200, {"X-RateLimit-Limit": "600", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "2"})
+    assert limiter.rate == 10
+    assert 1.5 < limiter.reserve() <= 2
+
+
+def test_limiter_shared_per_host_and_credential(http_config):
+    """Test connectors with the same host and credential draw from one bucket."""
+    miro = get_rate_limiter("https://api.miro.com/v2/boards/a", {"Authorization": "Bearer x"})
+    assert get_rate_limiter("https://api.miro.com/v2/boards/b", {"Authorization": "Bearer x"}) is miro
+    assert get_rate_limiter("https://api.miro.com/v2/boards/a", {"Authorization": "Bearer y"}) is not miro
+
+
+def test_retry_after_against_stub_server(http, stub_server):
+    """Test a 429 with Retry-After is waited out before the retry succeeds."""
+    responses = iter([(429, {"Retry-After": "1"}, {}), (200, {}, {"ok": True})])
+    stub_server.routes["/items"] = lambda req: next(responses)
+
+    start = time.monotonic()
+    response = http.get_with_retry(http, f"{stub_server.url}/items", backoff_factor=0)
+    assert response.json() == {"ok": True}
+    assert time.monotonic() - start >= 1
+    assert len(stub_server.requests) == 2
+
+
+def test_rate_recovers_after_429():
+    """Test successes after a 429 raise the halved rate back to the configured one, not beyond."""
+    limiter = RateLimiter(rate=10, burst=10, window=60)
+    limiter.update(429, {})
+    assert limiter.rate == 5
+    limiter.update(200, {})
+    assert limiter.rate == 6
+    for _ in range(10):
+        limiter.update(200, {})
+    assert limiter.rate == 10
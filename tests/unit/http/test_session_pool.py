@@ -0,0 +1,21 @@
+"""Ensure every HTTPHelper owns one pooled, keep-alive session."""
+
+from unittest.mock import MagicMock
+
+
+def test_session_pool_config(http):
+    """Test the session adapters are sized from the [http] config."""
+    adapter = http.session.get_adapter("https://api.miro.com/v2/boards/")
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 8
+    assert http.session.headers["Connection"] == "keep-alive"
+
+
+def test_verbs_reuse_session(http):
+    """Test the verbs go through the owned session rather than module-level requests."""
+    http.session.request = MagicMock()
+    http.get(http, "https://example.test/items")
+    http.post(http, "https://example.test/issue", json={})
+    http.get(http, "https://example.test/items")
+    methods = [call.args[0] for call in http.session.request.call_args_list]
+    assert methods == ["GET", "POST", "GET"]
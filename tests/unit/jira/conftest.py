@@ -0,0 +1,40 @@
+import pytest
+from unittest.mock import patch
+from src.connectors.jira_connector import JiraConnector
+
+
+def jira_config(base_url, **overrides):
+    """Build the [credentials], [miro] and [jira] sections JiraConnector reads, pointed at base_url."""
+    jira = {
+        "JIRA_ON_TOGGLE": True,
+        "JIRA_BASE_URL": base_url,
+        "JIRA_PROJECT_KEY": "DEMO",
+        "JIRA_HTTP_CONTENT_TYPE": "application/json",
+        "JIRA_POST_MODE": "single",
+        "JIRA_BULK_LIMIT": 50,
+        "JIRA_WORKERS": 4,
+        "JIRA_SYNC_LABEL": "usm",
+        "JIRA_CLOSE_TRANSITION": "Done",
+        "JIRA_SEARCH_PAGE_SIZE": 2,
+        "JIRA_JOURNAL_TOGGLE": False,
+        "JIRA_JOURNAL_PATH": "cache/jira_journal.jsonl",
+        "JIRA_JOURNAL_FSYNC_EVERY": 50,
+    }
+    jira.update(overrides)
+    return {"credentials": {"JIRA_USER": "user", "JIRA_API_KEY": "key"}, "miro": {"MIRO_BOARD_ID": "board1"}, "jira": jira}
+
+
+@pytest.fixture
+def jira(http_config, stub_server):
+    """Provide a factory for JiraConnectors that talk to the local stub server."""
+    connectors = []
+
+    def make(board_id=None, **overrides):
+        with patch.dict("src.util.config_helper.CONFIG", jira_config(stub_server.url, **overrides)):
+            connector = JiraConnector(board_id=board_id)
+        connectors.append(connector)
+        return connector
+
+    yield make
+    for connector in connectors:
+        connector.close()
@@ -0,0 +1,31 @@
+"""Verify bulk issue creation chunks payloads and maps failures back to notes."""
+
+import json
+
+
+def test_bulk_post_chunks_and_errors(jira, stub_server):
+    """Test epics post before their stories, in chunks, with per-item errors traced to notes."""
+    batches = []
+
+    def bulk(req):
+        updates = json.loads(req.body)["issueUpdates"]
+        batches.append(updates)
+        issues, errors = [], []
+        for index, update in enumerate(updates):
+            if update["fields"]["summary"] == "bad note":
+                errors.append({"status": 400, "failedElementNumber": index,
+                               "elementErrors": {"errorMessages": [], "errors": {"summary": "invalid"}}})
+            else:
+                issues.append({"key": update["fields"]["summary"].upper()})
+        return 201, {}, {"issues": issues, "errors": errors}
+
+    stub_server.routes["/issue/bulk"] = bulk
+    connector = jira(JIRA_POST_MODE="bulk", JIRA_BULK_LIMIT=2)
+    groups = {"Plan sprint": ["a", "bad note", "c"], "Review work": ["d"], "Ship it": ["e"]}
+
+    created_epics = connector.postGroupsToJira(groups)
+
+    assert created_epics == ["PLAN SPRINT", "REVIEW WORK", "SHIP IT"]
+    assert all(len(batch) <= 2 for batch in batches)
+    assert batches[0][0]["fields"]["issuetype"]["name"] == "Epic"
+    assert connector.failed_items == [{"cluster": "Plan sprint", "note": "bad note", "error": "summary: invalid"}]
@@ -0,0 +1,36 @@
+"""Verify concurrent cluster fan-out keeps order and isolates failures."""
+
+import json
+import time
+import threading
+
+
+def test_concurrent_post_order_and_isolation(jira, stub_server):
+    """Test created epics keep cluster order, stories overlap and a failing cluster does not abort the run."""
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def issue(req):
+        fields = json.loads(req.body)["fields"]
+        if fields["summary"] == "Broken":
+            return 500, {}, {"errorMessages": ["boom"]}
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.05)
+        with lock:
+            state["in_flight"] -= 1
+        return 201, {}, {"key": fields["summary"].upper()}
+
+    stub_server.routes["/issue"] = issue
+    connector = jira(JIRA_POST_MODE="concurrent")
+    groups = {f"Epic {n}": [f"story {n}.{m}" for m in range(3)] for n in range(6)}
+    groups = {"Broken": ["orphan"], **groups}
+
+    created_epics = connector.postGroupsToJira(groups)
+
+    assert created_epics == [f"EPIC {n}" for n in range(6)]
+    assert {failed["note"] for failed in connector.failed_items} == {None, "orphan"}
+    # The broken epic is retried like HTTPHelper.post_with_retry before its cluster is given up
+    assert len(stub_server.requests) == 3 + 6 * 4
+    assert state["peak"] > 4
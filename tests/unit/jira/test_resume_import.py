@@ -0,0 +1,83 @@
+"""Verify an interrupted import resumes from its journal without re-creating issues."""
+
+import json
+import pytest
+import requests
+from src.connectors.jira_journal import JiraJournal
+
+
+@pytest.mark.parametrize("post_mode", ["single", "concurrent", "bulk"])
+def test_resume_skips_completed_writes(jira, stub_server, tmp_path, post_mode):
+    """Test a run that fails mid-import is finished by a resumed run that only posts the rest."""
+    created = []
+    outage = {"s3"}
+
+    def create(fields):
+        if fields["summary"] in outage:
+            return None
+        created.append(fields["summary"])
+        return {"key": f"KEY-{fields['summary']}"}
+
+    def issue(req):
+        issue_created = create(json.loads(req.body)["fields"])
+        return (201, {}, issue_created) if issue_created else (503, {}, {"errorMessages": ["unavailable"]})
+
+    def bulk(req):
+        results = [create(update["fields"]) for update in json.loads(req.body)["issueUpdates"]]
+        errors = [{"status": 503, "failedElementNumber": index, "elementErrors": {"errorMessages": ["unavailable"]}}
+                  for index, result in enumerate(results) if result is None]
+        return 201, {}, {"issues": [result for result in results if result], "errors": errors}
+
+    stub_server.routes["/issue"] = issue
+    stub_server.routes["/issue/bulk"] = bulk
+    groups = {"E1": ["s1", "s2"], "E2": ["s3", "s4"]}
+    journal_path = str(tmp_path / "journal.jsonl")
+
+    journal = JiraJournal(journal_path, fsync_every=2)
+    journal.start(groups)
+    try:
+        jira(JIRA_POST_MODE=post_mode).postGroupsToJira(groups, journal=journal)
+    except requests.HTTPError:
+        pass
+    journal.close()
+    first_run = list(created)
+
+    outage.clear()
+    created.clear()
+    journal = JiraJournal(journal_path, fsync_every=2)
+    resumed_groups = journal.resume()
+    epic_keys = jira(JIRA_POST_MODE=post_mode).postGroupsToJira(resumed_groups, journal=journal)
+    journal.close()
+
+    assert resumed_groups == list(groups.items())
+    assert epic_keys == ["KEY-E1", "KEY-E2"]
+    assert "s3" in created
+    assert sorted(first_run + created) == ["E1", "E2", "s1", "s2", "s3", "s4"]
+
+
+def test_resume_keeps_duplicate_summaries(jira, stub_server, tmp_path):
+    """Test clusters sharing a summary resume as separate groups mapped to their own journal ids."""
+    created = []
+
+    def issue(req):
+        created.append(json.loads(req.body)["fields"]["summary"])
+        return 201, {}, {"key": f"KEY-{len(created)}"}
+
+    stub_server.routes["/issue"] = issue
+    journal_path = str(tmp_path / "journal.jsonl")
+    journal = JiraJournal(journal_path, fsync_every=1)
+    journal.start([("Plan", ["a", "b"]), ("Plan", ["c"]), ("Ship", ["d"])])
+    journal.complete("0", "KEY-P0")
+    journal.complete("0/0", "KEY-a")
+    journal.complete("0/1", "KEY-b")
+    journal.complete("2", "KEY-S")
+    journal.close()
+
+    journal = JiraJournal(journal_path, fsync_every=1)
+    resumed_groups = journal.resume()
+    epic_keys = jira(JIRA_POST_MODE="single").postGroupsToJira(resumed_groups, journal=journal)
+    journal.close()
+
+    assert resumed_groups == [("Plan", ["a", "b"]), ("Plan", ["c"]), ("Ship", ["d"])]
+    assert epic_keys == ["KEY-P0", "KEY-1", "KEY-S"]
+    assert created == ["Plan", "c", "d"]
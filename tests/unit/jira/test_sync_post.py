@@ -0,0 +1,81 @@
+"""Verify sync mode converges Jira to the board with only the writes that changed."""
+
+import re
+import json
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeJira:
+    """In-memory project behind the stub server's /search, /issue and transition routes."""
+    def __init__(self, stub_server):
+        self.stub_server = stub_server
+        self.issues = {}
+        self.writes = []
+        stub_server.routes["/search"] = self.search
+        stub_server.routes["/issue"] = self.create
+
+    def search(self, req):
+        query = parse_qs(urlparse(req.path).query)
+        start_at, max_results = int(query["startAt"][0]), int(query["maxResults"][0])
+        label = re.search(r'labels = "([^"]+)"', query["jql"][0]).group(1)
+        open_issues = [{"key": key, "fields": fields} for key, fields in self.issues.items()
+                       if fields["status"] != "Done" and label in fields["labels"]]
+        return 200, {}, {"issues": open_issues[start_at:start_at + max_results], "total": len(open_issues)}
+
+    def create(self, req):
+        fields = json.loads(req.body)["fields"]
+        key = f"DEMO-{len(self.issues) + 1}"
+        self.issues[key] = {**fields, "status": "To Do"}
+        self.writes.append(("create", fields["summary"]))
+        self.stub_server.routes[f"/issue/{key}"] = lambda req: self.update(key, req)
+        self.stub_server.routes[f"/issue/{key}/transitions"] = lambda req: self.transition(key, req)
+        return 201, {}, {"key": key}
+
+    def update(self, key, req):
+        fields = json.loads(req.body)["fields"]
+        self.issues[key].update(fields)
+        self.writes.append(("update", key, sorted(fields)))
+        return 200, {}, {}
+
+    def transition(self, key, req):
+        if req.command == "GET":
+            return 200, {}, {"transitions": [{"id": "11", "name": "Start"}, {"id": "31", "name": "Done"}]}
+        self.issues[key]["status"] = "Done"
+        self.writes.append(("close", key))
+        return 200, {}, {}
+
+
+def test_sync_converges_with_minimal_writes(jira, stub_server):
+    """Test a rerun writes nothing and a changed board only writes the differences."""
+    fake = FakeJira(stub_server)
+    connector = jira(JIRA_POST_MODE="sync")
+
+    assert connector.postGroupsToJira({"Plan": ["a1", "a2"], "Build": ["b1"]}) == ["DEMO-1", "DEMO-4"]
+    assert len(fake.writes) == 5
+
+    fake.writes.clear()
+    assert connector.postGroupsToJira({"Plan": ["a1", "a2"], "Build": ["b1"]}) == ["DEMO-1", "DEMO-4"]
+    assert fake.writes == []
+
+    connector.postGroupsToJira({"Plan the sprint": ["a1", "b1"], "Build": ["c1"]})
+    assert sorted(fake.writes) == sorted([
+        ("update", "DEMO-1", ["labels", "summary"]),
+        ("update", "DEMO-5", ["parent"]),
+        ("create", "c1"),
+        ("close", "DEMO-3"),
+    ])
+    assert connector.failed_items == []
+    assert {change: len(keys) for change, keys in connector.sync_changes.items()} == {"created": 1, "updated": 1, "reparented": 1, "closed": 1}
+
+
+def test_sync_leaves_other_boards_alone(jira, stub_server):
+    """Test syncing one board never updates or closes issues another board imported into the project."""
+    fake = FakeJira(stub_server)
+    jira(JIRA_POST_MODE="sync", board_id="board-a").postGroupsToJira({"Plan": ["a1"]})
+    fake.writes.clear()
+
+    connector = jira(JIRA_POST_MODE="sync", board_id="board-b")
+    assert connector.postGroupsToJira({"Build": ["b1"]}) == ["DEMO-3"]
+    assert fake.writes == [("create", "Build"), ("create", "b1")]
+    assert all(fields["status"] == "To Do" for fields in fake.issues.values())
+    assert fake.issues["DEMO-1"]["labels"][:2] == ["usm", "usm-board-board-a"]
@@ -1,5 +1,6 @@
 import pytest
 import requests
+from unittest.mock import patch
 from src.connectors.miro_connector import MiroConnector
 
 
@@ -27,3 +28,35 @@ def miro():
     """Provide the MiroConnector class for tests."""
     # To switch to the dummy connector for isolated tests, return DummyMiroConnector instead.
     return MiroConnector
+
+
+def miro_config(base_url, **overrides):
+    """Build the [credentials] and [miro] sections MiroConnector reads, pointed at base_url."""
+    miro = {
+        "MIRO_ON_TOGGLE": True,
+        "MIRO_BASE_URL": f"{base_url}/v2/boards/",
+        "MIRO_BOARD_ID": "board=",
+        "MIRO_HTTP_ACCEPT": "application/json",
+        "MIRO_HTTP_CONTENT_TYPE": "application/json",
+        "MIRO_RESULT_LIMIT": 10,
+        "MIRO_FETCH_MODE": "all",
+        "MIRO_SNAPSHOT_FOLDER": "snapshots",
+    }
+    miro.update(overrides)
+    return {"credentials": {"MIRO_API_KEY": "valid_token"}, "miro": miro}
+
+
+@pytest.fixture
+def miro_board(http_config, stub_server):
+    """Provide a factory for MiroConnectors that read from the local stub server."""
+    connectors = []
+
+    def make(**overrides):
+        with patch.dict("src.util.config_helper.CONFIG", miro_config(stub_server.url, **overrides)):
+            connector = MiroConnector()
+        connectors.append(connector)
+        return connector
+
+    yield make
+    for connector in connectors:
+        connector.close()
@@ -0,0 +1,23 @@
+"""Verify delta sync reports only what changed since the last snapshot."""
+
+
+def test_delta_sync(miro_board, stub_server, tmp_path):
+    """Test a sync after a commit classifies added, changed, deleted and unchanged notes."""
+    def sticky(item_id, text, modified_at):
+        return {"id": item_id, "type": "sticky_note", "modifiedAt": modified_at, "data": {"content": text}}
+
+    board = {"data": [sticky("1", "keep", "t0"), sticky("2", "edit me", "t0"), sticky("3", "remove", "t0")], "links": {}}
+    stub_server.routes["/v2/boards/board%3D/items"] = lambda req: (200, {}, board)
+    connector = miro_board(MIRO_SNAPSHOT_FOLDER=str(tmp_path))
+
+    first = connector.syncBoard()
+    assert [note["id"] for note in first["added"]] == ["1", "2", "3"]
+    assert [note["id"] for note in connector.syncBoard()["added"]] == ["1", "2", "3"]
+    connector.commitSync(first)
+
+    board["data"] = [sticky("1", "keep", "t0"), sticky("2", "edited", "t1"), sticky("4", "new", "t1")]
+    second = connector.syncBoard()
+    assert [note["id"] for note in second["added"]] == ["4"]
+    assert [note["content"] for note in second["changed"]] == ["edited"]
+    assert [note["id"] for note in second["deleted"]] == ["3"]
+    assert [note["id"] for note in second["unchanged"]] == ["1"]
@@ -0,0 +1,16 @@
+"""Confirm filtered fetches push the type filter to Miro and project lean fields."""
+
+
+def test_filtered_fetch(miro_board, stub_server):
+    """Test the request asks for sticky notes at max page size and keeps only needed fields."""
+    item = {"id": "345", "type": "sticky_note", "data": {"content": "<p>Plan <b>sprint</b></p>", "shape": "square"},
+            "position": {"x": 10.0, "y": -4.5, "origin": "center"}, "parent": {"id": "frame1"},
+            "style": {"fillColor": "yellow"}, "createdBy": {"id": "u1"}}
+    stub_server.routes["/v2/boards/board%3D/items"] = lambda req: (200, {}, {"data": [item], "links": {}})
+
+    connector = miro_board(MIRO_FETCH_MODE="filtered")
+    notes = [note for page in connector.getStickyNoteStream() for note in page]
+
+    assert "type=sticky_note" in stub_server.requests[0]
+    assert "limit=50" in stub_server.requests[0]
+    assert notes == [{"id": "345", "content": "Plan sprint", "x": 10.0, "y": -4.5, "parent_id": "frame1", "modified_at": None}]
@@ -0,0 +1,19 @@
+"""Ensure board items stream page by page as parsed sticky notes."""
+
+
+def test_stream_board(miro_board, stub_server):
+    """Test each page yields only its sticky notes, with the next page following links.next."""
+    def sticky(text):
+        return {"type": "sticky_note", "data": {"content": f"<p>{text}</p>"}}
+
+    pages = {
+        "/v2/boards/board%3D/items": {"data": [sticky("one"), {"type": "shape", "data": {}}],
+                                      "links": {"next": f"{stub_server.url}/page2"}},
+        "/page2": {"data": [sticky("two"), sticky("three")], "links": {}},
+    }
+    for path, page in pages.items():
+        stub_server.routes[path] = lambda req, page=page: (200, {}, page)
+
+    connector = miro_board()
+    assert list(connector.getBoardStream()) == [["one"], ["two", "three"]]
+    assert connector.getBoard() == ["one", "two", "three"]
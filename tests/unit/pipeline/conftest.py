@@ -0,0 +1,33 @@
+import pytest
+from unittest.mock import patch
+from tests.unit.affinity_grouper.conftest import AI_GROUPING_CONFIG
+
+
+PIPELINE_CONFIG = {
+    "pipeline": {
+        "PIPELINE_QUEUE_SIZE": 2,
+        "PIPELINE_EMBED_WORKERS": 1,
+        "PIPELINE_LABEL_WORKERS": 2,
+        "PIPELINE_LABEL_CHUNK": 1,
+        "PIPELINE_PUBLISH_WORKERS": 2,
+    },
+    "batch": {"BATCH_WORKERS": 3, "BATCH_OUTPUT_FOLDER": "output/boards"},
+    "service": {
+        "SERVICE_HOST": "127.0.0.1",
+        "SERVICE_PORT": 0,
+        "SERVICE_WORKERS": 2,
+        "SERVICE_DROP_FOLDER": "",
+        "SERVICE_DROP_POLL_SECONDS": 0.05,
+        "SERVICE_MAX_JOBS": 10,
+    },
+    "miro": {"MIRO_ON_TOGGLE": True, "MIRO_DELTA_TOGGLE": False},
+    "jira": {"JIRA_ON_TOGGLE": True, "JIRA_JOURNAL_TOGGLE": False},
+    **AI_GROUPING_CONFIG,
+}
+
+
+@pytest.fixture
+def pipeline_config():
+    """Patch the shared CONFIG with the [pipeline] section and everything a BoardPipeline reads."""
+    with patch.dict("src.util.config_helper.CONFIG", PIPELINE_CONFIG):
+        yield PIPELINE_CONFIG
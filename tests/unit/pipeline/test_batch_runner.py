@@ -0,0 +1,113 @@
+"""Verify a batch maps several boards in one process with per-board config and isolation."""
+
+import json
+import threading
+from unittest.mock import patch
+from src.util.config_helper import CONFIG
+from src.pipeline import board_pipeline
+from src.pipeline.batch_runner import BatchRunner
+from tests.unit.affinity_grouper.test_affinity_groups import TopicModel
+
+
+BOARDS = {
+    "b1": [["login with sso", "pay billing invoice"], ["reset login password"]],
+    "b2": [["search filters", "billing history"]],
+}
+
+
+class FakeMiro:
+    sessions = []
+
+    def __init__(self, session=None):
+        self.sessions.append(session)
+
+    def getBoardStream(self, board_id=None):
+        if board_id not in BOARDS:
+            raise ConnectionError(f"board {board_id} not found")
+        yield from BOARDS[board_id]
+
+
+class FakeJira:
+    post_mode = "concurrent"
+    posted = []
+    lock = threading.Lock()
+
+    def __init__(self, session=None, board_id=None):
+        self.project_key = CONFIG["jira"]["JIRA_PROJECT_KEY"]
+        self.failed_items = []
+
+    def startPosting(self, journal=None):
+        pass
+
+    def postGroup(self, position, cluster_id, stories):
+        if self.project_key == "DOWN":
+            self.failed_items.append({"cluster": cluster_id, "note": None, "error": "401 Unauthorized"})
+            return None
+        with self.lock:
+            self.posted.append((self.project_key, list(stories)))
+        return f"{self.project_key}-{position}"
+
+    def finishPosting(self):
+        pass
+
+
+def test_batch_isolates_boards(pipeline_config, http_config, tmp_path):
+    """Test each board posts to its own project, shares one session and a broken board fails alone."""
+    boards = [{"board_id": "b1", "jira": {"JIRA_PROJECT_KEY": "ONE"}},
+              {"board_id": "broken", "jira": {"JIRA_PROJECT_KEY": "BAD"}},
+              {"board_id": "b2", "jira": {"JIRA_PROJECT_KEY": "TWO"}},
+              {"board_id": "b3", "ai_grouping": {"AI_CLUSTERS": 3}}]
+
+    with patch.dict(pipeline_config["ai_grouping"], {"AI_LABEL_ENGINE": "local"}), \
+         patch.dict(pipeline_config["jira"], {"JIRA_PROJECT_KEY": "DEFAULT"}), \
+         patch("src.pipeline.batch_runner.MiroConnector", FakeMiro), \
+         patch("src.pipeline.batch_runner.JiraConnector", FakeJira), \
+         patch("src.affinity_grouper.model_registry.get_model", return_value=TopicModel()):
+        reports = BatchRunner(boards, output_folder=str(tmp_path)).run()
+        assert CONFIG["jira"]["JIRA_PROJECT_KEY"] == "DEFAULT"
+
+    assert [report["status"] for report in reports] == ["ok", "failed", "ok", "failed"]
+    assert "not found" in reports[1]["errors"]["fetch"][0]
+    assert "ai_grouping" in reports[3]["error"]
+    assert sorted(stories for project, stories in FakeJira.posted if project == "ONE") == [
+        ["login with sso", "reset login password"], ["pay billing invoice"]]
+    assert sorted(stories for project, stories in FakeJira.posted if project == "TWO") == [["billing history"], ["search filters"]]
+    assert len(set(map(id, FakeMiro.sessions))) == 1 and FakeMiro.sessions[0] is not None
+    assert json.loads((tmp_path / "b1.json").read_text())["status"] == "ok"
+
+
+def test_board_ids_stay_in_output_folder(pipeline_config, http_config, tmp_path):
+    """Test a board id with path separators is escaped into a file inside the output folder."""
+    output_folder = tmp_path / "out"
+    with patch.dict(pipeline_config["jira"], {"JIRA_JOURNAL_TOGGLE": True, "JIRA_JOURNAL_FSYNC_EVERY": 1, "JIRA_PROJECT_KEY": "ONE"}), \
+         patch("src.pipeline.batch_runner.MiroConnector", FakeMiro), \
+         patch("src.pipeline.batch_runner.JiraConnector", FakeJira), \
+         patch("src.affinity_grouper.model_registry.get_model", return_value=TopicModel()):
+        BatchRunner(["../../x+y/z="], output_folder=str(output_folder)).run()
+
+    assert sorted(path.name for path in tmp_path.rglob("*") if path.is_file()) == [
+        "..%2F..%2Fx%2By%2Fz%3D.journal.jsonl", "..%2F..%2Fx%2By%2Fz%3D.json"]
+
+
+def test_jira_failures_and_queue_size_reported(pipeline_config, http_config, tmp_path):
+    """Test failed Jira writes fail the board in its report and a queue size override reaches its pipeline."""
+    queue_sizes = []
+    pipeline_class = board_pipeline.Pipeline
+
+    def pipeline(stages, queue_size=None):
+        queue_sizes.append(queue_size)
+        return pipeline_class(stages, queue_size=queue_size)
+
+    boards = [{"board_id": "b1", "jira": {"JIRA_PROJECT_KEY": "DOWN"}, "pipeline": {"PIPELINE_QUEUE_SIZE": 5}}]
+    with patch.dict(pipeline_config["ai_grouping"], {"AI_LABEL_ENGINE": "local"}), \
+         patch.dict(pipeline_config["jira"], {"JIRA_PROJECT_KEY": "DEFAULT"}), \
+         patch("src.pipeline.board_pipeline.Pipeline", pipeline), \
+         patch("src.pipeline.batch_runner.MiroConnector", FakeMiro), \
+         patch("src.pipeline.batch_runner.JiraConnector", FakeJira), \
+         patch("src.affinity_grouper.model_registry.get_model", return_value=TopicModel()):
+        report, = BatchRunner(boards, output_folder=str(tmp_path)).run()
+
+    assert queue_sizes == [5]
+    assert report["status"] == "failed" and report["epic_keys"] == []
+    assert [item["error"] for item in report["failed_items"]] == ["401 Unauthorized"] * 2
+    assert json.loads((tmp_path / "b1.json").read_text())["failed_items"] == report["failed_items"]
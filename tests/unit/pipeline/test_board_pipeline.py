@@ -0,0 +1,185 @@
+"""Run a BoardPipeline end to end with a fake board, model and Jira."""
+
+import time
+import threading
+import pytest
+import numpy as np
+from unittest.mock import patch
+from src.pipeline.board_pipeline import BoardPipeline
+from src.connectors.jira_connector import JiraConnector
+from src.connectors.miro_snapshot import MiroSnapshot
+from src.affinity_grouper.affinity_grouper import AffinityGrouper
+from src.affinity_grouper.local_labeler import LocalLabeler
+from tests.unit.affinity_grouper.test_affinity_groups import TopicModel
+from tests.unit.jira.conftest import jira_config
+from tests.unit.jira.test_sync_post import FakeJira as SyncFakeJira
+
+
+class FakeMiro:
+    """Streams pages slowly so later stages have something to overlap with."""
+    def __init__(self, pages, fail_after=None):
+        self.pages = pages
+        self.fail_after = fail_after
+        self.finished = None
+
+    def getBoardStream(self, board_id=None):
+        for index, page in enumerate(self.pages):
+            if index == self.fail_after:
+                raise ConnectionError("board went away")
+            time.sleep(0.02)
+            yield page
+        self.finished = time.perf_counter()
+
+
+class FakeJira:
+    post_mode = "concurrent"
+
+    def __init__(self):
+        self.posted = []
+        self.lock = threading.Lock()
+
+    def startPosting(self, journal=None):
+        self.journal = journal
+
+    def postGroup(self, position, cluster_id, stories):
+        with self.lock:
+            self.posted.append((cluster_id, list(stories)))
+        return f"EPIC-{position}"
+
+    def finishPosting(self):
+        pass
+
+
+def test_board_pipeline_publishes_every_cluster(pipeline_config):
+    """Test embedding starts on the first page and every labeled cluster reaches Jira."""
+    pages = [["login with sso", "pay billing invoice"], ["search filters", "reset login password"], ["billing history"]]
+    miro, jira = FakeMiro(pages), FakeJira()
+    embedded = []
+
+    with patch.dict(pipeline_config["ai_grouping"], {"AI_LABEL_ENGINE": "local"}), \
+         patch("src.affinity_grouper.embedding_engine.model_registry.get_model", return_value=TopicModel()):
+        grouper = AffinityGrouper()
+        encode = grouper.encode
+        grouper.encode = lambda notes: embedded.append(time.perf_counter()) or encode(notes)
+        pipeline = BoardPipeline(miro=miro, grouper=grouper, jira=jira)
+        result = pipeline.run("board")
+
+    assert pipeline.errors == {}
+    assert embedded[0] < miro.finished
+    assert sorted(sorted(stories) for _, stories in jira.posted) == [
+        ["billing history", "pay billing invoice"], ["login with sso", "reset login password"], ["search filters"]]
+    assert pipeline.epic_keys == ["EPIC-0", "EPIC-1", "EPIC-2"]
+    assert dict(result.items()) == dict(jira.posted)
+
+
+def test_fetch_failure_publishes_nothing(pipeline_config):
+    """Test a board that fails mid-listing is reported by stage and never half-posted."""
+    miro, jira = FakeMiro([["login with sso"], ["billing history"]], fail_after=1), FakeJira()
+
+    with patch("src.affinity_grouper.embedding_engine.model_registry.get_model", return_value=TopicModel()):
+        pipeline = BoardPipeline(miro=miro, grouper=AffinityGrouper(), jira=jira)
+        assert pipeline.run("board") is None
+
+    assert [str(e) for e in pipeline.errors["fetch"]] == ["board went away"]
+    assert "cluster" in pipeline.errors
+    assert jira.posted == []
+
+
+class FakeDeltaMiro:
+    """Lists notes with ids and keeps its snapshot the way MiroConnector does."""
+    def __init__(self, snapshot_folder):
+        self.snapshot_folder = snapshot_folder
+        self.notes = []
+
+    def getStickyNoteStream(self, board_id=None):
+        yield from [self.notes[:2], self.notes[2:]]
+
+    def changeSet(self, notes, board_id=None):
+        return MiroSnapshot(board_id, self.snapshot_folder).diff(notes)
+
+    def commitSync(self, change_set, board_id=None):
+        MiroSnapshot(board_id, self.snapshot_folder).save(change_set["added"] + change_set["changed"] + change_set["unchanged"])
+
+
+class FakeSyncJira(FakeJira):
+    post_mode = "sync"
+
+    def postGroupsToJira(self, affinity_groups, journal=None):
+        return [self.postGroup(position, summary, stories) for position, (summary, stories) in enumerate(affinity_groups.items())]
+
+
+def test_delta_mode_skips_unchanged_boards(pipeline_config, tmp_path):
+    """Test an unchanged board is skipped and changes are retried until Jira takes them."""
+    miro, jira = FakeDeltaMiro(str(tmp_path)), FakeSyncJira()
+    jira.failed_items = []
+    miro.notes = [{"id": str(i), "content": text, "modified_at": "t0"}
+                  for i, text in enumerate(["login with sso", "pay billing invoice", "search filters"])]
+
+    with patch.dict(pipeline_config["miro"], {"MIRO_DELTA_TOGGLE": True}), \
+         patch.dict(pipeline_config["ai_grouping"], {"AI_LABEL_ENGINE": "local"}), \
+         patch("src.affinity_grouper.embedding_engine.model_registry.get_model", return_value=TopicModel()):
+        pipeline = BoardPipeline(miro=miro, grouper=AffinityGrouper(), jira=jira)
+        assert pipeline.run("board").nClusters() == 3
+        assert len(jira.posted) == 3
+
+        assert pipeline.run("board") is None
+        assert pipeline.unchanged and len(jira.posted) == 3
+
+        miro.notes.append({"id": "3", "content": "billing history", "modified_at": "t1"})
+        jira.failed_items = [{"cluster": "Billing", "note": "billing history", "error": "unavailable"}]
+        assert pipeline.run("board") is not None
+        jira.failed_items = []
+        assert pipeline.run("board") is not None
+        assert [note["id"] for note in pipeline.change_set["added"]] == ["3"]
+        assert pipeline.run("board") is None and pipeline.unchanged
+
+
+def test_pages_pooled_for_parallel_embedding(pipeline_config):
+    """Test pages are pooled up to the parallel threshold and local labels match a whole-board pass."""
+    pages = [["login with sso", "pay billing invoice"], ["search filters", "reset login password"], ["billing history"]]
+    miro, jira = FakeMiro(pages), FakeJira()
+    encoded = []
+    settings = {"AI_LABEL_ENGINE": "local", "AI_EMBEDDING_WORKERS": 2, "AI_EMBEDDING_PARALLEL_MIN": 3}
+
+    with patch.dict(pipeline_config["ai_grouping"], settings):
+        grouper = AffinityGrouper()
+        grouper.encode = lambda notes: encoded.append(len(notes)) or TopicModel().encode(notes).astype(np.float32)
+        pipeline = BoardPipeline(miro=miro, grouper=grouper, jira=jira)
+        result = pipeline.run("board")
+
+    assert pipeline.errors == {}
+    assert encoded == [4, 1]
+    assert result.summaries == LocalLabeler().labelClusters(result.notes, result.embeddings, result.labels)
+
+
+def test_delta_mode_writes_only_changes(pipeline_config, http_config, stub_server, tmp_path):
+    """Test delta mode refuses post modes that re-import the board, and one edited note only rewrites its cluster."""
+    fake = SyncFakeJira(stub_server)
+    miro = FakeDeltaMiro(str(tmp_path))
+    miro.notes = [{"id": str(i), "content": text, "modified_at": "t0"}
+                  for i, text in enumerate(["login with sso", "pay billing invoice", "search filters"])]
+
+    with patch.dict(pipeline_config["miro"], {"MIRO_DELTA_TOGGLE": True}), \
+         patch.dict(pipeline_config["ai_grouping"], {"AI_LABEL_ENGINE": "local"}), \
+         patch("src.affinity_grouper.embedding_engine.model_registry.get_model", return_value=TopicModel()):
+        with patch.dict("src.util.config_helper.CONFIG", jira_config(stub_server.url, JIRA_POST_MODE="single")):
+            jira = JiraConnector(board_id="board")
+        with pytest.raises(ValueError, match="sync"):
+            BoardPipeline(miro=miro, grouper=AffinityGrouper(), jira=jira)
+        jira.close()
+
+        with patch.dict("src.util.config_helper.CONFIG", jira_config(stub_server.url, JIRA_POST_MODE="sync")):
+            jira = JiraConnector(board_id="board")
+        pipeline = BoardPipeline(miro=miro, grouper=AffinityGrouper(), jira=jira)
+        pipeline.run("board")
+        assert len(fake.writes) == 6
+
+        fake.writes.clear()
+        miro.notes[2] = {"id": "2", "content": "search saved filters", "modified_at": "t1"}
+        pipeline.run("board")
+        jira.close()
+
+    # The single-note cluster was relabeled: a new epic and story replace the old ones, the rest is untouched
+    assert pipeline.errors == {}
+    assert sorted(write[0] for write in fake.writes) == ["close", "close", "create", "create"]
+    assert sum(fields["status"] != "Done" for fields in fake.issues.values()) == 6
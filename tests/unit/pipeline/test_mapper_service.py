@@ -0,0 +1,62 @@
+"""Verify the resident mapper service takes jobs over HTTP and from a drop folder with one warm model."""
+
+import json
+import time
+import requests
+from unittest.mock import patch
+from src.pipeline.mapper_service import MapperService
+from tests.unit.affinity_grouper.test_affinity_groups import TopicModel
+from tests.unit.pipeline.test_batch_runner import FakeMiro, FakeJira
+
+
+def wait_for(service, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = service.job(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_service_maps_jobs(pipeline_config, http_config, tmp_path):
+    """Test HTTP and dropped jobs run on one warm model and report their status and timings."""
+    drop_folder = tmp_path / "drop"
+    drop_folder.mkdir()
+    service = MapperService(drop_folder=str(drop_folder), output_folder=str(tmp_path / "out"))
+
+    with patch.dict(pipeline_config["ai_grouping"], {"AI_LABEL_ENGINE": "local"}), \
+         patch.dict(pipeline_config["jira"], {"JIRA_PROJECT_KEY": "DEFAULT"}), \
+         patch("src.pipeline.batch_runner.MiroConnector", FakeMiro), \
+         patch("src.pipeline.batch_runner.JiraConnector", FakeJira), \
+         patch("src.affinity_grouper.model_registry.warm_up") as warm_up, \
+         patch("src.affinity_grouper.model_registry.get_model", return_value=TopicModel()):
+        service.start()
+        try:
+            url = f"http://127.0.0.1:{service.port}"
+            posted = requests.post(f"{url}/jobs", json={"board_id": "b1", "jira": {"JIRA_PROJECT_KEY": "ONE"}})
+            missing = requests.post(f"{url}/jobs", json="broken").json()
+            assert posted.status_code == 202
+            assert requests.post(f"{url}/jobs", json={"jira": {}}).status_code == 400
+            assert requests.post(f"{url}/jobs", json={"board_id": "b1", "jira": {"JIRA_BASE_URL": "http://evil"}}).status_code == 400
+            assert requests.post(f"{url}/jobs", data=json.dumps({"board_id": "b1"}),
+                                 headers={"Content-Type": "text/plain"}).status_code == 415
+
+            (drop_folder / "bad.json").write_text("{not json")
+            (drop_folder / "b2.json").write_text(json.dumps([{"board_id": "b2", "jira": {"JIRA_PROJECT_KEY": "TWO"}}]))
+            service.scanDropFolder()
+            dropped = json.loads((drop_folder / "accepted" / "b2.json.status").read_text())["jobs"][0]
+
+            job = wait_for(service, posted.json()["id"])
+            assert job["status"] == "ok" and job["report"]["epic_keys"] == ["ONE-0", "ONE-1"]
+            assert {"queued", "run", "fetch", "cluster", "publish"} <= set(job["timings"])
+            assert requests.get(f"{url}/jobs/{job['id']}").json()["status"] == "ok"
+            assert wait_for(service, missing["id"])["status"] == "failed"
+            assert wait_for(service, dropped)["report"]["epic_keys"] == ["TWO-0", "TWO-1"]
+            assert (drop_folder / "rejected" / "bad.json").exists()
+            assert requests.get(f"{url}/jobs/unknown").status_code == 404
+            assert requests.get(f"{url}/health").json()["queued"] == 0
+        finally:
+            service.stop()
+
+    assert warm_up.call_count == 1
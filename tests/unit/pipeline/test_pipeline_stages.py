@@ -0,0 +1,50 @@
+"""Verify pipeline stages overlap, apply backpressure and keep errors to their own stage."""
+
+import time
+import threading
+from src.pipeline.pipeline import Pipeline, Stage
+
+
+def test_stages_overlap_with_backpressure(pipeline_config):
+    """Test the consumer starts before the producer ends and the producer never runs far ahead."""
+    produced, consumed, lead = [], [], []
+    lock = threading.Lock()
+
+    def produce(_, emit):
+        for n in range(10):
+            with lock:
+                produced.append(time.perf_counter())
+                lead.append(len(produced) - len(consumed))
+            emit(n)
+
+    def consume(n, emit):
+        time.sleep(0.01)
+        with lock:
+            consumed.append(time.perf_counter())
+        emit(n * 2)
+
+    pipeline = Pipeline([Stage("produce", produce), Stage("consume", consume)], queue_size=1)
+    results = pipeline.run([None])
+
+    assert results == [n * 2 for n in range(10)]
+    assert consumed[0] < produced[-1]
+    assert max(lead) <= 3
+    assert set(pipeline.timings) == {"produce", "consume"}
+
+
+def test_errors_stay_in_their_stage(pipeline_config):
+    """Test a failing item is recorded against its stage while the other items flow through."""
+    def check(n, emit):
+        if n == 3:
+            raise ValueError("bad item")
+        emit(n)
+
+    collected = []
+    pipeline = Pipeline([
+        Stage("check", check, workers=3),
+        Stage("total", lambda n, emit: collected.append(n), flush=lambda emit: emit(sum(collected))),
+    ])
+
+    assert pipeline.run(range(6)) == [0 + 1 + 2 + 4 + 5]
+    assert [str(e) for e in pipeline.errors["check"]] == ["bad item"]
+    assert "total" not in pipeline.errors